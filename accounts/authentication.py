@@ -0,0 +1,33 @@
+from .cache import get_user
+from core.routers import set_routing_user
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    # JWTAuthentication, but the user comes from a short-lived cache entry
+    # that is dropped whenever the user is saved or deleted, so most requests
+    # don't read the users table at all.
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        # before any query, so the router knows whose recent writes to respect
+        set_routing_user(user_id)
+
+        if api_settings.CHECK_REVOKE_TOKEN: # needs the password hash, which isn't cached
+            return super().get_user(validated_token)
+
+        user = get_user(user_id)
+
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
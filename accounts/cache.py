@@ -0,0 +1,34 @@
+from .models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+
+
+# Enough of a user for authentication and permission checks. The password
+# and contact details stay out of the cache; they load on first access, and
+# save() on a user built from here only writes the fields it holds.
+CACHED_USER_FIELDS = [
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in {'id', 'email', 'username', 'first_name', 'middle_name', 'last_name', 'role', 'is_staff', 'is_superuser', 'is_active', 'is_verified', 'date_joined'}
+]
+
+
+def _user_key(user_id:str) -> str:
+    return f'accounts:user:{user_id}'
+
+
+def get_user(user_id:str):
+    values = cache.get(_user_key(user_id))
+
+    if values is None:
+        values = User.objects.filter(id=user_id).values_list(*CACHED_USER_FIELDS).first()
+        if values is None:
+            return None
+        cache.set(_user_key(user_id), values, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+    return User.from_db(router.db_for_read(User), CACHED_USER_FIELDS, values)
+
+
+def invalidate_user(user_id:str):
+    # after commit, so a concurrent request can't re-cache the old row
+    transaction.on_commit(lambda: cache.delete(_user_key(user_id)))
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:06
+
+import hashlib
+from django.db import migrations, models
+
+
+# The DDL lives here rather than being imported from accounts.search, so the
+# migration keeps doing what it did when the index changes there.
+
+def fts_rowid(pk) -> int:
+    # the same key core.search.fts_rowid gives a row
+    return int.from_bytes(hashlib.blake2b(str(pk).encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+def create_search_index(apps, schema_editor):
+    table = apps.get_model('accounts', 'User')._meta.db_table
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS accounts_user_fts "
+            "USING fts5(pk UNINDEXED, first_name, middle_name, last_name, username, email, tokenize='unicode61')"
+        )
+        with schema_editor.connection.cursor() as reader, schema_editor.connection.cursor() as writer:
+            reader.execute(f"SELECT id, first_name, middle_name, last_name, username, email FROM {table}")
+            while True:
+                rows = reader.fetchmany(2000)
+                if not rows:
+                    break
+                writer.executemany(
+                    "INSERT INTO accounts_user_fts (rowid, pk, first_name, middle_name, last_name, username, email) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    [[fts_rowid(row[0])] + list(row) for row in rows]
+                )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS accounts_user_fts ON {table} USING GIN (("
+            f"setweight(to_tsvector('simple', coalesce(first_name, '')), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce(middle_name, '')), 'B') || "
+            f"setweight(to_tsvector('simple', coalesce(last_name, '')), 'C') || "
+            f"setweight(to_tsvector('simple', coalesce(username, '')), 'D') || "
+            f"setweight(to_tsvector('simple', coalesce(email, '')), 'D')"
+            f"))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS accounts_user_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_user_first_name'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', '-id'], name='user_date_joined_id_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
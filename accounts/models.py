@@ -1,6 +1,7 @@
 import uuid
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class MyUserManager(BaseUserManager):
@@ -57,4 +58,10 @@ class User(AbstractUser):
         super().save(*args, **kwargs)
 
     class Meta:
-        ordering = ('-date_joined',)
\ No newline at end of file
+        ordering = ('-date_joined',)
+        indexes = [
+            models.Index(fields=['-date_joined', '-id'], name='user_date_joined_id_idx'),
+            models.Index(Lower('first_name'), name='user_first_name_lower_idx'),
+            models.Index(Lower('middle_name'), name='user_middle_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+        ]
\ No newline at end of file
@@ -2,4 +2,5 @@ from rest_framework.permissions import BasePermission
 
 class IsVerified(BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_verified and request.user.is_authenticated
\ No newline at end of file
+        # anonymous users have no is_verified; check is_authenticated first
+        return request.user.is_authenticated and request.user.is_verified
\ No newline at end of file
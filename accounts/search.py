@@ -0,0 +1,11 @@
+from core.search import FullTextIndex
+
+
+user_index = FullTextIndex(
+    model_label='accounts.User',
+    fields=['first_name', 'middle_name', 'last_name', 'username', 'email'],
+    weights=[5.0, 2.0, 5.0, 8.0, 8.0],
+    table='accounts_user_fts',
+    config='simple',
+    tokenizer='unicode61',
+)
@@ -1,5 +1,7 @@
 from .models import User
+from core.projections import project
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -23,10 +25,13 @@ class SignUpSerializer(serializers.ModelSerializer):
         if User.objects.filter(phone_number=phone_number).exists():
             raise serializers.ValidationError('This phone number is already in use')
 
+        # hashed here, as the view saves inside a transaction holding the write lock
+        attrs['password'] = make_password(attrs['password'])
+
         return attrs
 
     def create(self, validated_data):
-        user = User.objects.create(
+        return User.objects.create(
             first_name=validated_data['first_name'],
             middle_name=validated_data['middle_name'],
             last_name=validated_data['last_name'],
@@ -34,10 +39,8 @@ class SignUpSerializer(serializers.ModelSerializer):
             email=validated_data['email'],
             address=validated_data['address'],
             phone_number=validated_data['phone_number'],
+            password=validated_data['password'],
         )
-        user.set_password(validated_data['password'])
-        user.save()
-        return user
 
 
 class LoginSerializer(serializers.Serializer):
@@ -72,4 +75,9 @@ class LoginSerializer(serializers.Serializer):
 class UserInfoSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'first_name', 'middle_name', 'last_name', 'username', 'email', 'address', 'phone_number', 'date_joined']
\ No newline at end of file
+        fields = ['id', 'first_name', 'middle_name', 'last_name', 'username', 'email', 'address', 'phone_number', 'date_joined']
+
+
+def user_rows(rows, fields:list=None) -> list:
+    # UserInfoSerializer's output for read-only lists, built from values() rows
+    return project(rows, fields or UserInfoSerializer.Meta.fields)
@@ -0,0 +1,30 @@
+from .cache import CACHED_USER_FIELDS, invalidate_user
+from .models import User
+from .search import user_index
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    # logins save last_login only; don't rewrite the index for those
+    if update_fields and not set(update_fields) & set(user_index.fields):
+        return
+    user_index.update([instance])
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    user_index.remove([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def uncache_saved_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(CACHED_USER_FIELDS):
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def uncache_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
@@ -1,3 +1,206 @@
+from .models import User
+from core.testing import QueryBudgetMixin
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+
+def make_user(name:str, **fields) -> User:
+    defaults = dict(
+        email=f'{name}@example.com', username=name, phone_number=f'+233{abs(hash(name)) % 10 ** 9:09d}',
+        first_name=name.title(), last_name='Mensah', address='1 Library Road', is_verified=True
+    )
+    defaults.update(fields)
+    return User.objects.create(**defaults)
+
+
+def client_for(user:User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    # every route in settings.QUERY_BUDGETS served from accounts; a few rows
+    # each, so an N+1 shows up as going over budget
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = make_user('librarian', role='Librarian', is_staff=True)
+        for i in range(5):
+            make_user(f'member{i}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = client_for(self.librarian)
+
+    def get(self, url_name:str, query:str=''):
+        with self.assertQueryBudget(url_name):
+            response = self.client.get(reverse(url_name) + query)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_get_all_users(self):
+        self.assertEqual(len(self.get('get_all_users').json()['data']), 6)
+
+    def test_search_user(self):
+        self.assertEqual(len(self.get('search_user', '?query=member').json()['users']), 5)
+
+    def test_filter_user(self):
+        self.get('filter_user', '?last_name=mensah')
+
+
+class DirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = make_user('librarian', role='Librarian', is_staff=True)
+        cls.members = [make_user(f'member{i}') for i in range(5)]
+        # ties on date_joined are broken by id
+        User.objects.filter(pk__in=[user.pk for user in cls.members[1:4]]).update(date_joined=cls.members[1].date_joined)
+
+    def setUp(self):
+        cache.clear()
+        self.client = client_for(self.librarian)
+
+    def test_pages_through_every_user(self):
+        usernames, query = [], '?page_size=2&fields=username'
+        while True:
+            response = self.client.get(reverse('get_all_users') + query)
+            self.assertEqual(response.status_code, 200, response.content)
+            page = response.json()
+            self.assertLessEqual(len(page['data']), 2)
+            usernames += [row['username'] for row in page['data']]
+            if not page['next_cursor']:
+                break
+            query = f"?page_size=2&fields=username&cursor={page['next_cursor']}"
+        expected = User.objects.order_by('-date_joined', '-id').values_list('username', flat=True)
+        self.assertEqual(usernames, list(expected))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('get_all_users') + '?cursor=bm9wZQ')
+        self.assertEqual(response.status_code, 400)
+
+    def search(self, query:str) -> list:
+        response = self.client.get(reverse('search_user') + f'?query={query}&fields=username')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['username'] for row in response.json()['users']]
+
+    def test_search_matches_prefixes(self):
+        self.assertEqual(self.search('member3'), ['member3'])
+        self.assertCountEqual(self.search('mens'), ['librarian'] + [f'member{i}' for i in range(5)])
+
+    def test_search_follows_saves_and_deletes(self):
+        member = self.members[0]
+        member.last_name = 'Owusu'
+        member.save()
+        self.assertEqual(self.search('owusu'), ['member0'])
+
+        member.delete()
+        self.assertEqual(self.search('owusu'), [])
+
+
+class FilterUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = make_user('librarian', role='Librarian', is_staff=True)
+        for i in range(5):
+            make_user(f'member{i}')
+        make_user('emile', first_name='Émile', last_name='Zola')
+
+    def setUp(self):
+        cache.clear()
+        self.client = client_for(self.librarian)
+
+    def filter(self, query:str):
+        response = self.client.get(reverse('filter_user') + query)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_pages_through_every_match(self):
+        seen, cursor = [], ''
+        while True:
+            page = self.filter(f'?last_name=mensah&page_size=2&fields=username{cursor}')
+            self.assertLessEqual(len(page['users']), 2)
+            seen += [row['username'] for row in page['users']]
+            if not page['next_cursor']:
+                break
+            cursor = f"&cursor={page['next_cursor']}"
+        self.assertCountEqual(seen, ['librarian'] + [f'member{i}' for i in range(5)])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('filter_user') + '?last_name=mensah&cursor=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_ascii_names(self):
+        page = self.filter('?first_name=Émile&fields=username')
+        self.assertEqual([row['username'] for row in page['users']], ['emile'])
+
+
+class PasswordResetConfirmTests(TestCase):
+    def test_resets_the_password(self):
+        user = make_user('member')
+        response = APIClient().patch(reverse('password_reset_confirm'), {
+            'uid':urlsafe_base64_encode(force_bytes(user.pk)),
+            'token':default_token_generator.make_token(user),
+            'password':'new-password'
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('new-password'))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('member')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('get_borrowed_books'))
+        user_queries = [query['sql'] for query in queries if 'FROM "accounts_user"' in query['sql']]
+        return response, user_queries
+
+    def save(self, **fields):
+        for name, value in fields.items():
+            setattr(self.user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+    def test_user_is_read_once(self):
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(user_queries), 1)
+
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(user_queries, [])
+
+    def test_deactivating_drops_the_cached_user(self):
+        self.get()
+        self.save(is_active=False)
+        self.assertEqual(self.get()[0].status_code, 401)
+
+    def test_unverifying_drops_the_cached_user(self):
+        self.get()
+        self.save(is_verified=False)
+        self.assertEqual(self.get()[0].status_code, 403)
+
+    def test_deleting_drops_the_cached_user(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.get()[0].status_code, 401)
+
+    def test_login_keeps_the_cached_user(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.get()[1], [])
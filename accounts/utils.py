@@ -1,36 +1,23 @@
-import os
-from dotenv import load_dotenv
-from trycourier import Courier
+from notifications.utils import enqueue_email
 
-load_dotenv()
-
-client = Courier(auth_token=os.getenv('AUTH_TOKEN'))
 
 def send_verification_email(email, username, link):
-    client.send_message(
-        message={
-            "to": {
-            "email": email,
-            },
-            "template": "HQRFKDHDK84B16GJAQ7PWPFATXS8",
-            "data": {
+    enqueue_email(
+        email=email,
+        template="HQRFKDHDK84B16GJAQ7PWPFATXS8",
+        data={
             "username": username,
             "link": link,
-            },
         }
     )
 
 
 def send_password_reset_email(email, username, link):
-    client.send_message(
-        message={
-            "to": {
-            "email": email,
-            },
-            "template": "WF7909Y7ZWMNWNNTNNQRHDTBKDF4",
-            "data": {
+    enqueue_email(
+        email=email,
+        template="WF7909Y7ZWMNWNNTNNQRHDTBKDF4",
+        data={
             "username": username,
             "link": link,
-            },
         }
-    )
\ No newline at end of file
+    )
@@ -1,14 +1,20 @@
 import os, jwt
 from .models import User
 from .permissions import IsVerified
-from .serializers import SignUpSerializer, LoginSerializer, UserInfoSerializer
+from .search import user_index
+from .serializers import SignUpSerializer, LoginSerializer, UserInfoSerializer, user_rows
 from .utils import send_verification_email, send_password_reset_email
+from core.filters import filter_iexact_in, get_list_param
+from core.pagination import InvalidCursor, get_page_size, keyset_paginate
+from core.projections import InvalidFields, get_fields_param
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.sites.shortcuts import get_current_site
-from django.db.models import Q
+from django.db import transaction
 from django.shortcuts import render
 from django.urls import reverse
-from django.utils.encoding import force_bytes
+from django.utils.dateparse import parse_date
+from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from dotenv import load_dotenv
 from rest_framework import status
@@ -26,15 +32,15 @@ def user_signup_view(request):
         serializer = SignUpSerializer(data=request.data)
 
         if serializer.is_valid(raise_exception=True):
-            serializer.save()
+            with transaction.atomic():
+                user = serializer.save()
 
-            user = User.objects.get(email=serializer.validated_data['email'])
-            token = RefreshToken.for_user(user)
-            current_site = get_current_site(request).domain
-            relative_link = reverse('verify_user')
-            absolute_url = f'http://{current_site}{relative_link}?token={token}'
-            link = str(absolute_url)
-            send_verification_email(email=user.email, username=user.username, link=link)
+                token = RefreshToken.for_user(user)
+                current_site = get_current_site(request).domain
+                relative_link = reverse('verify_user')
+                absolute_url = f'http://{current_site}{relative_link}?token={token}'
+                link = str(absolute_url)
+                send_verification_email(email=user.email, username=user.username, link=link)
 
             return Response(
                 {
@@ -185,7 +191,7 @@ def password_reset_confirm_view(request):
             )
 
         try:
-            user_id = urlsafe_base64_decode(uid)
+            user_id = force_str(urlsafe_base64_decode(uid))
             user = User.objects.get(id=user_id)
 
             if not default_token_generator.check_token(user, token):
@@ -269,14 +275,36 @@ def update_user_info_view(request, user_id):
 @permission_classes([IsAdminUser])
 def get_all_users_view(request):
     if request.method == 'GET':
-        users = User.objects.all()
+        try:
+            fields = get_fields_param(request, UserInfoSerializer.Meta.fields)
+        except InvalidFields as e:
+            return Response(
+                {
+                    'success':False,
+                    'message':str(e)
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        serializer = UserInfoSerializer(users, many=True)
+        try:
+            users, next_cursor = keyset_paginate(
+                User.objects.values(*fields, 'date_joined', 'id'),
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+                field='date_joined'
+            )
+        except InvalidCursor:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
             {
                 'success':True,
-                'data':serializer.data
+                'data':user_rows(users, fields),
+                'next_cursor':next_cursor
             }, status=status.HTTP_200_OK
         )
 
@@ -303,21 +331,28 @@ def search_user_view(request):
                 }, status=status.HTTP_400_BAD_REQUEST
             )
         
-        users = User.objects.filter(
-            Q(first_name__icontains=query) |
-            Q(middle_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(username__icontains=query) |
-            Q(email__icontains=query) 
-        )
+        try:
+            fields = get_fields_param(request, UserInfoSerializer.Meta.fields)
+        except InvalidFields as e:
+            return Response(
+                {
+                    'success':False,
+                    'message':str(e)
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        serializer = UserInfoSerializer(users, many=True)
+        try:
+            limit = min(int(request.query_params.get('limit', settings.USER_SEARCH_RESULT_CAP)), settings.USER_SEARCH_RESULT_CAP)
+        except ValueError:
+            limit = settings.USER_SEARCH_RESULT_CAP
+
+        users = user_index.search_rows(query, fields, limit=max(limit, 1))
 
         return Response(
             {
                 'success':False,
                 'message':'Below are your search results',
-                'users':serializer.data,
+                'users':user_rows(users, fields),
             }, status=status.HTTP_200_OK
         )
 
@@ -334,12 +369,16 @@ def filter_users_view(request):
                 }, status=status.HTTP_403_FORBIDDEN
             )
         
-        first_name = request.query_params.get('first_name')
-        middle_name = request.query_params.get('middle_name')
-        last_name = request.query_params.get('last_name')
-        date_joined = request.query_params.get('date_joined')
-
-        if not first_name and not middle_name and not last_name and not date_joined:
+        first_names = get_list_param(request, 'first_name', split=True)
+        middle_names = get_list_param(request, 'middle_name', split=True)
+        last_names = get_list_param(request, 'last_name', split=True)
+        date_params = {
+            'date_joined':request.query_params.get('date_joined'),
+            'date_joined__gte':request.query_params.get('date_joined_after'),
+            'date_joined__lte':request.query_params.get('date_joined_before'),
+        }
+
+        if not first_names and not middle_names and not last_names and not any(date_params.values()):
             return Response(
                 {
                     'success':False,
@@ -347,23 +386,61 @@ def filter_users_view(request):
                 }, status=status.HTTP_400_BAD_REQUEST
             )
 
+        try:
+            fields = get_fields_param(request, UserInfoSerializer.Meta.fields)
+        except InvalidFields as e:
+            return Response(
+                {
+                    'success':False,
+                    'message':str(e)
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
         users = User.objects.all()
-        
-        if first_name:
-            users = users.filter(first_name__iexact=first_name)
-        if middle_name:
-            users = users.filter(middle_name__iexact=middle_name)
-        if last_name:
-            users = users.filter(last_name__iexact=last_name)
-        if date_joined:
-            users = users.filter(date_joined__iexact=str(date_joined))
 
-        serializer = UserInfoSerializer(users, many=True)
+        if first_names:
+            users = filter_iexact_in(users, 'first_name', first_names)
+        if middle_names:
+            users = filter_iexact_in(users, 'middle_name', middle_names)
+        if last_names:
+            users = filter_iexact_in(users, 'last_name', last_names)
+
+        for lookup, value in date_params.items():
+            if not value:
+                continue
+            try:
+                date = parse_date(value)
+            except ValueError:
+                date = None
+            if date is None:
+                return Response(
+                    {
+                        'success':False,
+                        'message':'Dates must be in YYYY-MM-DD format'
+                    }, status=status.HTTP_400_BAD_REQUEST
+                )
+            users = users.filter(**{lookup:date})
+
+        try:
+            users, next_cursor = keyset_paginate(
+                users.values(*fields, 'date_joined', 'id'),
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+                field='date_joined'
+            )
+        except InvalidCursor:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
             {
                 'success':False,
                 'message':'Below are your filter results',
-                'users':serializer.data,
+                'users':user_rows(users, fields),
+                'next_cursor':next_cursor
             }, status=status.HTTP_200_OK
         )
\ No newline at end of file
@@ -0,0 +1,77 @@
+import logging, time
+from benchmarks.runner import send
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import seed_library
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from core.benchmarking import isolated_database
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+# SQLite settings to compare: the stock backend's behaviour and the tuned
+# defaults from settings.py
+SQLITE_PROFILES = {
+    'stock':{'journal_mode':'DELETE', 'synchronous':'FULL', 'transaction_mode':''},
+    'tuned':{'journal_mode':'WAL', 'synchronous':'NORMAL', 'transaction_mode':'IMMEDIATE'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure how concurrent checkout and reserve throughput scales with client threads on the configured database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', default='1,2,4,8,16', help='Comma-separated thread counts')
+        parser.add_argument('--operations', type=int, default=200, help='Checkouts plus reserves per run')
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        database = connections['default'].settings_dict
+        thread_counts = [int(count) for count in options['threads'].split(',')]
+
+        if database['ENGINE'] == 'core.backends.sqlite3':
+            profiles = SQLITE_PROFILES
+        else:
+            profiles = {database['ENGINE'].rsplit('.', 1)[-1]:{}}
+
+        original = dict(database['OPTIONS'])
+        try:
+            for profile, overrides in profiles.items():
+                database['OPTIONS'].update(overrides)
+                for threads in thread_counts:
+                    self.report(profile, threads, self.run(threads, options['operations']))
+                database['OPTIONS'].clear()
+                database['OPTIONS'].update(original)
+        finally:
+            database['OPTIONS'].clear()
+            database['OPTIONS'].update(original)
+
+    def run(self, threads:int, operations:int) -> dict:
+        connections.close_all()
+        cache.clear()
+
+        with isolated_database():
+            half = max(operations // 2, 1)
+            library = seed_library(books=10, users=half, loans=0, reservations=0, requests=half)
+            planned = []
+            for i in range(half):
+                planned += [SCENARIOS['checkout_book'](library, i), SCENARIOS['reserve_book'](library, i)]
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(send, planned))
+            wall = time.perf_counter() - start
+
+        statuses = Counter(code for _, _, code, _ in results)
+        return {
+            'ok':sum(count for code, count in statuses.items() if code < 400),
+            'failed':sum(count for code, count in statuses.items() if code >= 400),
+            'wall':wall,
+        }
+
+    def report(self, profile:str, threads:int, result:dict):
+        self.stdout.write(
+            f"{profile:<10} threads {threads:>3}  {result['ok'] / result['wall']:>8.1f} ok/s  "
+            f"failed {result['failed']}"
+        )
@@ -0,0 +1,86 @@
+import logging
+from accounts.urls import urlpatterns as accounts_urls
+from benchmarks.report import build_report, compare_reports, read_report, write_report
+from benchmarks.runner import run_scenario
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import seed_library
+from books.urls import urlpatterns as books_urls
+from core.benchmarking import isolated_database, without_throttles
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+
+def route_names() -> list:
+    return [pattern.name for pattern in books_urls + accounts_urls if pattern.name]
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic library, load every books and accounts route concurrently and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--loans', type=int, default=500)
+        parser.add_argument('--reservations', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=50, help='Requests per route')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients per route')
+        parser.add_argument('--route', action='append', dest='routes', help='Only run this URL name; repeatable')
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--baseline', help='Report to compare against; exits non-zero on regressions')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency/memory growth as a fraction')
+
+    def handle(self, *args, **options):
+        names = route_names()
+        uncovered = [name for name in names if name not in SCENARIOS]
+        if uncovered:
+            raise CommandError(f"No benchmark scenario for: {', '.join(uncovered)}")
+
+        routes = options['routes'] or names
+        unknown = [name for name in routes if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown route: {', '.join(unknown)}")
+
+        # expected 4xx responses are counted in the report, not logged
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+        config = {
+            key:options[key] for key in ('books', 'users', 'loans', 'reservations', 'requests', 'concurrency')
+        }
+
+        with isolated_database(), without_throttles():
+            cache.clear()
+            library = seed_library(
+                books=options['books'], users=options['users'], loans=options['loans'],
+                reservations=options['reservations'], requests=options['requests']
+            )
+
+            results = {}
+            for name in routes:
+                results[name] = run_scenario(name, library, options['requests'], options['concurrency'])
+                latency = results[name]['latency_ms']
+                self.stdout.write(
+                    f"{name:<26} p50 {latency['p50']:>8.1f} ms  p95 {latency['p95']:>8.1f} ms  "
+                    f"p99 {latency['p99']:>8.1f} ms  queries {results[name]['queries_per_request']['max']:>3}  "
+                    f"statuses {results[name]['statuses']}"
+                )
+                for error, count in results[name]['exceptions'].items():
+                    self.stdout.write(self.style.WARNING(f'    {count} x {error}'))
+                if results[name]['error_rate'] == 1:
+                    self.stdout.write(self.style.WARNING('    every request failed'))
+
+            report = build_report(config, results)
+
+        write_report(report, options['output'])
+        self.stdout.write(f"Report written to {options['output']}")
+
+        # a scenario that only ever gets an error back times the error path,
+        # not the route, so its numbers mean nothing
+        failing = [name for name in routes if results[name]['error_rate'] == 1]
+        if failing:
+            raise CommandError(f"Every request failed for: {', '.join(failing)}")
+
+        if options['baseline']:
+            regressions = compare_reports(read_report(options['baseline']), report, tolerance=options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
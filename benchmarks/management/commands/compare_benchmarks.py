@@ -0,0 +1,20 @@
+from benchmarks.report import compare_reports, read_report
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Compare two benchmark reports and exit non-zero if the second regressed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline')
+        parser.add_argument('current')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency/memory growth as a fraction')
+
+    def handle(self, *args, **options):
+        regressions = compare_reports(
+            read_report(options['baseline']), read_report(options['current']), tolerance=options['tolerance']
+        )
+
+        if regressions:
+            raise CommandError('Regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions'))
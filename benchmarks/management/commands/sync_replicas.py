@@ -0,0 +1,35 @@
+import sqlite3, time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over the files in SQLITE_REPLICA_PATHS, standing in for replication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Keep copying every this many seconds, to simulate replica lag')
+
+    def handle(self, *args, **options):
+        paths = getattr(settings, 'SQLITE_REPLICA_PATHS', [])
+        if not paths:
+            raise CommandError('Set SQLITE_REPLICA_PATHS to use local SQLite replicas')
+
+        while True:
+            self.sync(paths)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, paths:list):
+        source = sqlite3.connect(settings.SQLITE_PATH)
+        try:
+            for path in paths:
+                replica = sqlite3.connect(path)
+                try:
+                    source.backup(replica)
+                finally:
+                    replica.close()
+        finally:
+            source.close()
+
+        self.stdout.write(f'Synced {len(paths)} replica(s)')
@@ -0,0 +1,65 @@
+import json, platform
+import django
+from django.db import connection
+from django.utils import timezone
+
+
+def build_report(config:dict, routes:dict) -> dict:
+    return {
+        'created_at':timezone.now().isoformat(),
+        'environment':{
+            'python':platform.python_version(),
+            'django':django.get_version(),
+            'database':connection.vendor,
+        },
+        'config':config,
+        'routes':routes,
+    }
+
+
+def write_report(report:dict, path:str):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def read_report(path:str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_reports(baseline:dict, current:dict, tolerance:float=0.25, min_delta_ms:float=1.0) -> list:
+    # Regressions of current against baseline, one message each. Latency and
+    # memory may drift by `tolerance` (a fraction) before they count, and
+    # latency also needs to move by min_delta_ms so sub-millisecond routes
+    # don't fail on noise. Query counts are deterministic and get no slack.
+    regressions = []
+
+    if baseline['config'] != current['config']:
+        regressions.append('runs were made with different seed/load settings and are not comparable')
+        return regressions
+
+    for url_name, before in baseline['routes'].items():
+        after = current['routes'].get(url_name)
+        if after is None:
+            regressions.append(f'{url_name}: missing from the current run')
+            continue
+
+        for stat in ('p95', 'p99'):
+            old, new = before['latency_ms'][stat], after['latency_ms'][stat]
+            if new > old * (1 + tolerance) and new - old >= min_delta_ms:
+                regressions.append(f'{url_name}: {stat} latency {old:.1f} ms -> {new:.1f} ms')
+
+        old, new = before['queries_per_request']['max'], after['queries_per_request']['max']
+        if new > old:
+            regressions.append(f'{url_name}: up to {new} queries per request, was {old}')
+
+        old, new = before['error_rate'], after['error_rate']
+        if new > old:
+            regressions.append(f'{url_name}: error rate {old:.1%} -> {new:.1%}')
+
+    old = max((route['peak_rss_kb'] or 0 for route in baseline['routes'].values()), default=0)
+    new = max((route['peak_rss_kb'] or 0 for route in current['routes'].values()), default=0)
+    if old and new > old * (1 + tolerance):
+        regressions.append(f'peak RSS {old} KB -> {new} KB')
+
+    return regressions
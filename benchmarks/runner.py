@@ -0,0 +1,65 @@
+import time
+from .scenarios import SCENARIOS
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from core.benchmarking import peak_rss_kb, percentile, run_in_thread
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+@run_in_thread
+def send(request:dict):
+    client = APIClient()
+    client.raise_request_exception = False # a 500 is a result, not a crash
+    if request['user'] is not None:
+        client.force_authenticate(request['user'])
+
+    # connection is per thread, so this only sees this request's queries
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = getattr(client, request['method'])(request['path'], request['data'], format=request['format'])
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+
+    # the test client keeps the exception behind a 500 instead of raising it
+    error = None
+    if response.status_code >= 500 and getattr(response, 'exc_info', None):
+        error = type(response.exc_info[1]).__name__
+    return elapsed, len(queries), response.status_code, error
+
+
+def run_scenario(url_name:str, library, requests:int, concurrency:int) -> dict:
+    build = SCENARIOS[url_name]
+    planned = [build(library, i) for i in range(requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, planned))
+    wall = time.perf_counter() - start
+
+    latencies = [elapsed * 1000 for elapsed, _, _, _ in results]
+    queries = [count for _, count, _, _ in results]
+    statuses = Counter(str(code) for _, _, code, _ in results)
+    exceptions = Counter(error for _, _, _, error in results if error)
+
+    return {
+        'requests':requests,
+        'concurrency':concurrency,
+        'throughput_rps':round(requests / wall, 2) if wall else None,
+        'latency_ms':{
+            'p50':round(percentile(latencies, 0.50), 3),
+            'p95':round(percentile(latencies, 0.95), 3),
+            'p99':round(percentile(latencies, 0.99), 3),
+            'max':round(max(latencies), 3),
+        },
+        'queries_per_request':{
+            'mean':round(sum(queries) / len(queries), 2),
+            'max':max(queries),
+        },
+        'statuses':dict(statuses),
+        'exceptions':dict(exceptions),
+        'error_rate':round(sum(n for code, n in statuses.items() if code >= '400') / requests, 4),
+        'peak_rss_kb':peak_rss_kb(),
+    }
@@ -0,0 +1,233 @@
+import io
+from .seed import LIBRARIAN_PASSWORD
+from django.contrib.auth.tokens import default_token_generator
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+# One scenario per URL name. A scenario turns the seeded library and the
+# request number into the request to send; it runs before the clock starts,
+# so token minting and file building are not part of the measured latency.
+SCENARIOS = {}
+
+
+def scenario(url_name:str):
+    def register(build):
+        SCENARIOS[url_name] = build
+        return build
+    return register
+
+
+def call(user, method:str, path:str, data=None, format:str='json') -> dict:
+    return {'user':user, 'method':method, 'path':path, 'data':data, 'format':format}
+
+
+def _import_file(i:int, rows:int=100):
+    lines = ['isbn,title,description,authors,genre,publisher,language,date_published,total_copies']
+    lines += [
+        f'973{i * rows + j:010d},Imported {j},Imported during a benchmark,Bench Author,Science,Orbit,English,2001-01-01,2'
+        for j in range(rows)
+    ]
+    upload = io.BytesIO('\n'.join(lines).encode())
+    upload.name = f'benchmark-{i}.csv'
+    return upload
+
+
+# books
+
+@scenario('get_all_books')
+def get_all_books(library, i):
+    return call(library.member(i), 'get', reverse('get_all_books'))
+
+
+@scenario('add_books')
+def add_books(library, i):
+    return call(library.librarian, 'post', reverse('add_books'), {
+        'isbn':f'974{i:010d}', 'title':f'Added {i}', 'description':'Added during a benchmark',
+        'authors':'Bench Author', 'genre':'History', 'publisher':'Tor', 'language':'English', 'date_published':'2001-01-01', 'total_copies':2
+    })
+
+
+@scenario('import_books')
+def import_books(library, i):
+    return call(library.librarian, 'post', reverse('import_books'), {'file':_import_file(i)}, format='multipart')
+
+
+@scenario('filter_books')
+def filter_books(library, i):
+    return call(library.member(i), 'get', reverse('filter_books') + '?genre=fantasy&genre=science&publisher=penguin')
+
+
+@scenario('book_facets')
+def book_facets(library, i):
+    return call(library.member(i), 'get', reverse('book_facets'))
+
+
+@scenario('get_author_books')
+def get_author_books(library, i):
+    return call(library.member(i), 'get', reverse('get_author_books', args=[library.authors[i % len(library.authors)]]))
+
+
+@scenario('get_genre_books')
+def get_genre_books(library, i):
+    return call(library.member(i), 'get', reverse('get_genre_books', args=[library.genres[i % len(library.genres)]]))
+
+
+@scenario('search_books')
+def search_books(library, i):
+    return call(library.member(i), 'get', reverse('search_books') + '?query=volume')
+
+
+@scenario('get_reserved_books')
+def get_reserved_books(library, i):
+    return call(library.member(i), 'get', reverse('get_reserved_books'))
+
+
+@scenario('get_borrowed_books')
+def get_borrowed_books(library, i):
+    return call(library.member(i), 'get', reverse('get_borrowed_books'))
+
+
+@scenario('get_particular_book')
+def get_particular_book(library, i):
+    book = library.books[i % len(library.books)]
+    return call(library.member(i), 'get', reverse('get_particular_book', args=[book.isbn]))
+
+
+@scenario('update_book_details')
+def update_book_details(library, i):
+    book = library.books[i % len(library.books)]
+    return call(library.librarian, 'patch', reverse('update_book_details', args=[book.isbn]), {'shelf_location':f'A{i}'})
+
+
+@scenario('delete_book')
+def delete_book(library, i):
+    book = library.disposable[i % len(library.disposable)]
+    return call(library.librarian, 'delete', reverse('delete_book', args=[book.isbn]))
+
+
+@scenario('checkout_book')
+def checkout_book(library, i):
+    book, member = library.pair(library.lendable, i)
+    return call(member, 'post', reverse('checkout_book', args=[book.isbn]))
+
+
+@scenario('reserve_book')
+def reserve_book(library, i):
+    book, member = library.pair(library.reservable, i)
+    return call(member, 'post', reverse('reserve_book', args=[book.isbn]))
+
+
+@scenario('checkout_books')
+def checkout_books(library, i):
+    books, member = library.batch(library.batch_lendable, i)
+    return call(member, 'post', reverse('checkout_books'), {'isbns':[book.isbn for book in books]})
+
+
+@scenario('reserve_books')
+def reserve_books(library, i):
+    books, member = library.batch(library.batch_reservable, i)
+    return call(member, 'post', reverse('reserve_books'), {'isbns':[book.isbn for book in books]})
+
+
+@scenario('return_book')
+def return_book(library, i):
+    loan = library.loans[i % len(library.loans)]
+    return call(library.librarian, 'post', reverse('return_book', args=[loan.book.isbn]), {'user':loan.user_id})
+
+
+@scenario('get_loan_history')
+def get_loan_history(library, i):
+    return call(library.member(i), 'get', reverse('get_loan_history'))
+
+
+@scenario('get_book_loan_history')
+def get_book_loan_history(library, i):
+    book = library.books[i % len(library.books)]
+    return call(library.librarian, 'get', reverse('get_book_loan_history', args=[book.isbn]))
+
+
+@scenario('remove_reservation')
+def remove_reservation(library, i):
+    reservation = library.reservations[i % len(library.reservations)]
+    return call(library.librarian, 'delete', reverse('remove_reservation', args=[reservation.reservation_id]))
+
+
+@scenario('async_get_all_books')
+def async_get_all_books(library, i):
+    return call(library.member(i), 'get', reverse('async_get_all_books'))
+
+
+@scenario('async_filter_books')
+def async_filter_books(library, i):
+    return call(library.member(i), 'get', reverse('async_filter_books') + '?genre=fantasy&genre=science&publisher=penguin')
+
+
+@scenario('async_search_books')
+def async_search_books(library, i):
+    return call(library.member(i), 'get', reverse('async_search_books') + '?query=volume')
+
+
+@scenario('async_get_particular_book')
+def async_get_particular_book(library, i):
+    book = library.books[i % len(library.books)]
+    return call(library.member(i), 'get', reverse('async_get_particular_book', args=[book.isbn]))
+
+
+# accounts
+
+@scenario('user_signup')
+def user_signup(library, i):
+    return call(None, 'post', reverse('user_signup'), {
+        'first_name':'Signup', 'middle_name':'', 'last_name':'Bench', 'username':f'bench-signup{i}', 'email':f'signup{i}@bench.example',
+        'address':'1 Library Road', 'phone_number':f'+1666{i:07d}', 'password':'signup-password'
+    })
+
+
+@scenario('verify_user')
+def verify_user(library, i):
+    token = RefreshToken.for_user(library.member(i))
+    return call(None, 'get', reverse('verify_user') + f'?token={token}')
+
+
+@scenario('user_login')
+def user_login(library, i):
+    return call(None, 'post', reverse('user_login'), {'email':library.librarian.email, 'password':LIBRARIAN_PASSWORD})
+
+
+@scenario('password_reset')
+def password_reset(library, i):
+    return call(None, 'post', reverse('password_reset'), {'email':library.member(i).email})
+
+
+@scenario('password_reset_confirm')
+def password_reset_confirm(library, i):
+    member = library.member(i)
+    return call(None, 'patch', reverse('password_reset_confirm'), {
+        'uid':urlsafe_base64_encode(force_bytes(member.pk)),
+        'token':default_token_generator.make_token(member),
+        'password':'new-benchmark-password'
+    })
+
+
+@scenario('update_user_info')
+def update_user_info(library, i):
+    member = library.member(i)
+    return call(member, 'patch', reverse('update_user_info', args=[member.id]), {'address':f'{i} Benchmark Avenue'})
+
+
+@scenario('get_all_users')
+def get_all_users(library, i):
+    return call(library.librarian, 'get', reverse('get_all_users'))
+
+
+@scenario('search_user')
+def search_user(library, i):
+    return call(library.librarian, 'get', reverse('search_user') + '?query=mensah')
+
+
+@scenario('filter_user')
+def filter_user(library, i):
+    return call(library.librarian, 'get', reverse('filter_user') + '?last_name=smith,doe')
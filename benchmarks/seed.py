@@ -0,0 +1,143 @@
+import math, uuid
+from accounts.models import User
+from accounts.search import user_index
+from books.models import ArchivedLoan, Author, Book, CheckoutBook, Genre, ReserveBook
+from books.signals import books_imported
+from datetime import timedelta
+from django.utils import timezone
+
+
+GENRES = ['Fantasy', 'Science', 'History', 'Romance', 'Mystery']
+PUBLISHERS = ['Penguin', 'Orbit', 'Tor', 'Vintage']
+FIRST_NAMES = ['Ama', 'Kofi', 'Jane', 'Yaw', 'Efua', 'John', 'Akosua', 'Kwame']
+LAST_NAMES = ['Mensah', 'Smith', 'Owusu', 'Boateng', 'Doe', 'Asante']
+
+LIBRARIAN_PASSWORD = 'benchmark-password'
+
+# books per bulk checkout or reservation
+BATCH_SIZE = 5
+
+
+class Library:
+    # What the scenarios draw on. Write scenarios consume their own pools so
+    # that every request in a run does real work instead of hitting a
+    # "already borrowed" or "does not exist" early exit.
+    def __init__(self):
+        self.librarian = None
+        self.members = []
+        self.books = []        # the catalogue; some copies are on loan
+        self.loans = []        # active loans on catalogue books
+        self.archived = []     # returned loans already in the archive, as many as loans
+        self.waitlisted = []   # unavailable books carrying the seeded reservations
+        self.reservations = []
+        self.lendable = []     # one copy per member, for checkout
+        self.reservable = []   # unavailable with an empty queue, for reserve
+        self.disposable = []   # deleted by delete_book
+        self.batch_lendable = []   # like lendable, BATCH_SIZE books per member pass
+        self.batch_reservable = []
+        self.authors = []      # ids linked from the seeded books
+        self.genres = []
+
+    def member(self, i:int) -> User:
+        return self.members[i % len(self.members)]
+
+    def batch(self, pool:list, i:int):
+        # distinct (books, member) for every i, as pair() does for one book
+        start = (i // len(self.members)) * BATCH_SIZE % len(pool)
+        return pool[start:start + BATCH_SIZE], self.member(i)
+
+    def pair(self, pool:list, i:int):
+        # distinct (book, member) for every i, filling one book per member pass
+        return pool[(i // len(self.members)) % len(pool)], self.member(i)
+
+
+def _book(prefix:str, i:int, **fields) -> Book:
+    defaults = dict(
+        isbn=f'{prefix}{i:010d}', title=f'{GENRES[i % len(GENRES)]} Volume {i}',
+        description='Synthetic book seeded for benchmarking. ' * 5, authors=f'{FIRST_NAMES[i % 8]} {LAST_NAMES[i % 6]}',
+        genre=GENRES[i % len(GENRES)], publisher=PUBLISHERS[i % len(PUBLISHERS)], language='English',
+        number_of_pages=100 + i % 500, total_copies=3, available_copies=3
+    )
+    defaults.update(fields)
+    return Book(**defaults)
+
+
+def seed_library(books:int, users:int, loans:int, reservations:int, requests:int) -> Library:
+    library = Library()
+    books, users = max(books, 1), max(users, 1)
+
+    library.librarian = User(
+        id='bmlib000', email='librarian@bench.example', username='bench-librarian', phone_number='+15540000000',
+        first_name='Ada', last_name='Librarian', role='Librarian', is_staff=True, is_verified=True
+    )
+    library.librarian.set_password(LIBRARIAN_PASSWORD)
+    library.members = [
+        User(
+            id=f'bm{i:06d}', email=f'member{i}@bench.example', username=f'bench-member{i}', phone_number=f'+1555{i:07d}',
+            first_name=FIRST_NAMES[i % len(FIRST_NAMES)], last_name=LAST_NAMES[i % len(LAST_NAMES)],
+            address=f'{i} Library Road', password='!', is_verified=True
+        )
+        for i in range(users)
+    ]
+    User.objects.bulk_create([library.librarian] + library.members, batch_size=1000)
+    user_index.update([library.librarian] + library.members)
+
+    loans = min(loans, books * users)
+    on_loan = [0] * books
+    for i in range(loans):
+        on_loan[i % books] += 1
+    copies = max(3, max(on_loan) + 1)
+
+    library.books = [
+        _book('978', i, total_copies=copies, available_copies=copies - on_loan[i]) for i in range(books)
+    ]
+
+    waitlisted = math.ceil(reservations / users) if reservations else 0
+    passes = math.ceil(requests / users)
+    unavailable = dict(total_copies=1, available_copies=0, available='Unavailable')
+    library.waitlisted = [_book('976', i, **unavailable) for i in range(waitlisted)]
+    library.reservable = [_book('977', i, **unavailable) for i in range(passes)]
+    library.lendable = [_book('979', i, total_copies=users, available_copies=users) for i in range(passes)]
+    library.disposable = [_book('975', i) for i in range(requests)]
+    library.batch_reservable = [_book('971', i, **unavailable) for i in range(passes * BATCH_SIZE)]
+    library.batch_lendable = [_book('972', i, total_copies=users, available_copies=users) for i in range(passes * BATCH_SIZE)]
+
+    seeded = (
+        library.books + library.waitlisted + library.reservable + library.lendable + library.disposable
+        + library.batch_reservable + library.batch_lendable
+    )
+    Book.objects.bulk_create(seeded, batch_size=1000)
+    # bulk_create skips post_save; this is what the importer sends instead
+    books_imported.send(sender=Book, books=seeded, previous={})
+    library.authors = list(Author.objects.values_list('pk', flat=True))
+    library.genres = list(Genre.objects.values_list('pk', flat=True))
+
+    library.loans = [
+        CheckoutBook(book=library.books[i % books], user=library.members[(i // books) % users])
+        for i in range(loans)
+    ]
+    # the librarian holds the only copy of every unavailable book
+    holds = [
+        CheckoutBook(book=book, user=library.librarian)
+        for book in library.waitlisted + library.reservable + library.batch_reservable
+    ]
+    CheckoutBook.objects.bulk_create(library.loans + holds, batch_size=1000)
+
+    # last year's returns, for the history routes
+    returned = timezone.now() - timedelta(days=365)
+    library.archived = [
+        ArchivedLoan(
+            checkout_id=uuid.uuid4(), year=returned.year, book=library.books[i % books], user=library.member(i),
+            borrow_date=returned.date() - timedelta(days=14), due_date=returned.date(), returned_at=returned,
+            created_at=returned - timedelta(days=14, minutes=i)
+        )
+        for i in range(loans)
+    ]
+    ArchivedLoan.objects.bulk_create(library.archived, batch_size=1000)
+
+    library.reservations = [
+        ReserveBook(book=library.waitlisted[i // users], user=library.member(i)) for i in range(reservations)
+    ]
+    ReserveBook.objects.bulk_create(library.reservations, batch_size=1000)
+
+    return library
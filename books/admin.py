@@ -1,8 +1,12 @@
-from .models import Book, CheckoutBook, ReserveBook
+from .models import ArchivedLoan, Author, Book, BookFacetCount, CheckoutBook, CoverJob, Genre, ReserveBook
 from django.contrib import admin
 
 
 admin.site.register(Book)
 admin.site.register(CheckoutBook)
 admin.site.register(ReserveBook)
-
+admin.site.register(BookFacetCount)
+admin.site.register(Author)
+admin.site.register(Genre)
+admin.site.register(CoverJob)
+admin.site.register(ArchivedLoan)
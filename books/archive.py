@@ -0,0 +1,67 @@
+from .models import ArchivedLoan, CheckoutBook
+from django.db import connections, router, transaction
+
+
+# Returned loans are moved out of CheckoutBook into ArchivedLoan, so the
+# table that every checkout and listing reads only holds recent loans. On
+# PostgreSQL the archive is partitioned by the year the book was borrowed,
+# with one partition per year created as loans from it are archived and a
+# default partition for anything else. Elsewhere it is a single table whose
+# indexes lead with the user or the book, as partitions would be.
+
+def _partitioned(connection) -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def ensure_partitions(years):
+    connection = connections[router.db_for_write(ArchivedLoan)]
+    if not _partitioned(connection):
+        return
+
+    table = ArchivedLoan._meta.db_table
+    with connection.cursor() as cursor:
+        for year in sorted(set(years)):
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table}_y{int(year)} PARTITION OF {table} FOR VALUES IN ({int(year)})"
+            )
+
+
+def archive_batch(returned_before, batch_size:int) -> int:
+    # oldest returns first; loans another worker is archiving are skipped
+    with transaction.atomic():
+        loans = list(
+            CheckoutBook.objects.select_for_update(skip_locked=True)
+            .filter(returned_at__lt=returned_before)
+            .order_by('returned_at')[:batch_size]
+        )
+        if not loans:
+            return 0
+
+        ensure_partitions(loan.borrow_date.year for loan in loans)
+        # a loan that is already archived, say restored from a backup, keeps its row
+        ArchivedLoan.objects.bulk_create([
+            ArchivedLoan(
+                checkout_id=loan.checkout_id,
+                year=loan.borrow_date.year,
+                book_id=loan.book_id,
+                user_id=loan.user_id,
+                borrow_date=loan.borrow_date,
+                due_date=loan.due_date,
+                returned_at=loan.returned_at,
+                is_overdue=loan.is_overdue,
+                created_at=loan.created_at
+            )
+            for loan in loans
+        ], ignore_conflicts=True)
+        CheckoutBook.objects.filter(pk__in=[loan.pk for loan in loans]).delete()
+
+    return len(loans)
+
+
+def archive_loans(returned_before, batch_size:int) -> int:
+    total = 0
+    while True:
+        archived = archive_batch(returned_before, batch_size)
+        if not archived:
+            return total
+        total += archived
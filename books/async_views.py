@@ -0,0 +1,181 @@
+from . import cache
+from .models import Book
+from .search import book_index
+from .serializers import BookSerializer, astream_books_ndjson, book_rows
+from accounts.permissions import IsVerified
+from asgiref.sync import sync_to_async
+from core.async_api import async_api_view, json_response
+from core.filters import filter_iexact_in, get_list_param
+from core.pagination import InvalidCursor, akeyset_paginate, get_page_size, parse_cursor
+from core.projections import InvalidFields, get_fields_param
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+
+
+# Async twins of the hot read views in views.py, with the same responses.
+# Under ASGI a request waiting on the database no longer holds a worker
+# thread. The FTS query and the cache calls have no async API yet and run
+# through sync_to_async.
+
+def bad_request(message:str):
+    return json_response(
+        {
+            'success':False,
+            'message':message
+        }, status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+@async_api_view(['GET'], permission_classes=[IsVerified])
+async def get_book_details_view(request, isbn:str):
+    version = await sync_to_async(cache.book_version)(isbn)
+    etag = cache.etag('book', isbn, version)
+    last_modified = cache.last_modified(version)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=version // 1000)
+    if not_modified is not None:
+        return not_modified
+
+    data = await sync_to_async(cache.get_book_detail)(isbn, version)
+
+    if data is None:
+        row = await Book.objects.filter(isbn=isbn).values(*BookSerializer.Meta.fields).afirst()
+
+        if row is None:
+            return json_response(
+                {
+                    'success':True,
+                    'message':'Book does not exist!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = {
+            'success':True,
+            'book':book_rows([row])[0]
+        }
+        await sync_to_async(cache.set_book_detail)(isbn, version, data)
+
+    return json_response(data, headers={'ETag':etag, 'Last-Modified':last_modified})
+
+
+@async_api_view(['GET'], permission_classes=[IsVerified])
+async def get_all_books_view(request):
+    books = Book.objects.all()
+
+    try:
+        fields = get_fields_param(request, BookSerializer.Meta.fields)
+    except InvalidFields as e:
+        return bad_request(str(e))
+
+    if request.query_params.get('stream') == '1':
+        return StreamingHttpResponse(
+            astream_books_ndjson(books, fields=fields), content_type='application/x-ndjson'
+        )
+
+    cursor = request.query_params.get('cursor')
+    page_size = get_page_size(request)
+
+    if cursor:
+        try:
+            parse_cursor(Book, cursor, field='created_at')
+        except InvalidCursor:
+            return bad_request('Invalid cursor!')
+
+    version = await sync_to_async(cache.catalogue_version)()
+    etag = cache.catalogue_etag(version, cursor, page_size, fields)
+    last_modified = cache.last_modified(version)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=version // 1000)
+    if not_modified is not None:
+        return not_modified
+
+    data = await sync_to_async(cache.get_catalogue_page)(version, cursor, page_size, fields)
+
+    if data is None:
+        books, next_cursor = await akeyset_paginate(
+            books.values(*fields, 'created_at', 'id'),
+            cursor=cursor,
+            page_size=page_size,
+            field='created_at'
+        )
+        data = {
+            'success':True,
+            'books':book_rows(books, fields),
+            'next_cursor':next_cursor
+        }
+        await sync_to_async(cache.set_catalogue_page)(version, cursor, page_size, fields, data)
+
+    return json_response(data, headers={'ETag':etag, 'Last-Modified':last_modified})
+
+
+@async_api_view(['GET'], permission_classes=[IsVerified])
+async def filter_books_view(request):
+    books = Book.objects.all()
+    genres = get_list_param(request, 'genre')
+    publishers = get_list_param(request, 'publisher')
+
+    if not genres and not publishers:
+        return bad_request('Please provide a filter query!')
+
+    try:
+        fields = get_fields_param(request, BookSerializer.Meta.fields)
+    except InvalidFields as e:
+        return bad_request(str(e))
+
+    if genres:
+        books = filter_iexact_in(books, 'genre', genres)
+    if publishers:
+        books = filter_iexact_in(books, 'publisher', publishers)
+
+    try:
+        books, next_cursor = await akeyset_paginate(
+            books.values(*fields, 'created_at', 'id'),
+            cursor=request.query_params.get('cursor'),
+            page_size=get_page_size(request),
+            field='created_at'
+        )
+    except InvalidCursor:
+        return bad_request('Invalid cursor!')
+
+    return json_response(
+        {
+            'success':True,
+            'message':'Filter results!',
+            'book(s)':book_rows(books, fields),
+            'next_cursor':next_cursor
+        }
+    )
+
+
+@async_api_view(['GET'], permission_classes=[IsVerified])
+async def search_books_view(request):
+    query = request.query_params.get('query')
+
+    if not query:
+        return bad_request('Provide a search query!')
+
+    try:
+        fields = get_fields_param(request, BookSerializer.Meta.fields)
+    except InvalidFields as e:
+        return bad_request(str(e))
+
+    try:
+        page = max(1, int(request.query_params.get('page', 1)))
+    except ValueError:
+        page = 1
+    page_size = get_page_size(request)
+
+    books = await sync_to_async(book_index.search_rows)(
+        query, fields, limit=page_size + 1, offset=(page - 1) * page_size
+    )
+    next_page = page + 1 if len(books) > page_size else None
+
+    return json_response(
+        {
+            'success':True,
+            'message':'Here are you search results',
+            'book(s)':book_rows(books[:page_size], fields),
+            'next_page':next_page
+        }
+    )
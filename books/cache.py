@@ -0,0 +1,113 @@
+import hashlib, time
+from core.routers import ReadConnectionRouter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import http_date
+
+
+CATALOGUE_VERSION_KEY = 'books:catalogue:version'
+
+
+def _book_version_key(isbn:str) -> str:
+    return f'books:book:{isbn}:version'
+
+
+def _now_version() -> int:
+    # versions are millisecond timestamps, so a version evicted from the cache
+    # is never reissued and each version doubles as a Last-Modified value
+    return int(time.time() * 1000)
+
+
+def get_version(key:str) -> int:
+    version = cache.get(key)
+    if version is None:
+        version = _now_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key:str):
+    version = cache.get(key) or 0
+    cache.set(key, max(_now_version(), version + 1), timeout=None)
+
+
+def may_lag(version:int) -> bool:
+    # The version is bumped once the write commits, but a replica can be
+    # REPLICA_LAG_SECONDS behind that commit, so what a reader loads just
+    # after a bump may still be the old rows. Those aren't cached under it.
+    if _now_version() - version >= settings.REPLICA_LAG_SECONDS * 1000:
+        return False
+    return bool(ReadConnectionRouter().replicas())
+
+
+def last_modified(version:int) -> str:
+    return http_date(version // 1000)
+
+
+def etag(*parts) -> str:
+    return '"' + '-'.join(str(part) for part in parts) + '"'
+
+
+# book detail
+
+def book_version(isbn:str) -> int:
+    return get_version(_book_version_key(isbn))
+
+
+def get_book_detail(isbn:str, version:int):
+    return cache.get(f'books:book:{isbn}:v{version}')
+
+
+def set_book_detail(isbn:str, version:int, data:dict):
+    if may_lag(version):
+        return
+    cache.set(f'books:book:{isbn}:v{version}', data, timeout=settings.BOOK_CACHE_TIMEOUT)
+
+
+# catalogue pages
+
+def catalogue_version() -> int:
+    return get_version(CATALOGUE_VERSION_KEY)
+
+
+def _page_digest(cursor:str, page_size:int, fields:list) -> str:
+    # hashed, so a cursor and a long field list keep the key under
+    # memcached's 250 bytes
+    page = f'{cursor or ""}:{page_size}:{",".join(fields)}'
+    return hashlib.blake2b(page.encode(), digest_size=8).hexdigest()
+
+
+def _catalogue_key(version:int, cursor:str, page_size:int, fields:list) -> str:
+    return f'books:catalogue:v{version}:{_page_digest(cursor, page_size, fields)}'
+
+
+def catalogue_etag(version:int, cursor:str, page_size:int, fields:list) -> str:
+    # one per page and projection, so a 304 is only sent for what was served
+    return etag('catalogue', version, _page_digest(cursor, page_size, fields))
+
+
+def get_catalogue_page(version:int, cursor:str, page_size:int, fields:list):
+    return cache.get(_catalogue_key(version, cursor, page_size, fields))
+
+
+def set_catalogue_page(version:int, cursor:str, page_size:int, fields:list, data:dict):
+    if may_lag(version):
+        return
+    cache.set(_catalogue_key(version, cursor, page_size, fields), data, timeout=settings.BOOK_CACHE_TIMEOUT)
+
+
+# invalidation
+
+def invalidate_books(isbns):
+    # deferred to commit so a concurrent reader can't cache pre-commit rows
+    # under the new version
+    isbns = set(isbns)
+
+    def bump():
+        for isbn in isbns:
+            bump_version(_book_version_key(isbn))
+        bump_version(CATALOGUE_VERSION_KEY)
+
+    transaction.on_commit(bump)
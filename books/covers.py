@@ -0,0 +1,164 @@
+import io, logging, os, random, uuid
+from . import cache
+from .models import Book, CoverJob
+from PIL import Image, ImageOps
+from concurrent.futures import ThreadPoolExecutor
+from core.projections import file_url
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG':'jpg', 'WEBP':'webp', 'PNG':'png'}
+
+
+def variant_urls(variants:dict) -> dict:
+    return {
+        name:{fmt:file_url(path) for fmt, path in formats.items()}
+        for name, formats in (variants or {}).items()
+    }
+
+
+def enqueue_cover(book:Book) -> CoverJob:
+    return CoverJob.objects.create(book=book, source=book.cover_image.name)
+
+
+def render_variants(source:str) -> dict:
+    # every variant is cropped to exactly its size, so list rows line up
+    config = settings.COVERS
+    stem = os.path.splitext(source)[0]
+
+    with default_storage.open(source) as file:
+        image = ImageOps.exif_transpose(Image.open(file)).convert('RGBA')
+
+    # JPEG has no transparency, so flatten onto white rather than black
+    flattened = Image.new('RGB', image.size, 'white')
+    flattened.paste(image, mask=image.getchannel('A'))
+    image = flattened
+
+    variants = {}
+    for name, size in config['VARIANTS'].items():
+        resized = ImageOps.fit(image, size, Image.LANCZOS)
+        variants[name] = {}
+
+        for fmt in config['FORMATS']:
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, quality=config['QUALITY'])
+            ext = EXTENSIONS.get(fmt, fmt.lower())
+            variants[name][ext] = default_storage.save(f'{stem}_{name}.{ext}', ContentFile(buffer.getvalue()))
+
+    return variants
+
+
+def delete_variants(variants:dict, keep:dict=None):
+    kept = {path for formats in (keep or {}).values() for path in formats.values()}
+    for formats in (variants or {}).values():
+        for path in formats.values():
+            if path not in kept:
+                default_storage.delete(path)
+
+
+def backoff_delay(attempts:int) -> timedelta:
+    base = settings.COVERS['BACKOFF_SECONDS']
+    delay = min(base * 2 ** (attempts - 1), settings.COVERS['MAX_BACKOFF_SECONDS'])
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_jobs(batch_size:int) -> list:
+    now = timezone.now()
+    token = uuid.uuid4()
+    claimable = (
+        Q(status='Pending', next_attempt_at__lte=now) |
+        Q(status='Processing', locked_until__lt=now)
+    )
+
+    with transaction.atomic():
+        ids = list(
+            CoverJob.objects.select_for_update(skip_locked=True)
+            .filter(claimable)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        CoverJob.objects.filter(claimable, id__in=ids).update(
+            status='Processing',
+            lease_token=token,
+            locked_until=now + timedelta(seconds=settings.COVERS['LEASE_SECONDS'])
+        )
+
+    return list(CoverJob.objects.filter(lease_token=token, status='Processing').select_related('book'))
+
+
+def _render(job:CoverJob):
+    try:
+        return job, render_variants(job.source), None
+    except Exception as e:
+        return job, None, e
+
+
+def process(jobs:list, workers:int) -> dict:
+    # Pillow releases the GIL while resizing and encoding
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_render, jobs))
+
+    done = retried = failed = 0
+    for job, variants, error in results:
+        # a job whose lease ran out may have been claimed again by another
+        # worker; it is theirs to finish now
+        leased = CoverJob.objects.filter(id=job.id, lease_token=job.lease_token)
+
+        if error is None:
+            with transaction.atomic():
+                if not leased.update(status='Done', lease_token=None, locked_until=None, last_error=''):
+                    delete_variants(variants)
+                    continue
+                done += 1
+                # a cover replaced meanwhile has its own job; don't overwrite it
+                book = Book.objects.select_for_update().filter(pk=job.book_id, cover_image=job.source).first()
+                if book is None:
+                    transaction.on_commit(lambda variants=variants: delete_variants(variants))
+                    continue
+                Book.objects.filter(pk=book.pk).update(cover_variants=variants)
+                cache.invalidate_books([book.isbn])
+                # the files the book pointed at until now, once nothing can
+                # roll back to them
+                transaction.on_commit(
+                    lambda previous=book.cover_variants, variants=variants: delete_variants(previous, keep=variants)
+                )
+            continue
+
+        attempts = job.attempts + 1
+        exhausted = attempts >= settings.COVERS['MAX_ATTEMPTS']
+        if not leased.update(
+            status='Failed' if exhausted else 'Pending',
+            attempts=attempts,
+            next_attempt_at=timezone.now() + backoff_delay(attempts),
+            lease_token=None,
+            locked_until=None,
+            last_error=str(error)
+        ):
+            continue
+        if exhausted:
+            failed += 1
+            logger.error('Cover %s failed after %s attempts: %s', job.source, attempts, error)
+        else:
+            retried += 1
+
+    return {'done':done, 'retried':retried, 'failed':failed}
+
+
+def drain(batch_size:int, workers:int) -> dict:
+    totals = {'done':0, 'retried':0, 'failed':0}
+
+    while True:
+        jobs = claim_jobs(batch_size)
+        if not jobs:
+            return totals
+
+        for key, value in process(jobs, workers).items():
+            totals[key] += value
@@ -0,0 +1,76 @@
+from .models import Book, BookFacetCount
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+
+FACETS = ['genre', 'publisher', 'language', 'available']
+
+
+def facet_values(book:Book) -> dict:
+    # only fields that are loaded, so deferred instances don't trigger queries
+    return {facet:book.__dict__[facet] for facet in FACETS if facet in book.__dict__}
+
+
+def adjust(facet:str, value:str, delta:int):
+    updated = BookFacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+    if updated or delta < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            BookFacetCount.objects.create(facet=facet, value=value, count=delta)
+    except IntegrityError: # created concurrently
+        BookFacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+
+
+def apply_change(old:dict, new:dict):
+    # old is None for a new book and new is None for a deleted one
+    apply_changes([(old, new)])
+
+
+def apply_changes(changes:list):
+    # (old, new) pairs, netted so each facet value is adjusted once
+    deltas = Counter()
+    for old, new in changes:
+        for facet in FACETS:
+            if (old is not None and facet not in old) or (new is not None and facet not in new):
+                continue
+            before = old[facet] if old is not None else None
+            after = new[facet] if new is not None else None
+            if before == after:
+                continue
+            if before is not None:
+                deltas[facet, before] -= 1
+            if after is not None:
+                deltas[facet, after] += 1
+
+    for (facet, value), delta in deltas.items():
+        if delta:
+            adjust(facet, value, delta)
+
+
+def rebuild():
+    with transaction.atomic():
+        BookFacetCount.objects.all().delete()
+        BookFacetCount.objects.bulk_create([
+            BookFacetCount(facet=facet, value=row[facet], count=row['count'])
+            for facet in FACETS
+            for row in Book.objects.order_by().values(facet).annotate(count=Count('pk'))
+        ])
+
+
+def counts(books=None) -> dict:
+    # Without a filter context the answer is read from the maintained
+    # aggregate table; with one, it is grouped over the filtered subset only.
+    result = {facet:[] for facet in FACETS}
+
+    if books is None:
+        for row in BookFacetCount.objects.filter(count__gt=0).values('facet', 'value', 'count'):
+            result[row['facet']].append({'value':row['value'], 'count':row['count']})
+        return result
+
+    for facet in FACETS:
+        rows = books.order_by().values(facet).annotate(count=Count('pk')).order_by('-count')
+        result[facet] = [{'value':row[facet], 'count':row['count']} for row in rows]
+    return result
@@ -0,0 +1,87 @@
+from .inventory import release_copies
+from .models import Book, ReserveBook
+from .utils import send_hold_ready_emails
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+def hand_off_copies(book:Book, count:int=1) -> list:
+    # Gives ``count`` freed copies of ``book`` to the head of its hold queue
+    # and puts whatever is left back on the shelf. Call inside a transaction.
+    now = timezone.now()
+    expires_at = now + timedelta(days=settings.CIRCULATION['HOLD_DAYS'])
+
+    heads = list(
+        ReserveBook.objects.select_for_update()
+        .filter(book=book, status='Waiting')
+        .order_by('created_at')
+        .select_related('user')[:count]
+    )
+    promoted = ReserveBook.objects.filter(pk__in=[hold.pk for hold in heads], status='Waiting').update(
+        status='Ready', expires_at=expires_at
+    )
+    if promoted != len(heads):
+        # a hold was cancelled under us (no row locks on SQLite); keep only
+        # the ones this call actually promoted
+        ready = set(
+            ReserveBook.objects.filter(pk__in=[hold.pk for hold in heads], status='Ready', expires_at=expires_at)
+            .values_list('pk', flat=True)
+        )
+        heads = [hold for hold in heads if hold.pk in ready]
+
+    for hold in heads:
+        hold.status, hold.expires_at, hold.book = 'Ready', expires_at, book
+    send_hold_ready_emails(heads)
+
+    release_copies(book, count - len(heads))
+    return heads
+
+
+def add_copies(book:Book, count:int) -> list:
+    # new copies go to the hold queue first, as returned ones do. Call
+    # inside a transaction.
+    Book.objects.filter(pk=book.pk).update(total_copies=F('total_copies') + count)
+    return hand_off_copies(book, count)
+
+
+def queue_position(reservation:ReserveBook) -> int:
+    return ReserveBook.objects.filter(
+        book_id=reservation.book_id, status='Waiting', created_at__lte=reservation.created_at
+    ).count()
+
+
+def expire_holds(batch_size:int=500) -> int:
+    expired = 0
+
+    while True:
+        with transaction.atomic():
+            # locked, so a hold can't be collected between being read here
+            # and expired below; holds another sweep has locked are skipped
+            batch = list(
+                ReserveBook.objects.select_for_update(skip_locked=True)
+                .filter(status='Ready', expires_at__lt=timezone.now())
+                .order_by('expires_at')
+                .values_list('pk', 'book_id')[:batch_size]
+            )
+            if not batch:
+                return expired
+
+            pks = [pk for pk, _ in batch]
+            updated = ReserveBook.objects.filter(pk__in=pks, status='Ready').update(status='Expired')
+            if updated != len(batch):
+                # a hold was collected under us (no row locks on SQLite); only
+                # the holds this call expired free their copy
+                collected = set(ReserveBook.objects.filter(pk__in=pks).exclude(status='Expired').values_list('pk', flat=True))
+                batch = [(pk, book_id) for pk, book_id in batch if pk not in collected]
+
+            # one hand-off per book for all of its expired holds
+            freed = Counter(book_id for _, book_id in batch)
+            books = Book.objects.in_bulk(freed.keys())
+            for book_id, count in freed.items():
+                hand_off_copies(books[book_id], count)
+
+        expired += len(batch)
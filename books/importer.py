@@ -0,0 +1,124 @@
+import csv, io, json, time
+from .facets import FACETS
+from .models import Book
+from .serializers import BookImportSerializer
+from .signals import books_imported
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_rows(stream, format:str):
+    # yields (line number, row dict or None, parse error or None) without
+    # reading the whole input into memory
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key:value for key, value in row.items() if key and value != ''}, None
+    elif format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, str(e)
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, 'Expected a JSON object'
+                continue
+            yield line_number, row, None
+    else:
+        raise ValueError(f'Unsupported format: {format}')
+
+
+def guess_format(filename:str) -> str:
+    if filename.endswith('.csv'):
+        return 'csv'
+    if filename.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return None
+
+
+def _upsert_chunk(chunk:list, report:dict):
+    # one serializer for the whole chunk, so its fields are only built once
+    serializer = BookImportSerializer()
+    books = {}
+
+    for line_number, row, parse_error in chunk:
+        if parse_error is not None:
+            _add_error(report, line_number, parse_error)
+            continue
+
+        try:
+            data = serializer.run_validation(row)
+        except ValidationError as e:
+            _add_error(report, line_number, e.detail)
+            continue
+        # a later row for the same ISBN wins, as it would row by row
+        books[data['isbn']] = data
+
+    if not books:
+        return
+
+    # A row only overwrites the columns it has: the others would be filled
+    # with model defaults. Rows with the same columns are upserted together.
+    groups = {}
+    for data in books.values():
+        groups.setdefault(frozenset(data) - {'isbn'}, []).append(data)
+
+    with transaction.atomic():
+        # what the facet counts held these rows under, locked until the upsert
+        existing = {
+            row.pop('isbn'):row
+            for row in Book.objects.select_for_update().filter(isbn__in=books.keys()).values('isbn', *FACETS)
+        }
+        for fields, rows in groups.items():
+            Book.objects.bulk_create(
+                [Book(**data) for data in rows],
+                update_conflicts=True,
+                unique_fields=['isbn'],
+                update_fields=sorted(fields)
+            )
+        # bulk_create skips model signals, and rows that were updated keep
+        # their original primary key, so re-read them for the receivers
+        books_imported.send(
+            sender=Book, books=list(Book.objects.filter(isbn__in=books.keys())), previous=existing
+        )
+
+    report['created'] += len(books) - len(existing)
+    report['updated'] += len(existing)
+
+
+def _add_error(report:dict, line_number:int, errors):
+    report['error_count'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line':line_number, 'errors':errors})
+
+
+def import_books(stream, format:str, chunk_size:int=1000) -> dict:
+    report = {'rows':0, 'created':0, 'updated':0, 'error_count':0, 'errors':[]}
+    started = time.perf_counter()
+    chunk = []
+
+    for entry in read_rows(stream, format):
+        report['rows'] += 1
+        chunk.append(entry)
+
+        if len(chunk) >= chunk_size:
+            _upsert_chunk(chunk, report)
+            chunk = []
+
+    if chunk:
+        _upsert_chunk(chunk, report)
+
+    elapsed = time.perf_counter() - started
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['rows'] / elapsed) if elapsed else report['rows']
+    return report
+
+
+def open_upload(upload) -> io.TextIOWrapper:
+    return io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
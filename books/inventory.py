@@ -0,0 +1,69 @@
+from .models import Book
+from .signals import availability_changed
+from django.db.models import F
+
+
+# Copy counts are only ever changed by conditional UPDATEs, so the row lock
+# taken by the UPDATE is the single serialization point between concurrent
+# checkouts and no copy can be lent twice.
+
+def claim_copy(book:Book) -> bool:
+    claimed = Book.objects.filter(pk=book.pk, available_copies__gt=0).update(
+        available_copies=F('available_copies') - 1
+    )
+    if not claimed:
+        return False
+
+    flipped = Book.objects.filter(pk=book.pk, available_copies=0).exclude(available='Unavailable').update(
+        available='Unavailable'
+    )
+    availability_changed.send(sender=Book, books=[book], changed_to='Unavailable' if flipped else None)
+    return True
+
+
+def claim_copies(books:list) -> list:
+    # One copy of each book, or none where none is left. The rows are locked
+    # before the guarded UPDATE, so the returned books are exactly the ones
+    # it decremented. Call inside a transaction.
+    books = {book.pk:book for book in books}
+    if not books:
+        return []
+
+    claimable = list(
+        Book.objects.select_for_update().filter(pk__in=books.keys(), available_copies__gt=0).values_list('pk', flat=True)
+    )
+    Book.objects.filter(pk__in=claimable, available_copies__gt=0).update(available_copies=F('available_copies') - 1)
+
+    emptied = list(
+        Book.objects.filter(pk__in=claimable, available_copies=0).exclude(available='Unavailable').values_list('pk', flat=True)
+    )
+    Book.objects.filter(pk__in=emptied).update(available='Unavailable')
+
+    claimed = [books[pk] for pk in claimable]
+    still_available = [book for book in claimed if book.pk not in emptied]
+    if emptied:
+        availability_changed.send(sender=Book, books=[books[pk] for pk in emptied], changed_to='Unavailable')
+    if still_available:
+        availability_changed.send(sender=Book, books=still_available, changed_to=None)
+    return claimed
+
+
+def release_copies(book:Book, count:int=1):
+    if count <= 0:
+        return
+
+    Book.objects.filter(pk=book.pk).update(available_copies=F('available_copies') + count)
+    flipped = Book.objects.filter(pk=book.pk).exclude(available='Available').update(available='Available')
+    availability_changed.send(sender=Book, books=[book], changed_to='Available' if flipped else None)
+
+
+def withdraw_copies(book:Book, count:int):
+    # copies taken out of the collection, which must be on the shelf. Call
+    # inside a transaction.
+    Book.objects.filter(pk=book.pk).update(
+        total_copies=F('total_copies') - count, available_copies=F('available_copies') - count
+    )
+    flipped = Book.objects.filter(pk=book.pk, available_copies=0).exclude(available='Unavailable').update(
+        available='Unavailable'
+    )
+    availability_changed.send(sender=Book, books=[book], changed_to='Unavailable' if flipped else None)
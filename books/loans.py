@@ -0,0 +1,30 @@
+from .models import CheckoutBook, loan_period
+from .utils import send_overdue_reminder_emails
+from django.db import transaction
+from django.utils import timezone
+
+
+def due_date_for(user, borrow_date=None):
+    return (borrow_date or timezone.localdate()) + loan_period(user.role)
+
+
+def sweep_overdue(batch_size:int=500) -> int:
+    # Every batch is one range scan on the partial (due_date) index of open,
+    # not-yet-flagged loans, one UPDATE and one bulk outbox insert.
+    today = timezone.localdate()
+    flagged = 0
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                CheckoutBook.objects.filter(returned_at__isnull=True, is_overdue=False, due_date__lt=today)
+                .select_related('user', 'book')
+                .order_by('due_date')[:batch_size]
+            )
+            if not batch:
+                return flagged
+
+            CheckoutBook.objects.filter(pk__in=[loan.pk for loan in batch]).update(is_overdue=True)
+            send_overdue_reminder_emails(batch)
+
+        flagged += len(batch)
@@ -0,0 +1,18 @@
+from books.archive import archive_loans
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Move returned loans into the loan archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--older-than-days', type=int, default=settings.CIRCULATION['ARCHIVE_AFTER_DAYS'], help='Only archive loans returned at least this many days ago')
+
+    def handle(self, *args, **options):
+        returned_before = timezone.now() - timedelta(days=options['older_than_days'])
+        archived = archive_loans(returned_before, batch_size=options['batch_size'])
+        self.stdout.write(f'{archived} loans archived')
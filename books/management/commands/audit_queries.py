@@ -0,0 +1,57 @@
+import re
+from accounts.models import User
+from books.models import ArchivedLoan, Book, CheckoutBook, ReserveBook
+from core.filters import filter_iexact_in
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+
+# EXPLAIN lines that mean a whole table is read row by row
+FULL_SCAN_RE = re.compile(r'(^|\s)SCAN \w+$|Seq Scan', re.MULTILINE)
+
+
+def view_queries(isbn:str, user_id:str, query:str) -> list:
+    # (url name, queryset, expected to be index-backed)
+    return [
+        ('get_particular_book', Book.objects.filter(isbn=isbn), True),
+        ('get_all_books', Book.objects.order_by('-created_at', '-id')[:51], True),
+        ('filter_books', filter_iexact_in(Book.objects.all(), 'genre', [query]), True),
+        ('get_author_books', Book.objects.filter(author_links__author_id=1).order_by('-created_at', '-id')[:51], True),
+        ('get_genre_books', Book.objects.filter(genre_links__genre_id=1).order_by('-created_at', '-id')[:51], True),
+        ('checkout_book', CheckoutBook.objects.filter(user_id=user_id, book__isbn=isbn), True),
+        ('get_borrowed_books', CheckoutBook.objects.filter(user_id=user_id), True),
+        ('get_loan_history', CheckoutBook.objects.filter(user_id=user_id, returned_at__isnull=False).order_by('-created_at', '-checkout_id')[:51], True),
+        ('get_loan_history', ArchivedLoan.objects.filter(user_id=user_id).order_by('-created_at', '-checkout_id')[:51], True),
+        ('get_book_loan_history', ArchivedLoan.objects.filter(book__isbn=isbn).order_by('-created_at', '-checkout_id')[:51], True),
+        ('reserve_book', ReserveBook.objects.filter(user_id=user_id, book__isbn=isbn), True),
+        ('get_reserved_books', ReserveBook.objects.filter(user_id=user_id), True),
+        ('get_all_users', User.objects.order_by('-date_joined', '-id')[:51], True),
+        ('filter_user', filter_iexact_in(User.objects.all(), 'last_name', [query]), True),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Print the EXPLAIN plan of the queries behind each view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--isbn', default='9780000000000')
+        parser.add_argument('--user-id', default='00000000')
+        parser.add_argument('--query', default='fiction')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit non-zero if an indexed query does a full table scan')
+
+    def handle(self, *args, **options):
+        regressions = []
+
+        for name, queryset, indexed in view_queries(options['isbn'], options['user_id'], options['query']):
+            vendor = connections[router.db_for_read(queryset.model)].vendor
+            plan = queryset.explain(analyze=True) if vendor == 'postgresql' else queryset.explain()
+
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(plan + '\n')
+
+            if indexed and FULL_SCAN_RE.search(plan):
+                regressions.append(name)
+
+        if regressions and options['fail_on_scan']:
+            raise CommandError(f"Full table scan in: {', '.join(regressions)}")
@@ -0,0 +1,126 @@
+import http.client, importlib.util, os, socket, subprocess, sys, threading, time
+from benchmarks.seed import seed_library
+from core.benchmarking import isolated_database, percentile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+SYNC_PATHS = ['/books/?page_size=50', '/books/filter?genre=fantasy', '/books/search?query=volume', '/books/{isbn}']
+ASYNC_PATHS = ['/books/async/?page_size=50', '/books/async/filter?genre=fantasy', '/books/async/search?query=volume', '/books/async/{isbn}']
+
+
+def server_command(server:str, workers:int, threads:int, port:int) -> list:
+    if server == 'gunicorn':
+        return [
+            sys.executable, '-m', 'gunicorn', 'core.wsgi:application', '--workers', str(workers),
+            '--threads', str(threads), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--workers', str(workers),
+        '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', '--no-access-log'
+    ]
+
+
+def wait_for_port(port:int, timeout:float=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'Server on port {port} did not start')
+
+
+def drive(port:int, paths:list, tokens:list, duration:float) -> dict:
+    # one keep-alive connection per client thread, each cycling through paths
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(token):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        headers = {'Authorization':f'Bearer {token}'}
+        mine, codes, i = [], [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            connection.request('GET', paths[i % len(paths)], headers=headers)
+            response = connection.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            codes.append(response.status)
+            i += 1
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            statuses.extend(codes)
+
+    threads = [threading.Thread(target=client, args=(token,)) for token in tokens]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    return {
+        'rps':len(latencies) / wall,
+        'p50':percentile(latencies, 0.50) * 1000,
+        'p99':percentile(latencies, 0.99) * 1000,
+        'errors':sum(1 for code in statuses if code >= 400),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare requests per second of the sync views under gunicorn with the async views under uvicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes for both servers')
+        parser.add_argument('--threads', type=int, default=1, help='Threads per gunicorn worker')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent keep-alive clients')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per server')
+        parser.add_argument('--books', type=int, default=5000)
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        runs = [
+            ('gunicorn', 'sync views', SYNC_PATHS),
+            ('uvicorn', 'sync views', SYNC_PATHS),
+            ('uvicorn', 'async views', ASYNC_PATHS),
+        ]
+        missing = {server for server, _, _ in runs if importlib.util.find_spec(server) is None}
+        if missing:
+            raise CommandError(f"Install {' and '.join(sorted(missing))} to run this benchmark")
+
+        with isolated_database():
+            library = seed_library(books=options['books'], users=options['concurrency'], loans=0, reservations=0, requests=0)
+            tokens = [str(RefreshToken.for_user(member).access_token) for member in library.members]
+            isbn = library.books[0].isbn
+
+            database = connections['default'].settings_dict
+            if connections['default'].vendor != 'sqlite':
+                raise CommandError('bench_asgi hands its seeded SQLite file to the servers; run it on SQLite')
+            connections.close_all()
+
+            env = {**os.environ, 'DJANGO_SETTINGS_MODULE':'core.settings', 'SQLITE_PATH':str(database['NAME']), 'THROTTLES_ENABLED':'False'}
+
+            for server, label, paths in runs:
+                process = subprocess.Popen(
+                    server_command(server, options['workers'], options['threads'], options['port']),
+                    cwd=settings.BASE_DIR, env=env
+                )
+                try:
+                    wait_for_port(options['port'])
+                    paths = [path.format(isbn=isbn) for path in paths]
+                    drive(options['port'], paths, tokens, duration=1.0) # warm caches and imports
+                    result = drive(options['port'], paths, tokens, duration=options['duration'])
+                finally:
+                    process.terminate()
+                    process.wait()
+
+                self.stdout.write(
+                    f"{server:<9} {label:<12} {result['rps']:>9.1f} req/s  p50 {result['p50']:>7.1f} ms  "
+                    f"p99 {result['p99']:>7.1f} ms  errors {result['errors']}"
+                )
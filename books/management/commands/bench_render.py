@@ -0,0 +1,59 @@
+import json, time
+from books.models import Book
+from books.serializers import BookSerializer, book_rows
+from core.benchmarking import isolated_database, percentile
+from core.renderers import FastJSONRenderer, orjson
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare the ModelSerializer render path with the values() projection path on a large book list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.bench(**options)
+
+    def bench(self, rows, repeat, **options):
+        Book.objects.bulk_create(
+            [
+                Book(
+                    isbn=f'{i:013d}', title=f'Book {i}', description='A book about things. ' * 10,
+                    authors=f'Author {i % 500}', genre=['Fantasy', 'Science', 'History'][i % 3],
+                    publisher=['Penguin', 'Orbit'][i % 2], language='English', number_of_pages=100 + i % 400,
+                    cover_image=f'covers/{i}.jpg' if i % 2 else None
+                )
+                for i in range(rows)
+            ],
+            batch_size=2000
+        )
+
+        def serializer_path():
+            data = BookSerializer(Book.objects.all(), many=True).data
+            return JSONRenderer().render({'success':True, 'books':data})
+
+        def projection_path():
+            data = book_rows(Book.objects.values(*BookSerializer.Meta.fields))
+            return FastJSONRenderer().render({'success':True, 'books':data})
+
+        if json.loads(serializer_path()) != json.loads(projection_path()):
+            raise CommandError('The two render paths disagree')
+
+        results = {}
+        for name, path in [('serializer', serializer_path), ('projection', projection_path)]:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                path()
+                timings.append(time.perf_counter() - start)
+            results[name] = percentile(timings, 0.5)
+            self.stdout.write(f'{name}: median {results[name] * 1000:.1f} ms over {repeat} runs of {rows} rows')
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; the projection path rendered with stdlib json'))
+
+        self.stdout.write(self.style.SUCCESS(f'speedup: {results["serializer"] / results["projection"]:.1f}x'))
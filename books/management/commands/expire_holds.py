@@ -0,0 +1,13 @@
+from books.holds import expire_holds
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Expire uncollected holds and pass their copies to the next reservation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        expired = expire_holds(batch_size=options['batch_size'])
+        self.stdout.write(f'{expired} holds expired')
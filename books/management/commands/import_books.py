@@ -0,0 +1,31 @@
+import json
+from books.importer import guess_format, import_books
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Upsert books by ISBN from a CSV or JSON-lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'])
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--errors', action='store_true', help='Print the per-row errors')
+
+    def handle(self, *args, **options):
+        format = options['format'] or guess_format(options['path'])
+
+        if format is None:
+            raise CommandError('Cannot tell the format from the file name, pass --format')
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            report = import_books(stream, format=format, chunk_size=options['chunk_size'])
+
+        if options['errors']:
+            for error in report['errors']:
+                self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+
+        self.stdout.write(
+            f"{report['rows']} rows in {report['seconds']}s ({report['rows_per_second']} rows/s): "
+            f"{report['created']} created, {report['updated']} updated, {report['error_count']} errors"
+        )
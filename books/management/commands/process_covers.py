@@ -0,0 +1,37 @@
+import time
+from books.covers import drain
+from books.models import Book, CoverJob
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Render the thumbnail and WebP variants of uploaded covers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the queue once and exit')
+        parser.add_argument('--enqueue-missing', action='store_true', help='First queue every cover that has no variants yet')
+        parser.add_argument('--batch-size', type=int, default=settings.COVERS['BATCH_SIZE'])
+        parser.add_argument('--workers', type=int, default=settings.COVERS['WORKERS'])
+        parser.add_argument('--poll-interval', type=float, default=settings.COVERS['POLL_INTERVAL'])
+
+    def handle(self, *args, **options):
+        if options['enqueue_missing']:
+            books = Book.objects.exclude(cover_image='').exclude(cover_image=None).filter(cover_variants={})
+            jobs = CoverJob.objects.bulk_create(
+                [CoverJob(book_id=pk, source=source) for pk, source in books.values_list('pk', 'cover_image')],
+                batch_size=1000
+            )
+            self.stdout.write(f'{len(jobs)} covers queued')
+
+        while True:
+            totals = drain(batch_size=options['batch_size'], workers=options['workers'])
+
+            if any(totals.values()):
+                self.stdout.write(
+                    f"done={totals['done']} retried={totals['retried']} failed={totals['failed']}"
+                )
+            if options['once']:
+                return
+
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,10 @@
+from books.facets import rebuild
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recount the genre/publisher/language/availability facet table from scratch'
+
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write('Facet counts rebuilt')
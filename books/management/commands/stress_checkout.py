@@ -0,0 +1,58 @@
+import logging
+from accounts.models import User
+from books.models import Book, CheckoutBook
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from core.benchmarking import isolated_database, run_in_thread
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+
+class Command(BaseCommand):
+    help = 'Check out one book from many threads at once and verify no copy is lent twice'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--copies', type=int, default=5)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--attempts-per-user', type=int, default=2)
+
+    def handle(self, *args, **options):
+        # rejected checkouts are expected here, don't log each 400
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        with isolated_database():
+            self.stress(**options)
+
+    def stress(self, copies, users, threads, attempts_per_user, **options):
+        book = Book.objects.create(
+            isbn='9999999999999', title='Contended', description='-', authors='-', genre='-',
+            publisher='-', language='-', total_copies=copies, available_copies=copies
+        )
+        members = [
+            User.objects.create(
+                email=f'stress{i}@example.com', username=f'stress{i}', phone_number=f'stress{i}', is_verified=True
+            )
+            for i in range(users)
+        ]
+
+        @run_in_thread
+        def checkout(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            return client.post(f'/books/{book.isbn}/checkout').status_code
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            statuses = Counter(executor.map(checkout, members * attempts_per_user))
+
+        book.refresh_from_db()
+        loans = CheckoutBook.objects.filter(book=book).count()
+        borrowers = CheckoutBook.objects.filter(book=book).values('user').distinct().count()
+
+        self.stdout.write(f'responses: {dict(statuses)}')
+        self.stdout.write(f'loans: {loans}, available copies: {book.available_copies}/{book.total_copies}')
+
+        if loans > copies or loans != borrowers or book.available_copies != copies - loans or statuses[201] != loans:
+            raise CommandError('Inventory invariant violated')
+
+        self.stdout.write(self.style.SUCCESS('Inventory invariant holds'))
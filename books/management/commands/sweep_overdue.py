@@ -0,0 +1,13 @@
+from books.loans import sweep_overdue
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Flag overdue loans and queue reminder emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        flagged = sweep_overdue(batch_size=options['batch_size'])
+        self.stdout.write(f'{flagged} loans flagged overdue')
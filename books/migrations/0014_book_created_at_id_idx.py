@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0013_alter_checkoutbook_due_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-created_at', '-id'], name='book_created_at_id_idx'),
+        ),
+    ]
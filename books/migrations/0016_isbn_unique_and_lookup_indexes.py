@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0015_book_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='isbn',
+            field=models.CharField(max_length=13, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='checkoutbook',
+            index=models.Index(fields=['user', 'book'], name='checkout_user_book_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkoutbook',
+            index=models.Index(fields=['user', '-created_at'], name='checkout_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservebook',
+            index=models.Index(fields=['user', 'book'], name='reserve_user_book_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservebook',
+            index=models.Index(fields=['user', '-created_at'], name='reserve_user_created_idx'),
+        ),
+    ]
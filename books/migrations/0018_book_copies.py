@@ -0,0 +1,83 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def count_copies(apps, schema_editor):
+    # Every checkout row is a loan that hasn't been returned yet: until now
+    # a return deleted it. Each of them holds a copy.
+    Book = apps.get_model('books', 'Book')
+    CheckoutBook = apps.get_model('books', 'CheckoutBook')
+
+    open_loans = Coalesce(
+        Subquery(
+            CheckoutBook.objects.filter(book=OuterRef('pk')).order_by()
+            .values('book').annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+    Book.objects.update(total_copies=Greatest(Value(1), open_loans))
+    Book.objects.update(available_copies=F('total_copies') - open_loans)
+    # a book marked unavailable by hand has no copy to lend either
+    Book.objects.filter(available='Unavailable').update(available_copies=0)
+    Book.objects.filter(available_copies=0).update(available='Unavailable')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0016_isbn_unique_and_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='available_copies',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='total_copies',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(count_copies, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='book',
+            constraint=models.CheckConstraint(check=models.Q(('available_copies__lte', models.F('total_copies'))), name='available_copies_lte_total'),
+        ),
+        migrations.AddField(
+            model_name='checkoutbook',
+            name='returned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservebook',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservebook',
+            name='status',
+            field=models.CharField(choices=[('Waiting', 'Waiting'), ('Ready', 'Ready'), ('Fulfilled', 'Fulfilled'), ('Expired', 'Expired')], default='Waiting', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='reservebook',
+            index=models.Index(condition=models.Q(('status', 'Waiting')), fields=['book', 'created_at'], name='reserve_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservebook',
+            index=models.Index(condition=models.Q(('status', 'Ready')), fields=['expires_at'], name='reserve_ready_expiry_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='checkoutbook',
+            constraint=models.UniqueConstraint(condition=models.Q(('returned_at__isnull', True)), fields=('user', 'book'), name='unique_user_book_active_checkout'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservebook',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['Waiting', 'Ready'])), fields=('user', 'book'), name='unique_user_book_active_reservation'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:05
+
+import books.models
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0018_book_copies'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkoutbook',
+            name='is_overdue',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='checkoutbook',
+            name='borrow_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AlterField(
+            model_name='checkoutbook',
+            name='due_date',
+            field=models.DateField(default=books.models.default_due_date),
+        ),
+        migrations.AddIndex(
+            model_name='checkoutbook',
+            index=models.Index(condition=models.Q(('is_overdue', False), ('returned_at__isnull', True)), fields=['due_date'], name='checkout_open_due_date_idx'),
+        ),
+    ]
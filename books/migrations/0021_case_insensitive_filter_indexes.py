@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0020_loan_policy_and_overdue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.functions.text.Lower('genre'), name='book_genre_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.functions.text.Lower('publisher'), name='book_publisher_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+
+def count_facets(apps, schema_editor):
+    Book = apps.get_model('books', 'Book')
+    BookFacetCount = apps.get_model('books', 'BookFacetCount')
+
+    BookFacetCount.objects.bulk_create([
+        BookFacetCount(facet=facet, value=row[facet], count=row['count'])
+        for facet in ['genre', 'publisher', 'language', 'available']
+        for row in Book.objects.order_by().values(facet).annotate(count=models.Count('pk'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0021_case_insensitive_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=50)),
+                ('value', models.CharField(max_length=255)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('facet', '-count'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookfacetcount',
+            constraint=models.UniqueConstraint(fields=('facet', 'value'), name='unique_facet_value'),
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
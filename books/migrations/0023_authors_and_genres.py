@@ -0,0 +1,92 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0022_book_facet_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('name_key', models.CharField(editable=False, max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='BookAuthor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('book', 'position'),
+            },
+        ),
+        migrations.CreateModel(
+            name='BookGenre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('book', 'position'),
+            },
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('name_key', models.CharField(editable=False, max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.AddField(
+            model_name='bookauthor',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='book_links', to='books.author'),
+        ),
+        migrations.AddField(
+            model_name='bookauthor',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='author_links', to='books.book'),
+        ),
+        migrations.AddField(
+            model_name='bookgenre',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='genre_links', to='books.book'),
+        ),
+        migrations.AddField(
+            model_name='bookgenre',
+            name='genre',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='book_links', to='books.genre'),
+        ),
+        migrations.AddIndex(
+            model_name='bookauthor',
+            index=models.Index(fields=['author', 'book'], name='book_author_author_book_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookauthor',
+            constraint=models.UniqueConstraint(fields=('book', 'author'), name='unique_book_author'),
+        ),
+        migrations.AddIndex(
+            model_name='bookgenre',
+            index=models.Index(fields=['genre', 'book'], name='book_genre_genre_book_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookgenre',
+            constraint=models.UniqueConstraint(fields=('book', 'genre'), name='unique_book_genre'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+import re
+from django.db import migrations, transaction
+
+
+BATCH_SIZE = 1000
+
+# books.taxonomy as of this migration, copied so that later changes to how
+# names are split don't change what it backfilled
+NAME_SEPARATOR_RE = re.compile(r'\s*[;&/]\s*')
+
+
+def parse_names(value:str) -> list:
+    names, seen = [], set()
+    for name in NAME_SEPARATOR_RE.split(value or ''):
+        name = ' '.join(name.split())
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def link_names(model, link_model, field:str, rows:list):
+    # rows are (book_id, names) pairs; each book's links are replaced
+    names = {name.lower():name for _, book_names in rows for name in book_names}
+    model.objects.bulk_create([model(name=name, name_key=key) for key, name in names.items()], ignore_conflicts=True)
+    ids = dict(model.objects.filter(name_key__in=names.keys()).values_list('name_key', 'pk'))
+
+    link_model.objects.filter(book_id__in=[book_id for book_id, _ in rows]).delete()
+    link_model.objects.bulk_create([
+        link_model(book_id=book_id, position=position, **{f'{field}_id':ids[name.lower()]})
+        for book_id, book_names in rows
+        for position, name in enumerate(book_names)
+    ])
+
+
+def backfill(apps, schema_editor):
+    Book = apps.get_model('books', 'Book')
+    models = {name:apps.get_model('books', name) for name in ['Author', 'BookAuthor', 'Genre', 'BookGenre']}
+
+    last_pk = None
+    while True:
+        books = Book.objects.order_by('pk')
+        if last_pk is not None:
+            books = books.filter(pk__gt=last_pk)
+        rows = list(books.values_list('pk', 'authors', 'genre')[:BATCH_SIZE])
+        if not rows:
+            break
+
+        with transaction.atomic():
+            link_names(models['Author'], models['BookAuthor'], 'author', [(pk, parse_names(authors)) for pk, authors, _ in rows])
+            link_names(models['Genre'], models['BookGenre'], 'genre', [(pk, parse_names(genre)) for pk, _, genre in rows])
+        last_pk = rows[-1][0]
+
+
+def unlink(apps, schema_editor):
+    for name in ['BookAuthor', 'BookGenre', 'Author', 'Genre']:
+        apps.get_model('books', name).objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    # each batch commits on its own, so a large catalogue isn't backfilled
+    # in one long transaction; re-running relinks the same books
+    atomic = False
+
+    dependencies = [
+        ('books', '0023_authors_and_genres'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, unlink),
+    ]
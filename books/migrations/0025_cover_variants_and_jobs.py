@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:37
+
+import books.models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0024_backfill_authors_and_genres'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='cover_image',
+            field=models.ImageField(blank=True, null=True, upload_to=books.models.cover_upload_to),
+        ),
+        migrations.CreateModel(
+            name='CoverJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False, unique=True)),
+                ('source', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Processing', 'Processing'), ('Done', 'Done'), ('Failed', 'Failed')], default='Pending', max_length=50)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('lease_token', models.UUIDField(blank=True, null=True)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cover_jobs', to='books.book')),
+            ],
+            options={
+                'ordering': ('created_at',),
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='cover_job_status_next_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# On PostgreSQL the archive is partitioned by year; see books.archive. The
+# DDL lives here rather than being imported from there, so the migration
+# keeps doing what it did when the app code changes.
+
+def create_archive_table(apps, schema_editor):
+    model = apps.get_model('books', 'ArchivedLoan')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(model)
+        return
+
+    table = model._meta.db_table
+    book_table = model._meta.get_field('book').related_model._meta.db_table
+    user_table = model._meta.get_field('user').related_model._meta.db_table
+    # the partition key has to be part of the primary key
+    schema_editor.execute(
+        f"CREATE TABLE {table} ("
+        f"checkout_id uuid NOT NULL, "
+        f"year smallint NOT NULL CHECK (year >= 0), "
+        f"book_id uuid NOT NULL REFERENCES {book_table} (id) DEFERRABLE INITIALLY DEFERRED, "
+        f"user_id varchar(8) NOT NULL REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED, "
+        f"borrow_date date NOT NULL, "
+        f"due_date date NOT NULL, "
+        f"returned_at timestamp with time zone NOT NULL, "
+        f"is_overdue boolean NOT NULL, "
+        f"created_at timestamp with time zone NOT NULL, "
+        f"archived_at timestamp with time zone NOT NULL, "
+        f"PRIMARY KEY (year, checkout_id)"
+        f") PARTITION BY LIST (year)"
+    )
+    schema_editor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def drop_archive_table(apps, schema_editor):
+    # dropping a partitioned table drops its partitions
+    schema_editor.delete_model(apps.get_model('books', 'ArchivedLoan'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0025_cover_variants_and_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkoutbook',
+            index=models.Index(condition=models.Q(('returned_at__isnull', False)), fields=['returned_at'], name='checkout_returned_idx'),
+        ),
+        # the table itself is created below, partitioned on PostgreSQL
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArchivedLoan',
+                    fields=[
+                        ('checkout_id', models.UUIDField(primary_key=True, serialize=False)),
+                        ('year', models.PositiveSmallIntegerField()),
+                        ('borrow_date', models.DateField()),
+                        ('due_date', models.DateField()),
+                        ('returned_at', models.DateTimeField()),
+                        ('is_overdue', models.BooleanField(default=False)),
+                        ('created_at', models.DateTimeField()),
+                        ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('book', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_loans', to='books.book')),
+                        ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_loans', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'ordering': ('-created_at',),
+                        'indexes': [
+                            models.Index(fields=['user', '-created_at', '-checkout_id'], name='archive_user_created_idx'),
+                            models.Index(fields=['book', '-created_at', '-checkout_id'], name='archive_book_created_idx'),
+                        ],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+    ]
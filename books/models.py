@@ -1,10 +1,29 @@
-import uuid
+import os, uuid
 from accounts.models import User
 from datetime import timedelta
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 
+def loan_period(role:str='Member') -> timedelta:
+    policy = settings.CIRCULATION
+    return timedelta(days=policy['LOAN_DAYS_BY_ROLE'].get(role, policy['LOAN_DAYS']))
+
+
+def default_due_date():
+    # a callable, so each loan gets its own due date instead of one frozen
+    # when the module was imported
+    return timezone.localdate() + loan_period()
+
+
+def cover_upload_to(instance, filename:str) -> str:
+    # a fresh name per upload, so a cover's URL never changes content and
+    # can be cached for good
+    return f'covers/{uuid.uuid4().hex}{os.path.splitext(filename)[1].lower()}'
+
+
 class Book(models.Model):
     AVAILABILITY_CHOICES = [
         ('Available', 'Available'),
@@ -12,9 +31,11 @@ class Book(models.Model):
     ]
 
     id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4)
-    isbn = models.CharField(max_length=13)
+    isbn = models.CharField(max_length=13, unique=True)
     title = models.CharField(max_length=255)
-    cover_image = models.ImageField(blank=True, null=True)
+    cover_image = models.ImageField(upload_to=cover_upload_to, blank=True, null=True)
+    # storage names of the resized copies, {variant: {format: name}}; see books.covers
+    cover_variants = models.JSONField(default=dict, blank=True)
     description = models.TextField()
     authors = models.CharField(max_length=255)
     genre = models.CharField(max_length=255)
@@ -23,6 +44,8 @@ class Book(models.Model):
     number_of_pages = models.PositiveIntegerField(default=0)
     language = models.CharField(max_length=255)
     available = models.CharField(max_length=50, choices=AVAILABILITY_CHOICES, default='Available')
+    total_copies = models.PositiveIntegerField(default=1)
+    available_copies = models.PositiveIntegerField(default=1)
     shelf_location = models.CharField(max_length=255, default='N/A')
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -31,14 +54,24 @@ class Book(models.Model):
 
     class Meta:
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='book_created_at_id_idx'),
+            models.Index(Lower('genre'), name='book_genre_lower_idx'),
+            models.Index(Lower('publisher'), name='book_publisher_lower_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(available_copies__lte=models.F('total_copies')), name='available_copies_lte_total'),
+        ]
 
 
 class CheckoutBook(models.Model):
     checkout_id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4)
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    borrow_date = models.DateField(default=timezone.now)
-    due_date = models.DateField(default=(timezone.now() + timedelta(days=21)))
+    borrow_date = models.DateField(default=timezone.localdate)
+    due_date = models.DateField(default=default_due_date)
+    returned_at = models.DateTimeField(null=True, blank=True)
+    is_overdue = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -46,16 +79,188 @@ class CheckoutBook(models.Model):
 
     class Meta:
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['user', 'book'], name='checkout_user_book_idx'),
+            models.Index(fields=['user', '-created_at'], name='checkout_user_created_idx'),
+            models.Index(fields=['due_date'], condition=models.Q(returned_at__isnull=True, is_overdue=False), name='checkout_open_due_date_idx'),
+            # returned loans waiting for "manage.py archive_loans"
+            models.Index(fields=['returned_at'], condition=models.Q(returned_at__isnull=False), name='checkout_returned_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'book'], condition=models.Q(returned_at__isnull=True), name='unique_user_book_active_checkout'),
+        ]
+
+
+class ArchivedLoan(models.Model):
+    # A returned loan moved out of CheckoutBook by books.archive. On
+    # PostgreSQL the table is partitioned by the year the book was borrowed.
+    checkout_id = models.UUIDField(primary_key=True)
+    year = models.PositiveSmallIntegerField()
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='archived_loans', db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_loans', db_index=False)
+    borrow_date = models.DateField()
+    due_date = models.DateField()
+    returned_at = models.DateTimeField()
+    is_overdue = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.user_id} - {self.book_id} ({self.year})'
+
+    class Meta:
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-checkout_id'], name='archive_user_created_idx'),
+            models.Index(fields=['book', '-created_at', '-checkout_id'], name='archive_book_created_idx'),
+        ]
 
 
 class ReserveBook(models.Model):
+    STATUS_CHOICES = [
+        ('Waiting', 'Waiting'),
+        ('Ready', 'Ready'),
+        ('Fulfilled', 'Fulfilled'),
+        ('Expired', 'Expired')
+    ]
+
     reservation_id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4)
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='reserves')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Waiting')
+    expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f'{self.user.username} reserved "{self.book.title}"'
 
     class Meta:
-        ordering = ('-created_at',)
\ No newline at end of file
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['user', 'book'], name='reserve_user_book_idx'),
+            models.Index(fields=['user', '-created_at'], name='reserve_user_created_idx'),
+            # head of each book's hold queue
+            models.Index(fields=['book', 'created_at'], condition=models.Q(status='Waiting'), name='reserve_queue_idx'),
+            models.Index(fields=['expires_at'], condition=models.Q(status='Ready'), name='reserve_ready_expiry_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'book'], condition=models.Q(status__in=['Waiting', 'Ready']), name='unique_user_book_active_reservation'),
+        ]
+
+
+class BookFacetCount(models.Model):
+    facet = models.CharField(max_length=50)
+    value = models.CharField(max_length=255)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.facet}={self.value}: {self.count}'
+
+    class Meta:
+        ordering = ('facet', '-count')
+        constraints = [
+            models.UniqueConstraint(fields=['facet', 'value'], name='unique_facet_value'),
+        ]
+
+
+# name_key is the lowercased name, which makes names unique regardless of
+# case. It is lowered in Python because SQLite's LOWER() only folds ASCII.
+
+class Author(models.Model):
+    name = models.CharField(max_length=255)
+    name_key = models.CharField(max_length=255, unique=True, editable=False)
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.name_key = self.name.lower()
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ('name',)
+
+
+class Genre(models.Model):
+    name = models.CharField(max_length=255)
+    name_key = models.CharField(max_length=255, unique=True, editable=False)
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.name_key = self.name.lower()
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ('name',)
+
+
+# Through tables for the names parsed out of Book.authors and Book.genre,
+# which stay the source of truth; see books.taxonomy. The unique constraint
+# indexes book -> names and the extra index names -> books, so the foreign
+# keys need no indexes of their own.
+
+class BookAuthor(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='author_links', db_index=False)
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='book_links', db_index=False)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.author_id} wrote {self.book_id}'
+
+    class Meta:
+        ordering = ('book', 'position')
+        indexes = [
+            models.Index(fields=['author', 'book'], name='book_author_author_book_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'author'], name='unique_book_author'),
+        ]
+
+
+class BookGenre(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='genre_links', db_index=False)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name='book_links', db_index=False)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.book_id} is {self.genre_id}'
+
+    class Meta:
+        ordering = ('book', 'position')
+        indexes = [
+            models.Index(fields=['genre', 'book'], name='book_genre_genre_book_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'genre'], name='unique_book_genre'),
+        ]
+
+
+class CoverJob(models.Model):
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Processing', 'Processing'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed')
+    ]
+
+    id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='cover_jobs')
+    source = models.CharField(max_length=255) # the cover_image name to render
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.PositiveIntegerField(default=0)
+    lease_token = models.UUIDField(null=True, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.source} ({self.status})'
+
+    class Meta:
+        ordering = ('created_at',)
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='cover_job_status_next_idx'),
+        ]
@@ -0,0 +1,9 @@
+from core.search import FullTextIndex
+
+
+book_index = FullTextIndex(
+    model_label='books.Book',
+    fields=['title', 'authors', 'genre'],
+    weights=[10.0, 5.0, 2.0],
+    table='books_book_fts',
+)
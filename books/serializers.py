@@ -1,23 +1,103 @@
+from .covers import variant_urls
+from .holds import add_copies
+from .inventory import withdraw_copies
 from .models import Book, CheckoutBook, ReserveBook
+from core.projections import file_url, project
+from core.renderers import dumps
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
 from rest_framework import serializers
 
 
 class BookSerializer(serializers.ModelSerializer):
+    cover_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Book
-        fields = ['isbn', 'title', 'cover_image', 'description', 'authors', 'genre', 'date_published', 'publisher', 'number_of_pages', 'language', 'available', 'shelf_location']
+        fields = ['isbn', 'title', 'cover_image', 'cover_variants', 'description', 'authors', 'genre', 'date_published', 'publisher', 'number_of_pages', 'language', 'available', 'shelf_location', 'total_copies', 'available_copies']
+        read_only_fields = ['available', 'available_copies']
+
+    def get_cover_variants(self, book:Book) -> dict:
+        return variant_urls(book.cover_variants)
+
+    def create(self, validated_data):
+        total_copies = validated_data.get('total_copies', 1)
+        validated_data['available_copies'] = total_copies
+        validated_data['available'] = 'Available' if total_copies else 'Unavailable'
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        total_copies = validated_data.pop('total_copies', None)
+
+        with transaction.atomic():
+            # only the fields sent are written; the copy counts loaded with the
+            # instance may be stale, and saving them back would undo a
+            # checkout made since
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            update_fields = set(validated_data)
+            if 'cover_image' in update_fields:
+                update_fields.add('cover_variants') # cleared by a pre_save receiver
+            instance.save(update_fields=update_fields)
+
+            if total_copies is not None:
+                # re-read under lock so copies checked out meanwhile are not lost
+                current = Book.objects.select_for_update().only('total_copies', 'available_copies').get(pk=instance.pk)
+                on_loan = current.total_copies - current.available_copies
+                if total_copies < on_loan:
+                    raise serializers.ValidationError({'total_copies':f'{on_loan} copies are on loan'})
+
+                if total_copies > current.total_copies:
+                    add_copies(instance, total_copies - current.total_copies)
+                elif total_copies < current.total_copies:
+                    withdraw_copies(instance, current.total_copies - total_copies)
+
+        instance.refresh_from_db(fields=['total_copies', 'available', 'available_copies'])
+        return instance
+
+
+def book_rows(rows, fields:list=None) -> list:
+    # BookSerializer's output for read-only lists, built from values() rows
+    return project(rows, fields or BookSerializer.Meta.fields, {'cover_image':file_url, 'cover_variants':variant_urls})
+
+
+def stream_books_ndjson(queryset, chunk_size:int=2000, fields:list=None):
+    # iterator() keeps the ORM from caching rows, so memory stays flat
+    fields = fields or BookSerializer.Meta.fields
+    rows = queryset.order_by('-created_at', '-id').values(*fields).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield dumps(book_rows([row], fields)[0]) + b'\n'
+
+
+async def astream_books_ndjson(queryset, chunk_size:int=2000, fields:list=None):
+    fields = fields or BookSerializer.Meta.fields
+    rows = queryset.order_by('-created_at', '-id').values(*fields).aiterator(chunk_size=chunk_size)
+    async for row in rows:
+        yield dumps(book_rows([row], fields)[0]) + b'\n'
 
 
 class ReservesSerializer(serializers.ModelSerializer):
     book = serializers.SerializerMethodField()
+    position = serializers.SerializerMethodField()
 
     class Meta:
         model = ReserveBook
-        fields = ['reservation_id', 'book']
+        fields = ['reservation_id', 'book', 'status', 'position', 'expires_at']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        waiting_ahead = ReserveBook.objects.filter(
+            book=OuterRef('book'), status='Waiting', created_at__lte=OuterRef('created_at')
+        ).order_by().values('book').annotate(count=Count('pk')).values('count')
+
+        return queryset.select_related('book').annotate(queue_position=Subquery(waiting_ahead))
 
     def get_book(self, obj):
         return obj.book.title if obj.book else None
 
+    def get_position(self, obj):
+        return obj.queue_position if obj.status == 'Waiting' else None
+
 
 class CheckoutSerializer(serializers.ModelSerializer):
     book = serializers.SerializerMethodField()
@@ -25,10 +105,22 @@ class CheckoutSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CheckoutBook
-        fields = ['checkout_id', 'user', 'book', 'borrow_date', 'due_date']
+        fields = ['checkout_id', 'user', 'book', 'borrow_date', 'due_date', 'is_overdue']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('book', 'user')
 
     def get_book(self, obj):
         return obj.book.title if obj.book else None 
 
     def get_user(self, obj):
-        return obj.user.username if obj.user else None
\ No newline at end of file
+        return obj.user.username if obj.user else None
+
+class BookImportSerializer(serializers.ModelSerializer):
+    # uniqueness is resolved by the upsert, not by a query per row
+    isbn = serializers.CharField(max_length=13)
+
+    class Meta:
+        model = Book
+        fields = ['isbn', 'title', 'description', 'authors', 'genre', 'date_published', 'publisher', 'number_of_pages', 'language', 'shelf_location']
@@ -0,0 +1,123 @@
+from . import cache, covers, facets, taxonomy
+from .models import Book
+from .search import book_index
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+
+# sent with books=[...] after a bulk upsert, which bypasses post_save;
+# previous={isbn: facet values} holds the books that existed before it
+books_imported = Signal()
+
+# sent with books=[...] when copy counts change through a queryset update;
+# changed_to is the new value of Book.available if that flipped too
+availability_changed = Signal()
+
+
+@receiver(post_init, sender=Book)
+def remember_loaded_values(sender, instance, **kwargs):
+    # lets an ISBN change also invalidate the entry cached under the old one,
+    # and lets facet counts move from the old values to the new ones
+    instance._loaded_isbn = instance.__dict__.get('isbn')
+    instance._loaded_facets = facets.facet_values(instance)
+    instance._loaded_names = {field:instance.__dict__.get(field) for field in ('authors', 'genre')}
+    instance._loaded_cover = cover_name(instance)
+
+
+def cover_name(book:Book):
+    # None while the field is deferred
+    if 'cover_image' not in book.__dict__:
+        return None
+    value = book.__dict__['cover_image']
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, **kwargs):
+    book_index.update([instance])
+
+
+@receiver(post_save, sender=Book)
+def invalidate_saved_book(sender, instance, **kwargs):
+    cache.invalidate_books({instance.isbn, instance._loaded_isbn} - {None})
+    instance._loaded_isbn = instance.isbn
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    book_index.remove([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def invalidate_deleted_book(sender, instance, **kwargs):
+    cache.invalidate_books({instance.isbn, instance._loaded_isbn} - {None})
+
+
+@receiver(books_imported, sender=Book)
+def index_imported_books(sender, books, **kwargs):
+    book_index.update(books)
+    cache.invalidate_books({book.isbn for book in books})
+
+
+@receiver(availability_changed, sender=Book)
+def invalidate_availability(sender, books, **kwargs):
+    cache.invalidate_books({book.isbn for book in books})
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book(sender, instance, created, **kwargs):
+    new = facets.facet_values(instance)
+    facets.apply_change(old=None if created else instance._loaded_facets, new=new)
+    instance._loaded_facets = new
+
+
+@receiver(post_delete, sender=Book)
+def uncount_deleted_book(sender, instance, **kwargs):
+    facets.apply_change(old=facets.facet_values(instance), new=None)
+
+
+@receiver(post_save, sender=Book)
+def link_saved_book(sender, instance, created, **kwargs):
+    loaded = instance._loaded_names
+    changed = [field for field in loaded if field in instance.__dict__ and instance.__dict__[field] != loaded[field]]
+    if created or changed:
+        taxonomy.sync_books([instance])
+    instance._loaded_names = {field:instance.__dict__.get(field) for field in loaded}
+
+
+@receiver(books_imported, sender=Book)
+def link_imported_books(sender, books, **kwargs):
+    taxonomy.sync_books(books)
+
+
+@receiver(books_imported, sender=Book)
+def recount_imported_books(sender, books, previous, **kwargs):
+    facets.apply_changes([(previous.get(book.isbn), facets.facet_values(book)) for book in books])
+
+
+@receiver(availability_changed, sender=Book)
+def count_availability_change(sender, books, changed_to=None, **kwargs):
+    if changed_to is None:
+        return
+    previous = 'Available' if changed_to == 'Unavailable' else 'Unavailable'
+    if books:
+        facets.adjust('available', previous, -len(books))
+        facets.adjust('available', changed_to, len(books))
+
+
+@receiver(pre_save, sender=Book)
+def drop_stale_cover_variants(sender, instance, **kwargs):
+    name = cover_name(instance)
+    if name is not None and name != instance._loaded_cover:
+        instance.cover_variants = {}
+
+
+@receiver(post_save, sender=Book)
+def queue_cover_variants(sender, instance, **kwargs):
+    # runs after the upload is stored, when the name is the final one
+    name = cover_name(instance)
+    if name is None or name == instance._loaded_cover:
+        return
+    if name:
+        covers.enqueue_cover(instance)
+    instance._loaded_cover = name
@@ -0,0 +1,51 @@
+import re
+from .models import Author, BookAuthor, BookGenre, Genre
+from django.db import transaction
+
+
+# The catalogue separates several names with ";", "&" or "/": "A; B & C".
+# A comma or "and" belongs to the name, as in "Tolkien, J. R. R." or
+# "Science and Technology", so neither one separates.
+NAME_SEPARATOR_RE = re.compile(r'\s*[;&/]\s*')
+
+
+def parse_names(value:str) -> list:
+    names, seen = [], set()
+    for name in NAME_SEPARATOR_RE.split(value or ''):
+        name = ' '.join(name.split())
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def name_ids(model, names) -> dict:
+    # ids by name_key, creating the names that are new
+    names = {name.lower():name for name in names}
+    if not names:
+        return {}
+
+    model.objects.bulk_create([model(name=name, name_key=key) for key, name in names.items()], ignore_conflicts=True)
+    return dict(model.objects.filter(name_key__in=names.keys()).values_list('name_key', 'pk'))
+
+
+def link_names(model, link_model, field:str, rows:list):
+    # rows are (book_id, names) pairs; each book's links are replaced
+    ids = name_ids(model, {name for _, names in rows for name in names})
+
+    link_model.objects.filter(book_id__in=[book_id for book_id, _ in rows]).delete()
+    link_model.objects.bulk_create([
+        link_model(book_id=book_id, position=position, **{f'{field}_id':ids[name.lower()]})
+        for book_id, names in rows
+        for position, name in enumerate(names)
+    ])
+
+
+def sync_books(books):
+    rows = [(book.pk, book.authors, book.genre) for book in books]
+    if not rows:
+        return
+
+    with transaction.atomic():
+        link_names(Author, BookAuthor, 'author', [(pk, parse_names(authors)) for pk, authors, _ in rows])
+        link_names(Genre, BookGenre, 'genre', [(pk, parse_names(genre)) for pk, _, genre in rows])
@@ -1,3 +1,683 @@
-from django.test import TestCase
+import datetime, io, json, threading, uuid
+from . import cache as book_cache, covers, facets, views
+from .importer import import_books
+from .loans import sweep_overdue
+from .models import ArchivedLoan, Author, Book, BookFacetCount, CheckoutBook, CoverJob, Genre, ReserveBook
+from .taxonomy import parse_names
+from accounts.tests import QueryBudgetTests as UserQueryBudgetTests, client_for, make_user
+from asgiref.sync import async_to_sync
+from concurrent.futures import ThreadPoolExecutor
+from core.benchmarking import run_in_thread
+from core.routers import ReadConnectionRouter
+from core.testing import QueryBudgetMixin
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from notifications.models import OutboundEmail
+from rest_framework.test import APIClient
+from unittest import mock
 
-# Create your tests here.
+
+def make_book(i:int, **fields) -> Book:
+    defaults = dict(
+        isbn=f'{i:013d}', title=f'Book {i}', description='A book', authors=f'Author {i % 3}',
+        genre=['Fantasy', 'Science'][i % 2], publisher='Penguin', language='English',
+        date_published=datetime.date(2001, 1, 1), total_copies=3, available_copies=3
+    )
+    defaults.update(fields)
+    return Book.objects.create(**defaults)
+
+
+# every notification email is queued, as in production
+TEMPLATES = {name:f'T-{name}' for name in settings.NOTIFICATION_TEMPLATES}
+
+
+@override_settings(NOTIFICATION_TEMPLATES=TEMPLATES)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    # every route in settings.QUERY_BUDGETS served from books; a few rows
+    # each, so an N+1 shows up as going over budget
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = make_user('librarian', role='Librarian', is_staff=True)
+        cls.member = make_user('member')
+        cls.books = [make_book(i) for i in range(6)]
+        unavailable = dict(total_copies=1, available_copies=0, available='Unavailable')
+        cls.waitlisted = [make_book(100 + i, **unavailable) for i in range(3)]
+
+        returned = timezone.now() - datetime.timedelta(days=60)
+        for book in cls.books[:3]:
+            CheckoutBook.objects.create(book=book, user=cls.member)
+            CheckoutBook.objects.create(book=book, user=cls.librarian, returned_at=timezone.now())
+            ArchivedLoan.objects.create(
+                checkout_id=uuid.uuid4(), year=returned.year, book=book, user=cls.member,
+                borrow_date=returned.date(), due_date=returned.date(), returned_at=returned, created_at=returned
+            )
+        Book.objects.filter(pk__in=[book.pk for book in cls.books[:3]]).update(available_copies=2)
+        for book in cls.waitlisted:
+            CheckoutBook.objects.create(book=book, user=cls.librarian)
+            ReserveBook.objects.create(book=book, user=cls.member)
+
+    def setUp(self):
+        cache.clear()
+
+    def call(self, url_name:str, user, method:str='get', args:list=(), query:str='', data=None, expected:int=200):
+        with self.assertQueryBudget(url_name), self.captureOnCommitCallbacks(execute=True):
+            response = getattr(client_for(user), method)(reverse(url_name, args=args) + query, data, format='json')
+        self.assertEqual(response.status_code, expected, response.content)
+        return response
+
+    def test_every_budget_has_a_test(self):
+        # test methods are named after the route they check
+        tested = {name[len('test_'):] for case in (QueryBudgetTests, UserQueryBudgetTests) for name in dir(case)}
+        self.assertEqual(set(settings.QUERY_BUDGETS) - tested, set())
+
+    # reads
+
+    def test_get_all_books(self):
+        self.assertEqual(len(self.call('get_all_books', self.member).json()['books']), 9)
+
+    def test_get_particular_book(self):
+        self.call('get_particular_book', self.member, args=[self.books[0].isbn])
+
+    def test_search_books(self):
+        self.call('search_books', self.member, query='?query=book')
+
+    def test_filter_books(self):
+        self.call('filter_books', self.member, query='?genre=fantasy&genre=science')
+
+    def test_get_author_books(self):
+        author = Author.objects.get(name='Author 0')
+        self.call('get_author_books', self.member, args=[author.pk])
+
+    def test_get_genre_books(self):
+        genre = Genre.objects.get(name='Fantasy')
+        self.call('get_genre_books', self.member, args=[genre.pk])
+
+    def test_book_facets(self):
+        self.call('book_facets', self.member)
+
+    def test_get_borrowed_books(self):
+        self.assertEqual(len(self.call('get_borrowed_books', self.member).json()['books']), 3)
+
+    def test_get_reserved_books(self):
+        self.call('get_reserved_books', self.member)
+
+    def test_get_loan_history(self):
+        self.assertEqual(len(self.call('get_loan_history', self.member).json()['loans']), 3)
+
+    def test_get_book_loan_history(self):
+        self.assertEqual(len(self.call('get_book_loan_history', self.librarian, args=[self.books[0].isbn]).json()['loans']), 2)
+
+    # writes
+
+    def test_checkout_book(self):
+        self.call('checkout_book', self.member, 'post', args=[self.books[4].isbn], expected=201)
+
+    def test_checkout_books(self):
+        isbns = [book.isbn for book in self.books[3:]]
+        self.call('checkout_books', self.member, 'post', data={'isbns':isbns}, expected=201)
+
+    def test_return_book(self):
+        self.call('return_book', self.member, 'post', args=[self.books[0].isbn])
+
+    def test_return_book_with_a_hold_waiting(self):
+        self.call('return_book', self.librarian, 'post', args=[self.waitlisted[0].isbn])
+
+    def test_reserve_book(self):
+        book = make_book(200, total_copies=1, available_copies=0, available='Unavailable')
+        self.call('reserve_book', self.member, 'post', args=[book.isbn])
+
+    def test_reserve_books(self):
+        books = [make_book(300 + i, total_copies=1, available_copies=0, available='Unavailable') for i in range(3)]
+        self.call('reserve_books', self.member, 'post', data={'isbns':[book.isbn for book in books]})
+
+    def test_remove_reservation(self):
+        reservation = ReserveBook.objects.filter(user=self.member).first()
+        self.call('remove_reservation', self.member, 'delete', args=[reservation.pk], expected=204)
+
+    def test_remove_reservation_of_a_ready_hold(self):
+        # the held copy goes to the next in the queue
+        reservation = ReserveBook.objects.filter(user=self.member).first()
+        ReserveBook.objects.filter(pk=reservation.pk).update(status='Ready', expires_at=timezone.now())
+        ReserveBook.objects.create(book=reservation.book, user=self.librarian)
+        self.call('remove_reservation', self.member, 'delete', args=[reservation.pk], expected=204)
+
+
+class ImportTests(TestCase):
+    def import_csv(self, *lines) -> dict:
+        return import_books(io.StringIO('\n'.join(lines) + '\n'), 'csv')
+
+    def test_update_keeps_columns_the_row_leaves_out(self):
+        make_book(1, shelf_location='A1', number_of_pages=320)
+        make_book(2, shelf_location='B2', number_of_pages=100)
+
+        # the second row supplies shelf_location, so it is updated in this
+        # chunk; the first row's book keeps its own
+        report = self.import_csv(
+            'isbn,title,description,authors,genre,publisher,language,shelf_location',
+            '0000000000001,Renamed,A book,Author 1,Science,Penguin,English,',
+            '0000000000002,Book 2,A book,Author 2,Fantasy,Penguin,English,C3',
+        )
+
+        self.assertEqual(report['updated'], 2)
+        first, second = Book.objects.filter(isbn__in=['0000000000001', '0000000000002']).order_by('isbn')
+        self.assertEqual((first.title, first.shelf_location, first.number_of_pages), ('Renamed', 'A1', 320))
+        self.assertEqual((second.shelf_location, second.number_of_pages), ('C3', 100))
+        self.assertEqual(first.date_published, datetime.date(2001, 1, 1))
+
+
+    def test_facet_counts_follow_the_import(self):
+        make_book(1, genre='Fantasy')
+        make_book(2, genre='Fantasy')
+
+        with mock.patch.object(facets, 'rebuild') as rebuild:
+            self.import_csv(
+                'isbn,title,description,authors,genre,publisher,language',
+                '0000000000001,Book 1,A book,Author 1,Science,Penguin,English',
+                '0000000000003,Book 3,A book,Author 3,Science,Vintage,English',
+            )
+
+        rebuild.assert_not_called()
+        stored = {
+            (row.facet, row.value):row.count for row in BookFacetCount.objects.filter(count__gt=0)
+        }
+        expected = {
+            (facet, row['value']):row['count']
+            for facet, rows in facets.counts(Book.objects.all()).items() for row in rows
+        }
+        self.assertEqual(stored, expected)
+        self.assertEqual(stored['genre', 'Science'], 2)
+
+class TaxonomyTests(TestCase):
+    def test_parse_names(self):
+        self.assertEqual(parse_names('Tolkien, J. R. R.'), ['Tolkien, J. R. R.'])
+        self.assertEqual(parse_names('Science and Technology'), ['Science and Technology'])
+        self.assertEqual(parse_names('Neil Gaiman & Terry Pratchett; neil gaiman / Anon'), ['Neil Gaiman', 'Terry Pratchett', 'Anon'])
+
+    def test_non_ascii_names(self):
+        first = make_book(1, authors='Émile Zola', genre='Ciência')
+        second = make_book(2, authors='ÉMILE ZOLA', genre='ciência')
+
+        self.assertEqual(Author.objects.get().name, 'Émile Zola')
+        self.assertEqual(Genre.objects.get().name, 'Ciência')
+        for book in (first, second):
+            self.assertEqual(list(book.author_links.values_list('author__name', flat=True)), ['Émile Zola'])
+
+    def test_saved_book_links_one_author(self):
+        book = make_book(1, authors='Tolkien, J. R. R.')
+        self.assertEqual(list(book.author_links.values_list('author__name', flat=True)), ['Tolkien, J. R. R.'])
+
+class BookUpdateRaceTests(TestCase):
+    def test_update_does_not_undo_a_checkout_made_meanwhile(self):
+        librarian = make_user('librarian', is_staff=True)
+        member = make_user('member')
+        book = make_book(1, total_copies=2, available_copies=2)
+        load_book = views.get_book
+        calls = []
+
+        def load_then_checkout(isbn:str):
+            # the book is loaded, then another request lends a copy
+            calls.append(isbn)
+            loaded = load_book(isbn=isbn)
+            if len(calls) == 1:
+                response = client_for(member).post(reverse('checkout_book', args=[isbn]))
+                self.assertEqual(response.status_code, 201, response.content)
+            return loaded
+
+        with mock.patch.object(views, 'get_book', load_then_checkout):
+            response = client_for(librarian).patch(reverse('update_book_details', args=[book.isbn]), {'shelf_location':'B2'})
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['book']['available_copies'], 1)
+        book.refresh_from_db()
+        self.assertEqual((book.shelf_location, book.available_copies), ('B2', 1))
+
+
+class TotalCopiesUpdateTests(TestCase):
+    def setUp(self):
+        self.librarian = client_for(make_user('librarian', is_staff=True))
+        self.book = make_book(1, total_copies=1, available_copies=0, available='Unavailable')
+        CheckoutBook.objects.create(book=self.book, user=make_user('borrower'))
+
+    def update(self, total_copies:int):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.librarian.patch(reverse('update_book_details', args=[self.book.isbn]), {'total_copies':total_copies})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.book.refresh_from_db()
+
+    def assertFacetsMatch(self):
+        stored = {row.value:row.count for row in BookFacetCount.objects.filter(facet='available', count__gt=0)}
+        self.assertEqual(stored, {row['value']:row['count'] for row in facets.counts(Book.objects.all())['available']})
+
+    def test_added_copies_go_to_the_hold_queue(self):
+        hold = ReserveBook.objects.create(book=self.book, user=make_user('member'))
+        self.update(3)
+
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, 'Ready')
+        self.assertEqual((self.book.total_copies, self.book.available_copies, self.book.available), (3, 1, 'Available'))
+        self.assertFacetsMatch()
+
+    def test_withdrawn_copies_come_off_the_shelf(self):
+        self.update(3)
+        self.update(1)
+
+        self.assertEqual((self.book.total_copies, self.book.available_copies, self.book.available), (1, 0, 'Unavailable'))
+        self.assertFacetsMatch()
+
+    def test_copies_on_loan_cannot_be_withdrawn(self):
+        response = self.librarian.patch(reverse('update_book_details', args=[self.book.isbn]), {'total_copies':0})
+        self.assertEqual(response.status_code, 400)
+
+class CheckoutStressTests(TransactionTestCase):
+    # real concurrent requests, each thread on its own connection
+    def test_concurrent_checkouts_and_updates_lend_each_copy_once(self):
+        copies, borrowers, updates = 4, 12, 8
+        librarian = make_user('librarian', is_staff=True)
+        members = [make_user(f'member{i}') for i in range(borrowers)]
+        book = make_book(1, total_copies=copies, available_copies=copies)
+        start = threading.Barrier(borrowers + updates)
+
+        @run_in_thread
+        def checkout(member):
+            start.wait()
+            return client_for(member).post(reverse('checkout_book', args=[book.isbn])).status_code
+
+        @run_in_thread
+        def update(i:int):
+            start.wait()
+            return client_for(librarian).patch(reverse('update_book_details', args=[book.isbn]), {'shelf_location':f'A{i}'}).status_code
+
+        with ThreadPoolExecutor(max_workers=borrowers + updates) as executor:
+            checkouts = [executor.submit(checkout, member) for member in members]
+            edits = [executor.submit(update, i) for i in range(updates)]
+            statuses = [future.result() for future in checkouts]
+            self.assertEqual({future.result() for future in edits}, {200})
+
+        book.refresh_from_db()
+        self.assertEqual(statuses.count(201), copies)
+        self.assertEqual(CheckoutBook.objects.filter(book=book).count(), copies)
+        self.assertEqual((book.available_copies, book.available), (0, 'Unavailable'))
+
+
+class CopiesMigrationTests(TransactionTestCase):
+    before = ('books', '0016_isbn_unique_and_lookup_indexes')
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_returning_a_loan_made_before_the_migration(self):
+        apps = self.migrate([self.before])
+        member = make_user('member')
+        book = apps.get_model('books', 'Book').objects.create(
+            isbn='0000000000001', title='Book 1', description='A book', authors='Author 1', genre='Fantasy',
+            publisher='Penguin', language='English', date_published=datetime.date(2001, 1, 1), available='Available'
+        )
+        apps.get_model('books', 'CheckoutBook').objects.create(book_id=book.pk, user_id=member.pk)
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+        book = Book.objects.get(pk=book.pk)
+        self.assertEqual((book.total_copies, book.available_copies, book.available), (1, 0, 'Unavailable'))
+
+        response = client_for(member).post(reverse('return_book', args=[book.isbn]))
+        self.assertEqual(response.status_code, 200, response.content)
+        book.refresh_from_db()
+        self.assertEqual((book.total_copies, book.available_copies, book.available), (1, 1, 'Available'))
+
+class UnknownIsbnTests(TestCase):
+    def setUp(self):
+        self.client = client_for(make_user('librarian', role='Librarian', is_staff=True))
+
+    def test_checkout_book(self):
+        self.assertEqual(self.client.post(reverse('checkout_book', args=['0000000000000'])).status_code, 400)
+
+    def test_reserve_book(self):
+        self.assertEqual(self.client.post(reverse('reserve_book', args=['0000000000000'])).status_code, 400)
+
+    def test_return_book(self):
+        self.assertEqual(self.client.post(reverse('return_book', args=['0000000000000'])).status_code, 400)
+
+    def test_update_book_details(self):
+        response = self.client.patch(reverse('update_book_details', args=['0000000000000']), {'title':'New'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_delete_book(self):
+        self.assertEqual(self.client.delete(reverse('delete_book', args=['0000000000000'])).status_code, 400)
+
+
+class LoanHistoryTests(TestCase):
+    def test_year_out_of_range(self):
+        client = client_for(make_user('member'))
+        for year in ['0', '10000', '99999', '2O24', '9' * 5000]:
+            response = client.get(reverse('get_loan_history') + f'?year={year}')
+            self.assertEqual(response.status_code, 400, year)
+
+    def test_year(self):
+        response = client_for(make_user('member')).get(reverse('get_loan_history') + '?year=2024')
+        self.assertEqual(response.status_code, 200)
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        self.member = make_user('member')
+        self.book = make_book(1, total_copies=1, available_copies=0, available='Unavailable')
+        self.hold = ReserveBook.objects.create(book=self.book, user=self.member, status='Ready', expires_at=timezone.now())
+
+    def test_cancelling_a_ready_hold_puts_the_copy_back(self):
+        response = client_for(self.member).delete(reverse('remove_reservation', args=[self.hold.pk]))
+
+        self.assertEqual(response.status_code, 204)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 1)
+
+    def test_cancelling_a_hold_collected_meanwhile_frees_no_copy(self):
+        load_reservation = views.get_reservation
+
+        def load_then_collect(id:str):
+            reservation = load_reservation(id=id)
+            ReserveBook.objects.filter(pk=id).update(status='Fulfilled')
+            return reservation
+
+        with mock.patch.object(views, 'get_reservation', load_then_collect):
+            response = client_for(self.member).delete(reverse('remove_reservation', args=[self.hold.pk]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ReserveBook.objects.exists())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+
+    def test_reserving_many_when_one_was_reserved_meanwhile(self):
+        # a concurrent request reserved one of them after the check
+        with mock.patch.object(ReserveBook.objects, 'bulk_create', side_effect=IntegrityError):
+            response = client_for(make_user('other')).post(
+                reverse('reserve_books'), {'isbns':[self.book.isbn]}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+    def test_unknown_reservation(self):
+        response = client_for(self.member).delete(reverse('remove_reservation', args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, 400)
+
+
+class FilterBooksTests(TestCase):
+    def test_publisher_with_a_comma(self):
+        make_book(1, publisher='Little, Brown and Company')
+        make_book(2, publisher='Brown')
+        response = client_for(make_user('member')).get(reverse('filter_books') + '?publisher=Little, Brown and Company')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['isbn'] for book in response.json()['book(s)']], [f'{1:013d}'])
+
+
+@mock.patch.object(covers, 'render_variants', return_value={'thumb':{'jpg':'covers/book_thumb.jpg'}})
+class CoverJobTests(TestCase):
+    def setUp(self):
+        self.book = make_book(1, cover_image='covers/book.jpg')
+        covers.enqueue_cover(self.book)
+
+    def test_process(self, render_variants):
+        self.assertEqual(covers.process(covers.claim_jobs(10), workers=1), {'done':1, 'retried':0, 'failed':0})
+        self.assertEqual(CoverJob.objects.get().status, 'Done')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.cover_variants, render_variants.return_value)
+
+    def test_stale_lease_leaves_the_job_alone(self, render_variants):
+        jobs = covers.claim_jobs(10)
+        # the lease ran out and another worker claimed the job
+        token = uuid.uuid4()
+        CoverJob.objects.update(lease_token=token)
+
+        self.assertEqual(covers.process(jobs, workers=1), {'done':0, 'retried':0, 'failed':0})
+        job = CoverJob.objects.get()
+        self.assertEqual((job.status, job.lease_token), ('Processing', token))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.cover_variants, {})
+
+    def test_stale_lease_after_a_failure(self, render_variants):
+        render_variants.side_effect = OSError('unreadable')
+        jobs = covers.claim_jobs(10)
+        CoverJob.objects.update(lease_token=uuid.uuid4())
+
+        self.assertEqual(covers.process(jobs, workers=1), {'done':0, 'retried':0, 'failed':0})
+        job = CoverJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('Processing', 0))
+
+    def test_failed_job_waits_before_its_retry(self, render_variants):
+        render_variants.side_effect = OSError('unreadable')
+        self.assertEqual(covers.drain(batch_size=10, workers=1), {'done':0, 'retried':1, 'failed':0})
+        job = CoverJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('Pending', 1))
+        self.assertGreater(job.next_attempt_at, timezone.now())
+
+        for attempt in range(2, settings.COVERS['MAX_ATTEMPTS'] + 1):
+            CoverJob.objects.update(next_attempt_at=timezone.now())
+            covers.drain(batch_size=10, workers=1)
+        job = CoverJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('Failed', settings.COVERS['MAX_ATTEMPTS']))
+        self.assertEqual(covers.claim_jobs(10), [])
+
+    @mock.patch.object(covers.default_storage, 'delete')
+    def test_previous_variants_are_deleted_after_commit(self, delete, render_variants):
+        old = {'thumb':{'jpg':'covers/book_thumb_old.jpg', 'webp':'covers/book_thumb.jpg'}}
+        Book.objects.filter(pk=self.book.pk).update(cover_variants=old)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            covers.process(covers.claim_jobs(10), workers=1)
+            delete.assert_not_called()
+        for callback in callbacks:
+            callback()
+        # a path the new variants reuse is kept
+        delete.assert_called_once_with('covers/book_thumb_old.jpg')
+
+    @mock.patch.object(covers.default_storage, 'delete')
+    def test_variants_of_a_replaced_cover_are_deleted(self, delete, render_variants):
+        Book.objects.filter(pk=self.book.pk).update(cover_image='covers/other.jpg')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(covers.process(covers.claim_jobs(10), workers=1)['done'], 1)
+        delete.assert_called_once_with('covers/book_thumb.jpg')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.cover_variants, {})
+
+
+@mock.patch.object(ReadConnectionRouter, 'replicas', return_value=['replica_1'])
+class ReplicaCacheFillTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_no_fill_while_a_replica_may_lag(self, replicas):
+        version = book_cache.book_version('0000000000001')
+        book_cache.set_book_detail('0000000000001', version, {'title':'Old'})
+        self.assertIsNone(book_cache.get_book_detail('0000000000001', version))
+
+    def test_fill_once_the_lag_has_passed(self, replicas):
+        version = book_cache.book_version('0000000000001') - settings.REPLICA_LAG_SECONDS * 1000
+        book_cache.set_book_detail('0000000000001', version, {'title':'New'})
+        self.assertEqual(book_cache.get_book_detail('0000000000001', version), {'title':'New'})
+
+    def test_fill_without_replicas(self, replicas):
+        replicas.return_value = []
+        version = book_cache.catalogue_version()
+        book_cache.set_catalogue_page(version, None, 20, ['isbn'], {'books':[]})
+        self.assertEqual(book_cache.get_catalogue_page(version, None, 20, ['isbn']), {'books':[]})
+
+
+class CatalogueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = make_user('member')
+        cls.books = [make_book(i) for i in range(7)]
+        # ties on created_at are broken by id
+        Book.objects.filter(pk__in=[book.pk for book in cls.books[2:5]]).update(created_at=cls.books[2].created_at)
+
+    def setUp(self):
+        cache.clear()
+        self.client = client_for(self.member)
+
+    def expected_isbns(self) -> list:
+        return list(Book.objects.order_by('-created_at', '-id').values_list('isbn', flat=True))
+
+    def test_cursor_round_trip(self):
+        isbns, query = [], '?page_size=2&fields=isbn'
+        while True:
+            response = self.client.get(reverse('get_all_books') + query)
+            self.assertEqual(response.status_code, 200, response.content)
+            page = response.json()
+            self.assertLessEqual(len(page['books']), 2)
+            isbns += [row['isbn'] for row in page['books']]
+            if not page['next_cursor']:
+                break
+            query = f"?page_size=2&fields=isbn&cursor={page['next_cursor']}"
+        self.assertEqual(isbns, self.expected_isbns())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('get_all_books') + '?cursor=bm9wZQ')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ndjson_stream(self):
+        response = self.client.get(reverse('get_all_books') + '?stream=1&fields=isbn,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['isbn'] for row in rows], self.expected_isbns())
+        self.assertEqual(set(rows[0]), {'isbn', 'title'})
+
+
+async def read_stream(response) -> bytes:
+    return b''.join([chunk async for chunk in response.streaming_content])
+
+
+class AsyncParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = make_user('member')
+        cls.books = [make_book(i, publisher=['Penguin', 'Éditions Gallimard'][i % 2]) for i in range(5)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = client_for(self.member)
+
+    def assertSameResponse(self, url_name:str, query:str='', args:list=None, client=None):
+        client = client or self.client
+        sync = client.get(reverse(url_name, args=args) + query)
+        cache.clear()
+        response = client.get(reverse(f'async_{url_name}', args=args) + query)
+        cache.clear()
+        self.assertEqual(response.status_code, sync.status_code)
+        if sync.streaming:
+            self.assertEqual(async_to_sync(read_stream)(response), b''.join(sync.streaming_content))
+        else:
+            self.assertEqual(response.json(), sync.json())
+
+    def test_get_all_books(self):
+        for query in ('', '?page_size=2&fields=isbn,title', '?cursor=nope', '?fields=nope', '?stream=1&fields=isbn'):
+            with self.subTest(query):
+                self.assertSameResponse('get_all_books', query)
+
+    def test_filter_books(self):
+        for query in ('?genre=fantasy', '?publisher=éditions gallimard&fields=isbn', '', '?genre=fantasy&cursor=nope'):
+            with self.subTest(query):
+                self.assertSameResponse('filter_books', query)
+
+    def test_search_books(self):
+        for query in ('?query=book', '?query=book&page=2&page_size=2&fields=isbn', ''):
+            with self.subTest(query):
+                self.assertSameResponse('search_books', query)
+
+    def test_get_particular_book(self):
+        self.assertSameResponse('get_particular_book', args=[self.books[0].isbn])
+        self.assertSameResponse('get_particular_book', args=['9999999999999'])
+
+    def test_unauthenticated(self):
+        self.assertSameResponse('get_all_books', client=APIClient())
+
+
+class CatalogueETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = make_user('member')
+        cls.books = [make_book(i) for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = client_for(self.member)
+
+    def get(self, url_name:str, query:str='', etag:str=None):
+        headers = {'HTTP_IF_NONE_MATCH':etag} if etag else {}
+        return self.client.get(reverse(url_name) + query, **headers)
+
+    def test_etag_is_per_page_and_projection(self):
+        for url_name in ('get_all_books', 'async_get_all_books'):
+            with self.subTest(url_name):
+                first = self.get(url_name, '?page_size=2')
+                etag = first['ETag']
+                self.assertEqual(self.get(url_name, '?page_size=2', etag).status_code, 304)
+
+                self.assertEqual(self.get(url_name, '?page_size=1', etag).status_code, 200)
+                self.assertEqual(self.get(url_name, '?page_size=2&fields=isbn', etag).status_code, 200)
+                cursor = first.json()['next_cursor']
+                self.assertEqual(self.get(url_name, f'?page_size=2&cursor={cursor}', etag).status_code, 200)
+
+    def test_invalid_cursor_is_checked_before_the_etag(self):
+        for url_name in ('get_all_books', 'async_get_all_books'):
+            with self.subTest(url_name):
+                etag = self.get(url_name)['ETag']
+                self.assertEqual(self.get(url_name, '?cursor=nope', etag).status_code, 400)
+
+    def test_saving_a_book_changes_the_etag(self):
+        for url_name in ('get_all_books', 'async_get_all_books'):
+            with self.subTest(url_name):
+                etag = self.get(url_name)['ETag']
+                book = self.books[0]
+                book.title = f'{book.title} ({url_name})'
+                with self.captureOnCommitCallbacks(execute=True):
+                    book.save()
+
+                response = self.get(url_name, etag=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                self.assertIn(book.title, [row['title'] for row in response.json()['books']])
+
+
+@override_settings(NOTIFICATION_TEMPLATES=TEMPLATES)
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.member = make_user('member')
+
+    def queued(self) -> list:
+        return list(OutboundEmail.objects.values_list('email', 'template'))
+
+    def test_hold_ready(self):
+        book = make_book(1, total_copies=1, available_copies=0, available='Unavailable')
+        CheckoutBook.objects.create(book=book, user=self.member)
+        ReserveBook.objects.create(book=book, user=make_user('waiting'))
+
+        response = client_for(self.member).post(reverse('return_book', args=[book.isbn]))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.queued(), [('waiting@example.com', 'T-hold_ready')])
+
+    def test_overdue_reminder(self):
+        due = timezone.localdate() - datetime.timedelta(days=1)
+        CheckoutBook.objects.create(book=make_book(1), user=self.member, due_date=due)
+
+        sweep_overdue()
+        self.assertEqual(self.queued(), [('member@example.com', 'T-overdue_reminder')])
+
+    def test_checkout_summary(self):
+        books = [make_book(i) for i in range(2)]
+        response = client_for(self.member).post(reverse('checkout_books'), {'isbns':[book.isbn for book in books]}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.queued(), [('member@example.com', 'T-checkout_summary')])
+
+    def test_reservation_summary(self):
+        books = [make_book(i, total_copies=1, available_copies=0, available='Unavailable') for i in range(2)]
+        response = client_for(self.member).post(reverse('reserve_books'), {'isbns':[book.isbn for book in books]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.queued(), [('member@example.com', 'T-reservation_summary')])
@@ -1,17 +1,30 @@
-from . import views
+from . import async_views, views
 from django.urls import path
 
 urlpatterns = [
     path('', views.get_all_books_view, name='get_all_books'),
     path('add', views.add_books_view, name='add_books'),
+    path('import', views.import_books_view, name='import_books'),
     path('filter', views.filter_books_view, name='filter_books'),
+    path('facets', views.book_facets_view, name='book_facets'),
     path('search', views.search_books_view, name='search_books'),
+    path('authors/<int:id>', views.get_author_books_view, name='get_author_books'),
+    path('genres/<int:id>', views.get_genre_books_view, name='get_genre_books'),
     path('reserves', views.get_all_reserved_books_view, name='get_reserved_books'),
     path('borrowed-books', views.get_books_borrowed_by_user_view, name='get_borrowed_books'),
+    path('checkout', views.checkout_many_books_view, name='checkout_books'),
+    path('reserve', views.reserve_many_books_view, name='reserve_books'),
+    path('history', views.get_loan_history_view, name='get_loan_history'),
+    path('async/', async_views.get_all_books_view, name='async_get_all_books'),
+    path('async/filter', async_views.filter_books_view, name='async_filter_books'),
+    path('async/search', async_views.search_books_view, name='async_search_books'),
+    path('async/<str:isbn>', async_views.get_book_details_view, name='async_get_particular_book'),
     path('<str:isbn>', views.get_book_details_view, name='get_particular_book'),
     path('<str:isbn>/update', views.update_book_details_view, name='update_book_details'),
     path('<str:isbn>/delete', views.delete_book_view, name='delete_book'),
     path('<str:isbn>/checkout', views.checkout_books_view, name='checkout_book'),
     path('<str:isbn>/reserve', views.reserve_book_view, name='reserve_book'),
+    path('<str:isbn>/return', views.return_book_view, name='return_book'),
+    path('<str:isbn>/history', views.get_book_loan_history_view, name='get_book_loan_history'),
     path('reserves/<uuid:id>/delete', views.remove_book_from_reservations_view, name='remove_reservation'),
 ]
\ No newline at end of file
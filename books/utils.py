@@ -1,23 +1,69 @@
-import os
-from dotenv import load_dotenv
-from trycourier import Courier
+from django.conf import settings
+from notifications.utils import enqueue_email, enqueue_emails
 
-load_dotenv()
-
-client = Courier(auth_token=os.getenv('AUTH_TOKEN'))
 
 def send_checkout_book_email(email:str ,username:str, book:str, borrow_date:str, due_date:str):
-    client.send_message(
-        message={
-            "to": {
-            "email": email,
-            },
-            "template": "NT0WK2T7FVMSKDGA0W8YEQXE6GGZ",
-            "data": {
+    enqueue_email(
+        email=email,
+        template="NT0WK2T7FVMSKDGA0W8YEQXE6GGZ",
+        data={
             "username": username,
             "book": book,
             "borrow_date": borrow_date,
             "due_date": due_date,
-            },
         }
     )
+
+
+def send_checkout_summary_email(email:str, username:str, loans:list):
+    # one message for a whole desk checkout instead of one per book
+    enqueue_email(
+        email=email,
+        template=settings.NOTIFICATION_TEMPLATES['checkout_summary'],
+        data={
+            "username": username,
+            "borrow_date": str(loans[0].borrow_date),
+            "books": [{"book": loan.book.title, "due_date": str(loan.due_date)} for loan in loans],
+        }
+    )
+
+
+def send_reservation_summary_email(email:str, username:str, reservations:list):
+    enqueue_email(
+        email=email,
+        template=settings.NOTIFICATION_TEMPLATES['reservation_summary'],
+        data={
+            "username": username,
+            "books": [{"book": reservation.book.title, "position": reservation.position} for reservation in reservations],
+        }
+    )
+
+
+def send_hold_ready_emails(holds:list):
+    enqueue_emails([
+        {
+            "email": hold.user.email,
+            "template": settings.NOTIFICATION_TEMPLATES['hold_ready'],
+            "data": {
+                "username": hold.user.username,
+                "book": hold.book.title,
+                "expires_at": str(hold.expires_at.date()),
+            },
+        }
+        for hold in holds
+    ])
+
+
+def send_overdue_reminder_emails(loans:list):
+    enqueue_emails([
+        {
+            "email": loan.user.email,
+            "template": settings.NOTIFICATION_TEMPLATES['overdue_reminder'],
+            "data": {
+                "username": loan.user.username,
+                "book": loan.book.title,
+                "due_date": str(loan.due_date),
+            },
+        }
+        for loan in loans
+    ])
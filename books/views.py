@@ -1,9 +1,23 @@
-from .models import Book, CheckoutBook, ReserveBook
-from .serializers import BookSerializer, ReservesSerializer, CheckoutSerializer
-from .utils import send_checkout_book_email
+from . import cache, facets
+from .importer import guess_format, import_books, open_upload
+from .holds import hand_off_copies, queue_position
+from .inventory import claim_copies, claim_copy
+from .loans import due_date_for
+from .models import ArchivedLoan, Author, Book, CheckoutBook, Genre, ReserveBook
+from .search import book_index
+from .serializers import BookSerializer, ReservesSerializer, CheckoutSerializer, book_rows, stream_books_ndjson
+from .utils import send_checkout_book_email, send_checkout_summary_email, send_reservation_summary_email
 from accounts.permissions import IsVerified
-from django.db.models import Q
+from core.filters import filter_iexact_in, get_list_param
+from core.pagination import InvalidCursor, get_page_size, keyset_paginate, merge_keyset_paginate, parse_cursor
+from core.projections import InvalidFields, get_fields_param
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
@@ -36,6 +50,118 @@ def get_reservation(id:str):
     return reservation
 
 
+def get_isbns(request):
+    # the de-duplicated "isbns" list of a bulk request
+    if hasattr(request.data, 'getlist'):
+        isbns = request.data.getlist('isbns')
+    else:
+        isbns = request.data.get('isbns')
+
+    if not isinstance(isbns, list) or not isbns or not all(isinstance(isbn, str) for isbn in isbns):
+        return Response(
+            {
+                'success':False,
+                'message':'Provide a list of ISBNs!'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    isbns = list(dict.fromkeys(isbns))
+    limit = settings.CIRCULATION['BATCH_LIMIT']
+    if len(isbns) > limit:
+        return Response(
+            {
+                'success':False,
+                'message':f'At most {limit} books can be requested at once!'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+    return isbns
+
+
+def linked_books(request, books, key:str, name:dict):
+    # a page of the books joined to one author or genre, newest first
+    try:
+        fields = get_fields_param(request, BookSerializer.Meta.fields)
+    except InvalidFields as e:
+        return Response(
+            {
+                'success':False,
+                'message':str(e)
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        books, next_cursor = keyset_paginate(
+            books.values(*fields, 'created_at', 'id'),
+            cursor=request.query_params.get('cursor'),
+            page_size=get_page_size(request),
+            field='created_at'
+        )
+    except InvalidCursor:
+        return Response(
+            {
+                'success':False,
+                'message':'Invalid cursor!'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(
+        {
+            'success':True,
+            key:name,
+            'book(s)':book_rows(books, fields),
+            'next_cursor':next_cursor
+        }, status=status.HTTP_200_OK
+    )
+
+
+HISTORY_FIELDS = ['checkout_id', 'borrow_date', 'due_date', 'returned_at', 'is_overdue', 'created_at']
+
+
+def loan_history(request, filters:dict, fields:list, columns:dict):
+    # a page of returned loans, newest first, from both the loans not yet
+    # archived and the archive
+    recent = CheckoutBook.objects.filter(returned_at__isnull=False, **filters)
+    archived = ArchivedLoan.objects.filter(**filters)
+
+    year = request.query_params.get('year')
+    if year is not None:
+        # a year a date can hold, which also fits the archive's smallint
+        year = int(year) if year.isdecimal() and len(year) <= 4 else 0
+        if not 1 <= year <= 9999:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Invalid year!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+        recent = recent.filter(borrow_date__year=year)
+        archived = archived.filter(year=year)
+
+    try:
+        loans, next_cursor = merge_keyset_paginate(
+            [loans.values(*HISTORY_FIELDS, *fields, **columns) for loans in (recent, archived)],
+            cursor=request.query_params.get('cursor'),
+            page_size=get_page_size(request),
+            field='created_at',
+            tiebreak='checkout_id'
+        )
+    except InvalidCursor:
+        return Response(
+            {
+                'success':False,
+                'message':'Invalid cursor!'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(
+        {
+            'success':True,
+            'loans':loans,
+            'next_cursor':next_cursor
+        }, status=status.HTTP_200_OK
+    )
+
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def add_books_view(request):
@@ -60,19 +186,71 @@ def add_books_view(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def import_books_view(request):
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+
+        if not upload:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Upload a CSV or JSON-lines file as "file"!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        format = request.data.get('format') or guess_format(upload.name)
+
+        if format not in ('csv', 'jsonl'):
+            return Response(
+                {
+                    'success':False,
+                    'message':'Format must be "csv" or "jsonl"!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = import_books(open_upload(upload), format=format)
+
+        return Response(
+            {
+                'success':True,
+                'message':'Import finished!',
+                'report':report
+            }, status=status.HTTP_200_OK
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsVerified])
 def get_book_details_view(request, isbn:str):
     if request.method == 'GET':
-        book = get_book(isbn=isbn)
+        version = cache.book_version(isbn)
+        etag = cache.etag('book', isbn, version)
+        last_modified = cache.last_modified(version)
 
-        serializer = BookSerializer(book)
+        # answered from the version number alone, without touching the row
+        not_modified = get_conditional_response(request, etag=etag, last_modified=version // 1000)
+        if not_modified is not None:
+            return not_modified
 
-        return Response(
-            {
+        data = cache.get_book_detail(isbn, version)
+
+        if data is None:
+            book = get_book(isbn=isbn)
+
+            if isinstance(book, Response):
+                return book
+
+            serializer = BookSerializer(book)
+            data = {
                 'success':True,
                 'book':serializer.data
-            }, status=status.HTTP_200_OK
+            }
+            cache.set_book_detail(isbn, version, data)
+
+        return Response(
+            data, status=status.HTTP_200_OK, headers={'ETag':etag, 'Last-Modified':last_modified}
         )
 
 
@@ -82,13 +260,61 @@ def get_all_books_view(request):
     if request.method == 'GET':
         books = Book.objects.all()
 
-        serializer = BookSerializer(books, many=True)
+        try:
+            fields = get_fields_param(request, BookSerializer.Meta.fields)
+        except InvalidFields as e:
+            return Response(
+                {
+                    'success':False,
+                    'message':str(e)
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response(
-            {
+        if request.query_params.get('stream') == '1':
+            return StreamingHttpResponse(
+                stream_books_ndjson(books, fields=fields), content_type='application/x-ndjson'
+            )
+
+        cursor = request.query_params.get('cursor')
+        page_size = get_page_size(request)
+
+        if cursor:
+            try:
+                parse_cursor(Book, cursor, field='created_at')
+            except InvalidCursor:
+                return Response(
+                    {
+                        'success':False,
+                        'message':'Invalid cursor!'
+                    }, status=status.HTTP_400_BAD_REQUEST
+                )
+
+        version = cache.catalogue_version()
+        etag = cache.catalogue_etag(version, cursor, page_size, fields)
+        last_modified = cache.last_modified(version)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=version // 1000)
+        if not_modified is not None:
+            return not_modified
+
+        data = cache.get_catalogue_page(version, cursor, page_size, fields)
+
+        if data is None:
+            books, next_cursor = keyset_paginate(
+                books.values(*fields, 'created_at', 'id'),
+                cursor=cursor,
+                page_size=page_size,
+                field='created_at'
+            )
+            data = {
                 'success':True,
-                'books':serializer.data
-            }, status=status.HTTP_200_OK
+                'books':book_rows(books, fields),
+                'next_cursor':next_cursor
+            }
+            cache.set_catalogue_page(version, cursor, page_size, fields, data)
+
+        return Response(
+            data, status=status.HTTP_200_OK, headers={'ETag':etag, 'Last-Modified':last_modified}
         )
 
 
@@ -98,6 +324,9 @@ def update_book_details_view(request, isbn:str):
     if request.method == 'PUT' or request.method == 'PATCH':
         book = get_book(isbn=isbn)
 
+        if isinstance(book, Response):
+            return book
+
         serializer = BookSerializer(book, data=request.data, partial=True)
 
         if serializer.is_valid():
@@ -124,6 +353,9 @@ def delete_book_view(request, isbn:str):
     if request.method == 'DELETE':
         book = get_book(isbn=isbn)
 
+        if isinstance(book, Response):
+            return book
+
         book.delete()
 
         return Response(
@@ -139,33 +371,114 @@ def delete_book_view(request, isbn:str):
 def filter_books_view(request):
     if request.method == 'GET':
         books = Book.objects.all()
-        genre = request.query_params.get('genre')
-        publisher = request.query_params.get('publisher')
+        genres = get_list_param(request, 'genre')
+        publishers = get_list_param(request, 'publisher')
 
-        if not genre and not publisher:
+        if not genres and not publishers:
             return Response(
                 {
                     'success':False,
                     'message':'Please provide a filter query!'
                 }, status=status.HTTP_400_BAD_REQUEST
             )
-        
-        if genre:
-            books = books.filter(genre__iexact=genre)
-        if publisher:
-            books = books.filter(publisher__iexact=publisher)
 
-        serializer = BookSerializer(books, many=True)
+        try:
+            fields = get_fields_param(request, BookSerializer.Meta.fields)
+        except InvalidFields as e:
+            return Response(
+                {
+                    'success':False,
+                    'message':str(e)
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if genres:
+            books = filter_iexact_in(books, 'genre', genres)
+        if publishers:
+            books = filter_iexact_in(books, 'publisher', publishers)
+
+        try:
+            books, next_cursor = keyset_paginate(
+                books.values(*fields, 'created_at', 'id'),
+                cursor=request.query_params.get('cursor'),
+                page_size=get_page_size(request),
+                field='created_at'
+            )
+        except InvalidCursor:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Invalid cursor!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
             {
                 'success':True,
                 'message':'Filter results!',
-                'book(s)':serializer.data
+                'book(s)':book_rows(books, fields),
+                'next_cursor':next_cursor
             }, status=status.HTTP_200_OK
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsVerified])
+def book_facets_view(request):
+    if request.method == 'GET':
+        genres = get_list_param(request, 'genre')
+        publishers = get_list_param(request, 'publisher')
+        books = None
+
+        if genres or publishers:
+            books = Book.objects.all()
+            if genres:
+                books = filter_iexact_in(books, 'genre', genres)
+            if publishers:
+                books = filter_iexact_in(books, 'publisher', publishers)
+
+        return Response(
+            {
+                'success':True,
+                'facets':facets.counts(books)
+            }, status=status.HTTP_200_OK
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsVerified])
+def get_author_books_view(request, id:int):
+    if request.method == 'GET':
+        author = Author.objects.filter(pk=id).values('id', 'name').first()
+
+        if author is None:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Author does not exist!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return linked_books(request, Book.objects.filter(author_links__author_id=id), 'author', author)
+
+
+@api_view(['GET'])
+@permission_classes([IsVerified])
+def get_genre_books_view(request, id:int):
+    if request.method == 'GET':
+        genre = Genre.objects.filter(pk=id).values('id', 'name').first()
+
+        if genre is None:
+            return Response(
+                {
+                    'success':False,
+                    'message':'Genre does not exist!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return linked_books(request, Book.objects.filter(genre_links__genre_id=id), 'genre', genre)
+
+
 @api_view(['GET'])
 @permission_classes([IsVerified])
 def search_books_view(request):
@@ -180,19 +493,31 @@ def search_books_view(request):
                 }, status=status.HTTP_400_BAD_REQUEST
             )
 
-        books = Book.objects.filter(
-            Q(title__icontains=query) |
-            Q(authors__icontains=query) |
-            Q(genre__icontains=query)
-        )
+        try:
+            fields = get_fields_param(request, BookSerializer.Meta.fields)
+        except InvalidFields as e:
+            return Response(
+                {
+                    'success':False,
+                    'message':str(e)
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+        except ValueError:
+            page = 1
+        page_size = get_page_size(request)
 
-        serializer = BookSerializer(books, many=True)
+        books = book_index.search_rows(query, fields, limit=page_size + 1, offset=(page - 1) * page_size)
+        next_page = page + 1 if len(books) > page_size else None
 
         return Response(
             {
                 'success':True,
                 'message':'Here are you search results',
-                'book(s)':serializer.data
+                'book(s)':book_rows(books[:page_size], fields),
+                'next_page':next_page
             }, status=status.HTTP_200_OK
         )
 
@@ -204,7 +529,10 @@ def checkout_books_view(request, isbn:str): # borrow a book
         book = get_book(isbn=isbn)
         user = request.user
 
-        if CheckoutBook.objects.filter(user=user, book=book).exists():
+        if isinstance(book, Response):
+            return book
+
+        if CheckoutBook.objects.filter(user=user, book=book, returned_at__isnull=True).exists():
             return Response(
                 {
                     'success':False,
@@ -212,11 +540,32 @@ def checkout_books_view(request, isbn:str): # borrow a book
                 }, status=status.HTTP_400_BAD_REQUEST
             )
 
-        checkout = CheckoutBook.objects.create(
-            book=book,
-            user=user
-        )
-        send_checkout_book_email(email=user.email, username=user.username, book=book.title, borrow_date=str(checkout.borrow_date.date()), due_date=str(checkout.due_date.date()))
+        try:
+            with transaction.atomic():
+                # a copy already held for this user was claimed when the hold became ready
+                collected_hold = ReserveBook.objects.filter(user=user, book=book, status='Ready').update(status='Fulfilled')
+
+                if not collected_hold and not claim_copy(book):
+                    return Response(
+                        {
+                            'success':False,
+                            'message':'There are no copies of this book available!'
+                        }, status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                checkout = CheckoutBook.objects.create(
+                    book=book,
+                    user=user,
+                    due_date=due_date_for(user)
+                )
+                send_checkout_book_email(email=user.email, username=user.username, book=book.title, borrow_date=str(checkout.borrow_date), due_date=str(checkout.due_date))
+        except IntegrityError: # a concurrent request by the same user got there first
+            return Response(
+                {
+                    'success':False,
+                    'message':'You have already borrowed this book!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
             {
@@ -226,13 +575,86 @@ def checkout_books_view(request, isbn:str): # borrow a book
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsVerified])
+def checkout_many_books_view(request): # borrow several books at the desk
+    if request.method == 'POST':
+        isbns = get_isbns(request)
+        if isinstance(isbns, Response):
+            return isbns
+
+        user = request.user
+        books = {book.isbn:book for book in Book.objects.filter(isbn__in=isbns).only('id', 'isbn', 'title')}
+        borrowed = set(
+            CheckoutBook.objects.filter(user=user, book__in=books.values(), returned_at__isnull=True).values_list('book_id', flat=True)
+        )
+        wanted = [book for book in books.values() if book.pk not in borrowed]
+
+        try:
+            with transaction.atomic():
+                # copies already held for this user were claimed when their holds became ready
+                held = set(
+                    ReserveBook.objects.select_for_update()
+                    .filter(user=user, book__in=wanted, status='Ready')
+                    .values_list('book_id', flat=True)
+                )
+                ReserveBook.objects.filter(user=user, book_id__in=held, status='Ready').update(status='Fulfilled')
+                claimed = {book.pk for book in claim_copies([book for book in wanted if book.pk not in held])}
+
+                due_date = due_date_for(user)
+                loans = CheckoutBook.objects.bulk_create([
+                    CheckoutBook(book=books[isbn], user=user, due_date=due_date)
+                    for isbn in isbns if isbn in books and books[isbn].pk in held | claimed
+                ])
+                if loans:
+                    send_checkout_summary_email(email=user.email, username=user.username, loans=loans)
+        except IntegrityError: # a concurrent request by the same user got there first
+            return Response(
+                {
+                    'success':False,
+                    'message':'You have already borrowed one of these books!'
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lent = {loan.book_id for loan in loans}
+        failed = []
+        for isbn in isbns:
+            if isbn not in books:
+                failed.append({'isbn':isbn, 'message':'Book does not exist!'})
+            elif books[isbn].pk in borrowed:
+                failed.append({'isbn':isbn, 'message':'You have already borrowed this book!'})
+            elif books[isbn].pk not in lent:
+                failed.append({'isbn':isbn, 'message':'There are no copies of this book available!'})
+
+        if not loans:
+            return Response(
+                {
+                    'success':False,
+                    'message':'None of these books could be checked out!',
+                    'failed':failed
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                'success':True,
+                'message':f'{len(loans)} book(s) have been successfully checked out. Pick them up at the reception on your way out.',
+                'checked_out':[
+                    {'isbn':loan.book.isbn, 'title':loan.book.title, 'due_date':loan.due_date} for loan in loans
+                ],
+                'failed':failed
+            }, status=status.HTTP_201_CREATED
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsVerified])
 def get_books_borrowed_by_user_view(request):
     if request.method == 'GET':
         user = request.user
+        books = list(CheckoutSerializer.setup_eager_loading(CheckoutBook.objects.filter(user=user, returned_at__isnull=True)))
 
-        if CheckoutBook.objects.filter(user=user).count() == 0:
+        if not books:
             return Response(
                 {
                     'success':True,
@@ -240,7 +662,6 @@ def get_books_borrowed_by_user_view(request):
                 }, status=status.HTTP_200_OK
             )
 
-        books = CheckoutBook.objects.filter(user=user)
         serializer = CheckoutSerializer(books, many=True)
 
         return Response(
@@ -251,6 +672,36 @@ def get_books_borrowed_by_user_view(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsVerified])
+def get_loan_history_view(request):
+    if request.method == 'GET':
+        user = request.user
+        user_id = request.query_params.get('user', user.id)
+
+        if user_id != user.id and not user.is_staff:
+            return Response(
+                {
+                    'success':False,
+                    'message':'You do not have the permission to perform this action!'
+                }, status=status.HTTP_403_FORBIDDEN
+            )
+
+        return loan_history(request, {'user_id':user_id}, [], {'isbn':F('book__isbn'), 'title':F('book__title')})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_book_loan_history_view(request, isbn:str):
+    if request.method == 'GET':
+        book = get_book(isbn=isbn)
+
+        if isinstance(book, Response):
+            return book
+
+        return loan_history(request, {'book':book}, ['user_id'], {'username':F('user__username')})
+
+
 @api_view(['POST'])
 @permission_classes([IsVerified])
 def reserve_book_view(request, isbn:str):
@@ -258,6 +709,9 @@ def reserve_book_view(request, isbn:str):
         user = request.user
         book = get_book(isbn=isbn)
 
+        if isinstance(book, Response):
+            return book
+
         if book.available != 'Unavailable':
             return Response(
                 {
@@ -266,20 +720,146 @@ def reserve_book_view(request, isbn:str):
                 }, status=status.HTTP_403_FORBIDDEN
             )
 
-        if ReserveBook.objects.filter(user=user, book=book).exists():
+        already_reserved = Response(
+            {
+                'success':True,
+                'message':'This book is already in your reservations!'
+            }, status=status.HTTP_400_BAD_REQUEST
+        )
+
+        if ReserveBook.objects.filter(user=user, book=book, status__in=['Waiting', 'Ready']).exists():
+            return already_reserved
+
+        try:
+            reservation = ReserveBook.objects.create(book=book, user=user)
+        except IntegrityError:
+            return already_reserved
+
+        return Response(
+            {
+                'success':True,
+                'message':'This book has been added to your reservations. Check later to see if it is available',
+                'position':queue_position(reservation)
+            }, status=status.HTTP_200_OK
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsVerified])
+def reserve_many_books_view(request):
+    if request.method == 'POST':
+        isbns = get_isbns(request)
+        if isinstance(isbns, Response):
+            return isbns
+
+        user = request.user
+        books = {book.isbn:book for book in Book.objects.filter(isbn__in=isbns).only('id', 'isbn', 'title', 'available')}
+        unavailable = [book for book in books.values() if book.available == 'Unavailable']
+        reserved = set(
+            ReserveBook.objects.filter(user=user, book__in=unavailable, status__in=['Waiting', 'Ready']).values_list('book_id', flat=True)
+        )
+
+        try:
+            with transaction.atomic():
+                reservations = ReserveBook.objects.bulk_create([
+                    ReserveBook(book=books[isbn], user=user)
+                    for isbn in isbns
+                    if isbn in books and books[isbn].available == 'Unavailable' and books[isbn].pk not in reserved
+                ])
+                if reservations:
+                    # everyone waiting on these books up to the newest of these reservations
+                    positions = dict(
+                        ReserveBook.objects.filter(
+                            book__in=[reservation.book for reservation in reservations],
+                            status='Waiting',
+                            created_at__lte=max(reservation.created_at for reservation in reservations)
+                        ).values('book_id').annotate(count=Count('pk')).values_list('book_id', 'count')
+                    )
+                    for reservation in reservations:
+                        reservation.position = positions[reservation.book_id]
+                    send_reservation_summary_email(email=user.email, username=user.username, reservations=reservations)
+        except IntegrityError:
             return Response(
                 {
-                    'success':True,
-                    'message':'This book is already in your reservations!'
+                    'success':False,
+                    'message':'One of these books is already in your reservations!'
                 }, status=status.HTTP_400_BAD_REQUEST
             )
 
-        reservation = ReserveBook.objects.create(book=book, user=user)
+        added = {reservation.book_id for reservation in reservations}
+        failed = []
+        for isbn in isbns:
+            if isbn not in books:
+                failed.append({'isbn':isbn, 'message':'Book does not exist!'})
+            elif books[isbn].available != 'Unavailable':
+                failed.append({'isbn':isbn, 'message':'This book is available'})
+            elif books[isbn].pk not in added:
+                failed.append({'isbn':isbn, 'message':'This book is already in your reservations!'})
+
+        if not reservations:
+            return Response(
+                {
+                    'success':False,
+                    'message':'None of these books could be reserved!',
+                    'failed':failed
+                }, status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
             {
                 'success':True,
-                'message':'This book has been added to your reservations. Check later to see if it is available'
+                'message':f'{len(reservations)} book(s) have been added to your reservations. Check later to see if they are available',
+                'reserved':[
+                    {'isbn':reservation.book.isbn, 'title':reservation.book.title, 'position':reservation.position}
+                    for reservation in reservations
+                ],
+                'failed':failed
+            }, status=status.HTTP_200_OK
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsVerified])
+def return_book_view(request, isbn:str): # check a book back in
+    if request.method == 'POST':
+        book = get_book(isbn=isbn)
+        user = request.user
+
+        if isinstance(book, Response):
+            return book
+        borrower_id = request.data.get('user', user.id)
+
+        if borrower_id != user.id and not user.is_staff:
+            return Response(
+                {
+                    'success':False,
+                    'message':'You do not have the permission to perform this action!'
+                }, status=status.HTTP_403_FORBIDDEN
+            )
+
+        with transaction.atomic():
+            returned = CheckoutBook.objects.filter(
+                book=book, user_id=borrower_id, returned_at__isnull=True
+            ).update(returned_at=timezone.now())
+
+            if not returned:
+                return Response(
+                    {
+                        'success':False,
+                        'message':'This book is not checked out!'
+                    }, status=status.HTTP_400_BAD_REQUEST
+                )
+
+            holds = hand_off_copies(book)
+
+        message = 'The book has been returned!'
+        if holds:
+            message = 'The book has been returned and is being held for the next reservation!'
+
+        return Response(
+            {
+                'success':True,
+                'message':message
             }, status=status.HTTP_200_OK
         )
 
@@ -289,16 +869,16 @@ def reserve_book_view(request, isbn:str):
 def get_all_reserved_books_view(request):
     if request.method == 'GET':
         user = request.user
+        reverses = list(ReservesSerializer.setup_eager_loading(ReserveBook.objects.filter(user=user)))
 
-        if ReserveBook.objects.filter(user=user).count() == 0:
+        if not reverses:
             return Response(
                 {
                     'success':True,
                     'message':'You have no books in your reservations!'
                 }, status=status.HTTP_200_OK
             )
-        
-        reverses = ReserveBook.objects.filter(user=user)
+
         serializer = ReservesSerializer(reverses, many=True)
 
         return Response(
@@ -316,7 +896,10 @@ def remove_book_from_reservations_view(request, id:str):
         user = request.user
         reservation = get_reservation(id=id)
 
-        if user != reservation.user and user.is_staff != True:
+        if isinstance(reservation, Response):
+            return reservation
+
+        if user.pk != reservation.user_id and user.is_staff != True:
             return Response(
                 {
                     'success':False,
@@ -324,7 +907,15 @@ def remove_book_from_reservations_view(request, id:str):
                 }, status=status.HTTP_403_FORBIDDEN
             )
         
-        reservation.delete()
+        with transaction.atomic():
+            # the status loaded above may be stale; only a hold that is still
+            # Ready as it is deleted has a copy to pass on
+            held, _ = ReserveBook.objects.filter(pk=reservation.pk, status='Ready').delete()
+
+            if held:
+                hand_off_copies(reservation.book)
+            else:
+                ReserveBook.objects.filter(pk=reservation.pk).delete()
 
         return Response(
             {
@@ -0,0 +1,69 @@
+from .renderers import dumps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from functools import wraps
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+# DRF's @api_view only runs sync views. async_api_view gives an async view
+# the same method, authentication, permission and throttle checks and the
+# same error bodies; the view answers with json_response.
+
+def json_response(data, status:int=200, headers:dict=None) -> HttpResponse:
+    return HttpResponse(dumps(data), status=status, headers=headers, content_type='application/json')
+
+
+def _check_access(request:Request, permission_classes:list):
+    request.user # authenticates, or raises
+    for permission_class in permission_classes:
+        permission = permission_class()
+        if not permission.has_permission(request, None):
+            if not request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, None):
+            waits.append(throttle.wait())
+    if waits:
+        raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+def _error_response(request:Request, exc:exceptions.APIException) -> HttpResponse:
+    # what DRF's exception handler would answer for the same error
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        if request.authenticators:
+            headers['WWW-Authenticate'] = request.authenticators[0].authenticate_header(request)
+        else:
+            exc.status_code = 403
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail':exc.detail}
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def async_api_view(methods:list, permission_classes:list=()):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request = Request(
+                request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+            )
+            if request.method not in methods:
+                return _error_response(request, exceptions.MethodNotAllowed(request.method))
+
+            try:
+                # authenticators may read the cache or the users table
+                await sync_to_async(_check_access)(request, permission_classes)
+            except exceptions.APIException as e:
+                return _error_response(request, e)
+
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
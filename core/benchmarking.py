@@ -0,0 +1,74 @@
+import os, sys, tempfile
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections
+from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+
+@contextmanager
+def isolated_database():
+    # Runs the block against freshly migrated throwaway databases, the way
+    # the test runner does. SQLite gets a temporary file rather than the
+    # shared in-memory database so worker threads contend on real file locks.
+    directory = tempfile.TemporaryDirectory()
+
+    for alias in connections:
+        config = connections[alias].settings_dict
+        if connections[alias].vendor == 'sqlite' and not config['TEST'].get('MIRROR'):
+            config['TEST']['NAME'] = os.path.join(directory.name, f'{alias}.sqlite3')
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+
+    # setup_databases mirrors only this thread's connections; point the
+    # settings at the primary too so worker threads open the same database
+    mirrored = {}
+    for alias in connections:
+        mirror = connections.settings[alias]['TEST'].get('MIRROR')
+        if mirror:
+            mirrored[alias] = connections.settings[alias]
+            connections.settings[alias] = connections[mirror].settings_dict
+
+    try:
+        yield
+    finally:
+        connections.settings.update(mirrored)
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+        directory.cleanup()
+
+
+def without_throttles():
+    # a load test sends each client far more requests than the rate limits allow
+    return override_settings(THROTTLES={**settings.THROTTLES, 'ENABLED':False})
+
+
+def run_in_thread(func):
+    # Django connections are per thread; close them when a worker finishes
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return wrapper
+
+
+def percentile(values:list, fraction:float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def peak_rss_kb():
+    # high-water mark of the whole process, so it only ever goes up
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak # bytes on macOS
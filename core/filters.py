@@ -0,0 +1,21 @@
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+
+def get_list_param(request, name:str, split:bool=False) -> list:
+    # ?genre=a&genre=b gives ['a', 'b']. With split, so does ?genre=a,b: only
+    # for values that never contain a comma, unlike "Little, Brown and Company"
+    values = []
+    for value in request.query_params.getlist(name):
+        parts = value.split(',') if split else [value]
+        values += [part.strip() for part in parts if part.strip()]
+    return values
+
+
+def filter_iexact_in(queryset, field:str, values:list):
+    # LOWER(field) IN (...) is answered from a functional Lower(field) index,
+    # where field__iexact compiles to a LIKE that can't use one. The values
+    # are lowered by the database too: SQLite's LOWER() only folds ASCII, so
+    # str.lower() would never match a non-ASCII name.
+    alias = f'{field}_lower'
+    return queryset.alias(**{alias:Lower(field)}).filter(**{f'{alias}__in':[Lower(Value(value)) for value in values]})
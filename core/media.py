@@ -0,0 +1,39 @@
+import mimetypes
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from pathlib import Path
+
+
+# Serves MEDIA_ROOT in chunks, with headers that let clients and proxies
+# keep each file: uploads get a fresh name, so a name's content never
+# changes. A web server or CDN in front can serve the same paths instead.
+
+@require_safe
+def media_view(request, path:str):
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation: # outside MEDIA_ROOT
+        raise Http404
+
+    if not fullpath.is_file():
+        raise Http404
+
+    stat = fullpath.stat()
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(fullpath)
+        response = FileResponse(fullpath.open('rb'), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    response.headers['Cache-Control'] = f'public, max-age={settings.MEDIA_CACHE_SECONDS}, immutable'
+    return response
@@ -0,0 +1,80 @@
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+# Per-process metrics in the Prometheus text format. Under a multi-worker
+# server each worker keeps its own registry; scrape every worker, or put a
+# single process behind /metrics.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._values = defaultdict(float)
+        self._buckets = {}
+
+    def describe(self, name:str, kind:str, help:str, buckets:tuple=None):
+        self._help[name] = help
+        self._types[name] = kind
+        if buckets:
+            self._buckets[name] = buckets
+
+    def inc(self, name:str, labels:dict, value:float=1):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[(name, key)] += value
+
+    def observe(self, name:str, labels:dict, value:float):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            for bound in self._buckets[name]:
+                self._values[(f'{name}_bucket', key + (('le', str(bound)),))] += value <= bound
+            self._values[(f'{name}_bucket', key + (('le', '+Inf'),))] += 1
+            self._values[(f'{name}_sum', key)] += value
+            self._values[(f'{name}_count', key)] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            values = list(self._values.items())
+
+        lines = []
+        for name in sorted(self._help):
+            lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} {self._types[name]}')
+            for (sample, labels), value in values:
+                if sample == name or (self._types[name] == 'histogram' and sample.rsplit('_', 1)[0] == name):
+                    label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+                    lines.append(f'{sample}{{{label_text}}} {value:g}' if label_text else f'{sample} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+registry.describe('http_requests_total', 'counter', 'Requests served, by route, method and status.')
+registry.describe('http_request_duration_seconds', 'histogram', 'Wall time per request.', buckets=DURATION_BUCKETS)
+registry.describe('http_response_size_bytes_total', 'counter', 'Response body bytes sent, streaming responses excluded.')
+registry.describe('db_queries_total', 'counter', 'Database queries run while handling requests.')
+registry.describe('db_query_duration_seconds_total', 'counter', 'Time spent in database queries.')
+registry.describe('response_serialize_seconds_total', 'counter', 'Time spent rendering response bodies.')
+registry.describe('n_plus_one_detected_total', 'counter', 'Requests that repeated one query shape past the N+1 threshold.')
+
+
+def metrics_view(request):
+    token = settings.INSTRUMENTATION['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,184 @@
+import logging, re, time
+from .metrics import registry
+from .routers import RoutingState, current_routing
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from collections import Counter
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# collapses literals and IN lists so queries differing only in values match
+NUMBER_RE = re.compile(r'\b\d+\b')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+# transaction control, which repeats in any request with a few atomic blocks
+TRANSACTION_RE = re.compile(r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE)
+
+
+def query_shape(sql:str) -> str:
+    sql = STRING_RE.sub('%s', sql)
+    sql = NUMBER_RE.sub('%s', sql)
+    return IN_LIST_RE.sub('(%s)', sql)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            if not TRANSACTION_RE.match(sql):
+                self.shapes[query_shape(sql)] += 1
+
+
+# The recorder of the request being handled. A context variable rather than
+# a per-connection hook, so that requests sharing a thread (async requests
+# under the test client, say) don't count each other's queries.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def hook_connections():
+    # the hook stays on this thread's connections for later requests
+    for connection in connections.all():
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_query)
+
+
+class InstrumentationMiddleware:
+    # Times each request, its database work and the rendering of its body,
+    # keyed by the resolved URL name, and reports them as a Server-Timing
+    # header and on /metrics. Queries of a streaming body run after this
+    # returns and are not counted.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        request._serialize_time = 0.0
+        start = time.perf_counter()
+
+        hook_connections()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        request._serialize_time = 0.0
+        start = time.perf_counter()
+
+        # the async ORM queries from the request's sync thread, not this one
+        await sync_to_async(hook_connections)()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    def report(self, request, response, recorder:QueryRecorder, total:float):
+        route = request.resolver_match.url_name if request.resolver_match else None
+        route = route or 'unmatched'
+
+        if route == 'metrics':
+            return response
+
+        labels = {'route':route}
+        registry.inc('http_requests_total', {**labels, 'method':request.method, 'status':response.status_code})
+        registry.observe('http_request_duration_seconds', labels, total)
+        registry.inc('db_queries_total', labels, recorder.count)
+        registry.inc('db_query_duration_seconds_total', labels, recorder.duration)
+        registry.inc('response_serialize_seconds_total', labels, request._serialize_time)
+        if not response.streaming:
+            registry.inc('http_response_size_bytes_total', labels, len(response.content))
+
+        timings = [
+            f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+            f'serialize;dur={request._serialize_time * 1000:.2f}',
+            f'app;dur={(total - recorder.duration - request._serialize_time) * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ]
+
+        shape, repeats = recorder.shapes.most_common(1)[0] if recorder.shapes else (None, 0)
+        if repeats >= settings.INSTRUMENTATION['N_PLUS_ONE_THRESHOLD']:
+            registry.inc('n_plus_one_detected_total', labels)
+            timings.append(f'nplusone;desc="{repeats} repeats"')
+            logger.warning('Possible N+1 in %s: %s queries of the shape %s', route, repeats, shape)
+
+        if settings.INSTRUMENTATION['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join(timings)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render right after this hook; time until the body is ready
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._serialize_time += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    # Gives each request its own RoutingState, which the authentication
+    # class fills in and core.routers.ReadConnectionRouter consults. A
+    # streaming body is read after this returns, from the primary.
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = current_routing.set(RoutingState())
+        try:
+            return self.get_response(request)
+        finally:
+            current_routing.reset(token)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, but the state object is shared
+        token = current_routing.set(RoutingState())
+        try:
+            return await self.get_response(request)
+        finally:
+            current_routing.reset(token)
@@ -0,0 +1,98 @@
+import base64, binascii, datetime, json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _cursor_value(value):
+    # isoformat() keeps microseconds, which DjangoJSONEncoder would truncate
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values:list) -> str:
+    payload = json.dumps([_cursor_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token:str) -> list:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def get_page_size(request, default:int=DEFAULT_PAGE_SIZE) -> int:
+    try:
+        page_size = int(request.query_params.get('page_size', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def parse_cursor(model, cursor:str, field:str, tiebreak:str='id') -> tuple:
+    value, pk = decode_cursor(cursor)
+    opts = model._meta
+    try:
+        return opts.get_field(field).to_python(value), opts.get_field(tiebreak).to_python(pk)
+    except ValidationError:
+        raise InvalidCursor('Invalid cursor')
+
+
+def _keyset_page(queryset, cursor:str, page_size:int, field:str, tiebreak:str):
+    # The cursor carries the sort key of the last row served, so every page is
+    # a range scan on the (field, tiebreak) index instead of an OFFSET.
+    queryset = queryset.order_by(f'-{field}', f'-{tiebreak}')
+
+    if cursor:
+        value, pk = parse_cursor(queryset.model, cursor, field, tiebreak)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt':value}) |
+            Q(**{field:value, f'{tiebreak}__lt':pk})
+        )
+
+    return queryset[:page_size + 1]
+
+
+def _next_page(rows:list, page_size:int, field:str, tiebreak:str):
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    # rows may be model instances or values() dicts
+    if isinstance(last, dict):
+        return rows, encode_cursor([last[field], last[tiebreak]])
+    return rows, encode_cursor([getattr(last, field), getattr(last, tiebreak)])
+
+
+def keyset_paginate(queryset, cursor:str, page_size:int, field:str, tiebreak:str='id'):
+    rows = list(_keyset_page(queryset, cursor, page_size, field, tiebreak))
+    return _next_page(rows, page_size, field, tiebreak)
+
+
+async def akeyset_paginate(queryset, cursor:str, page_size:int, field:str, tiebreak:str='id'):
+    rows = [row async for row in _keyset_page(queryset, cursor, page_size, field, tiebreak)]
+    return _next_page(rows, page_size, field, tiebreak)
+
+
+def merge_keyset_paginate(querysets:list, cursor:str, page_size:int, field:str, tiebreak:str='id'):
+    # One page across several values() querysets that share a sort key, such
+    # as a table and its archive. Each is read up to a page past the cursor
+    # and the newest rows of all of them make up the page.
+    rows = [row for queryset in querysets for row in _keyset_page(queryset, cursor, page_size, field, tiebreak)]
+    rows.sort(key=lambda row: (row[field], row[tiebreak]), reverse=True)
+    return _next_page(rows, page_size, field, tiebreak)
@@ -0,0 +1,38 @@
+from .filters import get_list_param
+from django.core.files.storage import default_storage
+
+
+# Read-only list endpoints build their rows from QuerySet.values() instead of
+# running a ModelSerializer field by field. Converters cover the fields whose
+# raw column value differs from what the serializer would render.
+
+class InvalidFields(Exception):
+    pass
+
+
+def get_fields_param(request, allowed:list) -> list:
+    requested = get_list_param(request, 'fields', split=True)
+    if not requested:
+        return list(allowed)
+
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise InvalidFields(f'Unknown field(s): {", ".join(unknown)}')
+    return list(dict.fromkeys(requested))
+
+
+def file_url(name:str):
+    return default_storage.url(name) if name else None
+
+
+def project(rows, fields:list, converters:dict=None) -> list:
+    converters = {field:convert for field, convert in (converters or {}).items() if field in fields}
+    projected = []
+
+    for row in rows:
+        item = {field:row[field] for field in fields}
+        for field, convert in converters.items():
+            item[field] = convert(item[field])
+        projected.append(item)
+
+    return projected
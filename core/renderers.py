@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError: # optional; falls back to DRF's stdlib-json rendering
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+
+def dumps(data) -> bytes:
+    if orjson is None:
+        return _encoder.encode(data).encode()
+    # dates and anything orjson doesn't know go through DRF's encoder, so the
+    # bytes match what the stdlib renderer produced
+    return orjson.dumps(
+        data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # the browsable API asks for indented output; leave that to DRF
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return dumps(data)
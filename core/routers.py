@@ -0,0 +1,85 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+class RoutingState:
+    # what the router knows about the request being handled
+    def __init__(self):
+        self.user_id = None
+        self.wrote = False
+        self.pinned = None # looked up on the first replica read
+
+
+# Set per request by core.middleware.ReplicaRoutingMiddleware. Outside a
+# request (commands, the outbox worker) there is none and everything uses
+# the primary, since those read rows they are about to update.
+current_routing = ContextVar('current_routing', default=None)
+
+
+def _pin_key(user_id) -> str:
+    return f'routing:pin:{user_id}'
+
+
+def _same_database(config:dict, other:dict) -> bool:
+    return all(config.get(key) == other.get(key) for key in ('HOST', 'PORT', 'NAME'))
+
+
+def set_routing_user(user_id):
+    state = current_routing.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+class ReadConnectionRouter:
+    # Sends the reads of a request for books and users to one of
+    # settings.DATABASE_REPLICAS. They stay on the primary inside a
+    # transaction there, once the request has written, and for
+    # REPLICA_LAG_SECONDS after its user last wrote, so nobody reads a
+    # replica that hasn't caught up with their own checkout or update.
+
+    replica_apps = {'accounts', 'books'}
+
+    def replicas(self) -> list:
+        # As a test mirror a replica is pointed at the test database, and as
+        # a second connection to it can't see what a test has written inside
+        # its transaction. Django only copies the NAME over, so compare that.
+        primary = connections['default'].settings_dict
+        return [alias for alias in settings.DATABASE_REPLICAS if not _same_database(connections[alias].settings_dict, primary)]
+
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+
+        if state is None or state.wrote or model._meta.app_label not in self.replica_apps:
+            return 'default'
+        if connections['default'].in_atomic_block:
+            return 'default'
+
+        replicas = self.replicas()
+        if not replicas:
+            return 'default'
+
+        if state.pinned is None:
+            state.pinned = state.user_id is not None and cache.get(_pin_key(state.user_id)) is not None
+        if state.pinned:
+            return 'default'
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+
+        if state is not None and not state.wrote:
+            state.wrote = True
+            if state.user_id is not None and settings.DATABASE_REPLICAS:
+                cache.set(_pin_key(state.user_id), True, timeout=settings.REPLICA_LAG_SECONDS)
+
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,144 @@
+import hashlib, re
+from django.db import connections, router, transaction
+from django.db.models import Q
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query:str) -> list:
+    return TOKEN_RE.findall(query or '')
+
+
+def fts_rowid(pk) -> int:
+    # FTS5 only has an index on rowid, so the model key is hashed into one to
+    # keep updates and deletes from scanning the whole index
+    return int.from_bytes(hashlib.blake2b(str(pk).encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+# Inverted index over a few text columns of one model. SQLite keeps a
+# separate FTS5 table that is written from model signals; PostgreSQL uses a
+# GIN index on a weighted tsvector expression over the base table, so it never
+# needs to be written to. The migrations that create them spell out the same
+# columns, weights and tokenizers as the instances in books.search and
+# accounts.search.
+class FullTextIndex:
+    def __init__(self, model_label:str, fields:list, weights:list, table:str, config:str='english', tokenizer:str='porter unicode61'):
+        self.model_label = model_label
+        self.fields = fields
+        self.weights = weights
+        self.table = table
+        self.config = config
+        self.tokenizer = tokenizer
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_label)
+
+    def _tsvector(self):
+        labels = 'ABCD'
+        return ' || '.join(
+            f"setweight(to_tsvector('{self.config}', coalesce({field}, '')), '{labels[min(position, 3)]}')"
+            for position, field in enumerate(self.fields)
+        )
+
+    # writes
+
+    def update(self, instances):
+        instances = list(instances)
+        if not instances:
+            return
+
+        connection = connections[router.db_for_write(self.model)]
+        if connection.vendor != 'sqlite':
+            return
+
+        pk_field = self.model._meta.pk
+        rows = []
+        for instance in instances:
+            pk = pk_field.get_db_prep_value(instance.pk, connection)
+            rows.append([fts_rowid(pk), pk] + [getattr(instance, field) or '' for field in self.fields])
+        placeholders = ', '.join(['%s'] * (len(self.fields) + 2))
+
+        # one transaction, so two saves of the same row can't both delete
+        # before either inserts
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [[row[0]] for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, pk, {', '.join(self.fields)}) VALUES ({placeholders})", rows
+            )
+
+    def remove(self, pks):
+        pks = list(pks)
+        if not pks:
+            return
+
+        connection = connections[router.db_for_write(self.model)]
+        if connection.vendor != 'sqlite':
+            return
+
+        pk_field = self.model._meta.pk
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [[fts_rowid(pk_field.get_db_prep_value(pk, connection))] for pk in pks]
+            )
+
+    # reads
+
+    def search(self, query:str, limit:int, offset:int=0) -> list:
+        # primary keys of the best matches, most relevant first; every token
+        # is matched as a prefix
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        model = self.model
+        alias = router.db_for_read(model)
+        connection = connections[alias]
+
+        if connection.vendor == 'sqlite':
+            weights = ', '.join(str(weight) for weight in [0.0] + list(self.weights))
+            sql = (
+                f"SELECT pk FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {weights}) LIMIT %s OFFSET %s"
+            )
+            params = [' '.join(f'"{token}"*' for token in tokens), limit, offset]
+        elif connection.vendor == 'postgresql':
+            vector = self._tsvector()
+            sql = (
+                f"SELECT {model._meta.pk.column} FROM {model._meta.db_table} "
+                f"WHERE ({vector}) @@ to_tsquery('{self.config}', %s) "
+                f"ORDER BY ts_rank(({vector}), to_tsquery('{self.config}', %s)) DESC LIMIT %s OFFSET %s"
+            )
+            tsquery = ' & '.join(f'{token}:*' for token in tokens)
+            params = [tsquery, tsquery, limit, offset]
+        else:
+            return self._search_fallback(tokens, limit, offset, alias)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [model._meta.pk.to_python(row[0]) for row in cursor.fetchall()]
+
+    def _search_fallback(self, tokens, limit, offset, alias):
+        queryset = self.model._default_manager.using(alias)
+        for token in tokens:
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains':token})
+            queryset = queryset.filter(condition)
+        return list(queryset.values_list('pk', flat=True)[offset:offset + limit])
+
+    def search_objects(self, query:str, limit:int, offset:int=0) -> list:
+        pks = self.search(query, limit=limit, offset=offset)
+        found = self.model._default_manager.using(router.db_for_read(self.model)).in_bulk(pks)
+        return [found[pk] for pk in pks if pk in found]
+
+    def search_rows(self, query:str, fields:list, limit:int, offset:int=0) -> list:
+        # like search_objects, but values() dicts for the read-only list path;
+        # the row's pk is included under "pk"
+        pks = self.search(query, limit=limit, offset=offset)
+        queryset = self.model._default_manager.using(router.db_for_read(self.model)).filter(pk__in=pks)
+        found = {row['pk']:row for row in queryset.values('pk', *fields)}
+        return [found[pk] for pk in pks if pk in found]
@@ -44,12 +44,16 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'accounts',
     'books',
+    'notifications',
+    'benchmarks',
     'rest_framework',
     'rest_framework_simplejwt',
     'drf_yasg',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,12 +87,116 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+if os.getenv('DATABASE_ENGINE', 'sqlite') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DATABASE_NAME', 'library'),
+            'USER': os.getenv('DATABASE_USER', ''),
+            'PASSWORD': os.getenv('DATABASE_PASSWORD', ''),
+            'HOST': os.getenv('DATABASE_HOST', ''),
+            'PORT': os.getenv('DATABASE_PORT', ''),
+            # persistent connections, checked before each request reuses one
+            'CONN_MAX_AGE': int(os.getenv('DATABASE_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+
+    # psycopg's connection pool (Django 5.1+) replaces persistent connections
+    if os.getenv('DATABASE_POOL', 'False') == 'True':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+        }
+
+    # read replicas, e.g. DATABASE_REPLICA_HOSTS=replica-1,replica-2
+    for i, host in enumerate(filter(None, os.getenv('DATABASE_REPLICA_HOSTS', '').split(',')), 1):
+        DATABASES[f'replica_{i}'] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    SQLITE_PATH = os.getenv('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3'))
+    SQLITE_OPTIONS = {
+        'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 5)), # seconds
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+    }
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+            'OPTIONS': SQLITE_OPTIONS,
+            # a file rather than shared-cache memory, so tests that run
+            # requests in threads wait on locks as in production instead of
+            # failing with "database table is locked"
+            'TEST': {'NAME': os.getenv('SQLITE_TEST_PATH', str(BASE_DIR / 'test_db.sqlite3'))},
+        }
+    }
+
+    # Copies of the primary standing in for replicas, refreshed by
+    # "manage.py sync_replicas", e.g. SQLITE_REPLICA_PATHS=/tmp/replica.sqlite3
+    SQLITE_REPLICA_PATHS = [path.strip() for path in os.getenv('SQLITE_REPLICA_PATHS', '').split(',') if path.strip()]
+
+    for i, path in enumerate(SQLITE_REPLICA_PATHS, 1):
+        DATABASES[f'replica_{i}'] = {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': f'file:{path}?mode=ro',
+            'OPTIONS': {**SQLITE_OPTIONS, 'journal_mode': '', 'transaction_mode': ''},
+            'TEST': {'MIRROR': 'default'},
+        }
+
+    # Without them, under WAL a second, read-only connection to the primary
+    # serves reads without queuing behind the write lock. Tests and
+    # benchmarks read the primary instead.
+    if not SQLITE_REPLICA_PATHS and SQLITE_OPTIONS['journal_mode'].upper() == 'WAL' and os.getenv('SQLITE_READ_CONNECTION', 'True') == 'True':
+        DATABASES['read'] = {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': f'file:{SQLITE_PATH}?mode=ro',
+            'OPTIONS': {**SQLITE_OPTIONS, 'transaction_mode': ''},
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['core.routers.ReadConnectionRouter']
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# seconds a user's reads stay on the primary after they write, which should
+# cover the replicas' usual lag
+REPLICA_LAG_SECONDS = int(os.getenv('REPLICA_LAG_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif os.getenv('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+BOOK_CACHE_TIMEOUT = int(os.getenv('BOOK_CACHE_TIMEOUT', 60 * 15))
 
 
 # Password validation
@@ -127,6 +235,13 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded covers and their variants, served by core.media
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
+# media names never change content, so clients and proxies may keep them
+MEDIA_CACHE_SECONDS = int(os.getenv('MEDIA_CACHE_SECONDS', 60 * 60 * 24 * 365))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -136,11 +251,132 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES':[
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+        'accounts.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES':[
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES':[
+        'core.throttling.TokenBucketThrottle',
+    ],
+    # proxies in front of the app, so throttles key anonymous clients by
+    # their own address from X-Forwarded-For
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES')) if os.getenv('NUM_PROXIES') else None,
+}
+
+# Token buckets per user, or per IP address when anonymous, and URL name; see
+# core.throttling. A rate of '10/min' allows bursts of 10 and refills one
+# token every 6 seconds. Routes without a rate use DEFAULT_RATE, if any.
+THROTTLES = {
+    'ENABLED': os.getenv('THROTTLES_ENABLED', 'True') == 'True',
+    # 'local' keeps buckets in each process; 'cache' shares them between
+    # workers through the default cache, which should then be Redis
+    'BACKEND': os.getenv('THROTTLE_BACKEND', 'cache' if os.getenv('REDIS_URL') else 'local'),
+    'LOCAL_MAX_KEYS': 10000,
+    'DEFAULT_RATE': os.getenv('THROTTLE_DEFAULT_RATE') or None,
+    'RATES': {
+        'search_books': '60/min',
+        'async_search_books': '60/min',
+        'search_user': '60/min',
+        'user_login': '10/min',
+        'user_signup': '20/hour',
+        'password_reset': '5/hour',
+        'password_reset_confirm': '10/hour',
+    },
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=3),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+}
+
+OUTBOX = {
+    'TRANSPORT': os.getenv('OUTBOX_TRANSPORT', 'notifications.transports.CourierTransport'),
+    'BATCH_SIZE': 100,
+    'WORKERS': 8,
+    'POLL_INTERVAL': 1.0,
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF_SECONDS': 30,
+    'MAX_BACKOFF_SECONDS': 3600,
+}
+
+# Maximum queries per request, checked by core.testing.assert_query_budget.
+# Authentication queries are not included. Each is the count measured with
+# every notification template set, plus one on the routes that write.
+QUERY_BUDGETS = {
+    'get_all_books': 1,
+    'get_particular_book': 1,
+    'search_books': 2,
+    'filter_books': 1,
+    'get_author_books': 2,
+    'get_genre_books': 2,
+    'book_facets': 1,
+    'checkout_book': 8,
+    'return_book': 6,
+    'reserve_book': 5,
+    # the same for any number of ISBNs up to CIRCULATION['BATCH_LIMIT']
+    'checkout_books': 9,
+    'reserve_books': 6,
+    'get_borrowed_books': 1,
+    'get_reserved_books': 1,
+    # recent returns and the archive
+    'get_loan_history': 2,
+    'get_book_loan_history': 3,
+    # cancelling a Ready hold hands its copy to the next in the queue
+    'remove_reservation': 7,
+    'get_all_users': 1,
+    'search_user': 2,
+    'filter_user': 1,
+}
+
+USER_SEARCH_RESULT_CAP = 50
+
+# seconds a user loaded for authentication stays cached; saves drop it sooner
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Per-route timing, query and size metrics, see core.middleware
+INSTRUMENTATION = {
+    'SERVER_TIMING': os.getenv('SERVER_TIMING', 'True') == 'True',
+    # when set, /metrics wants "Authorization: Bearer <token>"
+    'METRICS_TOKEN': os.getenv('METRICS_TOKEN', ''),
+    # repeats of one query shape in a request that count as an N+1
+    'N_PLUS_ONE_THRESHOLD': int(os.getenv('N_PLUS_ONE_THRESHOLD', 5)),
+}
+
+# Resized copies of each uploaded cover, made by "manage.py process_covers"
+COVERS = {
+    'VARIANTS': {
+        'thumbnail': (160, 240),
+        'medium': (400, 600),
+    },
+    'FORMATS': ['JPEG', 'WEBP'],
+    'QUALITY': 82,
+    'BATCH_SIZE': 20,
+    'WORKERS': 4,
+    'POLL_INTERVAL': 2.0,
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_SECONDS': 60,
+    'MAX_BACKOFF_SECONDS': 3600,
+}
+
+CIRCULATION = {
+    'LOAN_DAYS': 21,
+    'LOAN_DAYS_BY_ROLE': {},
+    'HOLD_DAYS': 3,
+    # most ISBNs one bulk checkout or reservation may ask for
+    'BATCH_LIMIT': int(os.getenv('CIRCULATION_BATCH_LIMIT', 20)),
+    # returned loans older than this are moved to the archive by
+    # "manage.py archive_loans"
+    'ARCHIVE_AFTER_DAYS': int(os.getenv('LOAN_ARCHIVE_AFTER_DAYS', 30)),
+}
+
+# Courier templates for notifications added after the original three
+NOTIFICATION_TEMPLATES = {
+    'hold_ready': os.getenv('HOLD_READY_TEMPLATE', ''),
+    'overdue_reminder': os.getenv('OVERDUE_REMINDER_TEMPLATE', ''),
+    'checkout_summary': os.getenv('CHECKOUT_SUMMARY_TEMPLATE', ''),
+    'reservation_summary': os.getenv('RESERVATION_SUMMARY_TEMPLATE', ''),
+}
@@ -0,0 +1,35 @@
+from .middleware import TRANSACTION_RE
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_query_budget(url_name:str, budget:int=None, using:str=DEFAULT_DB_ALIAS):
+    # Fails when the wrapped block runs more queries than the endpoint's entry
+    # in settings.QUERY_BUDGETS. Budgets are per request, not per row, so a
+    # list endpoint that regresses to N+1 fails as soon as it returns a few rows.
+    if budget is None:
+        budget = settings.QUERY_BUDGETS[url_name]
+
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    # transaction control isn't counted; inside a test case every atomic
+    # block is a savepoint that a request on its own wouldn't run
+    queries = [query['sql'] for query in context.captured_queries if not TRANSACTION_RE.match(query['sql'])]
+    if len(queries) > budget:
+        listing = '\n'.join(f'{i}. {sql}' for i, sql in enumerate(queries, start=1))
+        raise QueryBudgetExceeded(
+            f"'{url_name}' ran {len(queries)} queries, budget is {budget}:\n{listing}"
+        )
+
+
+class QueryBudgetMixin:
+    def assertQueryBudget(self, url_name:str, budget:int=None, using:str=DEFAULT_DB_ALIAS):
+        return assert_query_budget(url_name, budget=budget, using=using)
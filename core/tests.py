@@ -0,0 +1,222 @@
+import datetime, decimal, json, threading, uuid
+from . import throttling
+from .metrics import registry
+from .middleware import query_shape
+from .renderers import FastJSONRenderer
+from .routers import ReadConnectionRouter, RoutingState, _pin_key, current_routing, set_routing_user
+from .throttling import LocalBuckets
+from accounts.tests import client_for, make_user
+from books.models import Book
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from notifications.models import OutboundEmail
+from rest_framework.renderers import JSONRenderer
+from unittest import mock
+
+
+THROTTLES = {**settings.THROTTLES, 'LOCAL_MAX_KEYS':3}
+
+
+@override_settings(THROTTLES=THROTTLES)
+class LocalBucketsTests(SimpleTestCase):
+    def setUp(self):
+        self.buckets = LocalBuckets()
+
+    def test_refuses_an_empty_bucket(self):
+        self.assertEqual(self.buckets.take('a', 2, 1.0, 0), 0)
+        self.assertEqual(self.buckets.take('a', 2, 1.0, 0), 0)
+        self.assertEqual(self.buckets.take('a', 2, 1.0, 0), 1.0)
+        self.assertEqual(self.buckets.take('a', 2, 1.0, 1.0), 0)
+
+    def test_keys_are_capped(self):
+        # none of these buckets is full again, so none could be pruned
+        for i in range(100):
+            self.buckets.take(f'key{i}', 5, 60.0, 0)
+        self.assertEqual(list(self.buckets.full_at), ['key97', 'key98', 'key99'])
+
+    def test_evicts_the_least_recently_used(self):
+        self.buckets.take('flood', 1, 60.0, 0)
+        for i in range(5):
+            # still refused, so it stays
+            self.assertGreater(self.buckets.take('flood', 1, 60.0, i), 0)
+            self.buckets.take(f'key{i}', 1, 60.0, i)
+        self.assertEqual(list(self.buckets.full_at), ['key3', 'flood', 'key4'])
+
+    def test_concurrent_takes_on_one_key(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            waits = list(executor.map(lambda i: self.buckets.take('a', 10, 60.0, 0), range(50)))
+        self.assertEqual(waits.count(0), 10)
+
+    def test_other_keys_are_not_held_up(self):
+        stripes = LocalBuckets.LOCK_STRIPES
+        other = next(f'key{i}' for i in range(100) if hash(f'key{i}') % stripes != hash('a') % stripes)
+        with self.buckets.locks[hash('a') % stripes]:
+            thread = threading.Thread(target=self.buckets.take, args=(other, 2, 1.0, 0))
+            thread.start()
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+        self.assertIn(other, self.buckets.full_at)
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = client_for(make_user('member'))
+
+    def search(self):
+        return self.client.get(reverse('search_books') + '?query=book')
+
+    def test_retry_after(self):
+        for backend in ('local', 'cache'):
+            config = {**settings.THROTTLES, 'ENABLED':True, 'BACKEND':backend, 'RATES':{'search_books':'2/min'}}
+            with self.subTest(backend), override_settings(THROTTLES=config), \
+                    mock.patch.object(throttling, 'local_buckets', LocalBuckets()):
+                self.assertEqual(self.search().status_code, 200)
+                self.assertEqual(self.search().status_code, 200)
+                response = self.search()
+                self.assertEqual(response.status_code, 429)
+                # the next token is 30 seconds away
+                self.assertIn(int(response['Retry-After']), (29, 30))
+
+
+class ReadConnectionRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReadConnectionRouter()
+        self.state = RoutingState()
+        self.state.user_id = 'user1'
+        self.token = current_routing.set(self.state)
+        self.addCleanup(current_routing.reset, self.token)
+
+    def route(self):
+        # outside the test's transaction, as a request's reads would be
+        with mock.patch.object(connections['default'], 'in_atomic_block', False):
+            return self.router.db_for_read(Book)
+
+    def test_test_mirrors_are_not_replicas(self):
+        self.assertEqual(self.router.replicas(), [])
+
+    @mock.patch.object(ReadConnectionRouter, 'replicas', return_value=['replica_1'])
+    def test_reads_go_to_a_replica(self, replicas):
+        self.assertEqual(self.route(), 'replica_1')
+        # only accounts and books are read from replicas
+        with mock.patch.object(connections['default'], 'in_atomic_block', False):
+            self.assertEqual(self.router.db_for_read(OutboundEmail), 'default')
+
+    def test_reads_outside_a_request_use_the_primary(self):
+        current_routing.set(None)
+        with mock.patch.object(ReadConnectionRouter, 'replicas', return_value=['replica_1']):
+            self.assertEqual(self.route(), 'default')
+
+    @mock.patch.object(ReadConnectionRouter, 'replicas', return_value=['replica_1'])
+    def test_reads_after_a_write_stay_on_the_primary(self, replicas):
+        self.assertEqual(self.router.db_for_write(Book), 'default')
+        self.assertEqual(self.route(), 'default')
+
+        # the user's next request is pinned too, until the lag has passed
+        current_routing.set(RoutingState())
+        set_routing_user('user1')
+        self.assertEqual(self.route(), 'default')
+
+        cache.delete(_pin_key('user1'))
+        current_routing.set(RoutingState())
+        set_routing_user('user1')
+        self.assertEqual(self.route(), 'replica_1')
+
+    @mock.patch.object(ReadConnectionRouter, 'replicas', return_value=['replica_1'])
+    def test_another_users_reads_are_not_pinned(self, replicas):
+        self.router.db_for_write(Book)
+        current_routing.set(RoutingState())
+        set_routing_user('user2')
+        self.assertEqual(self.route(), 'replica_1')
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'success':True,
+        'books':[{
+            'book_id':uuid.UUID('12345678123456781234567812345678'),
+            'date_published':datetime.date(2001, 1, 1),
+            'created_at':datetime.datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            'fine':decimal.Decimal('1.50'),
+            'title':'Émile',
+            'pages':None,
+        }],
+        1:'non-string key',
+    }
+
+    def test_matches_the_stdlib_renderer(self):
+        fast = FastJSONRenderer().render(self.data, 'application/json')
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(self.data, 'application/json')))
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch('core.renderers.orjson', None):
+            fast = FastJSONRenderer().render(self.data, 'application/json')
+        self.assertEqual(fast, JSONRenderer().render(self.data, 'application/json'))
+
+    def test_indented_output_is_left_to_drf(self):
+        rendered = FastJSONRenderer().render(self.data, 'application/json; indent=2')
+        self.assertEqual(rendered, JSONRenderer().render(self.data, 'application/json; indent=2'))
+
+    def test_no_content(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = make_user('member')
+        cls.book = Book.objects.create(
+            isbn='0000000000001', title='Book 1', description='A book', authors='Author 1', genre='Fantasy',
+            publisher='Penguin', language='English', date_published=datetime.date(2001, 1, 1)
+        )
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.client = client_for(self.member)
+
+    def metrics(self) -> list:
+        return self.client.get(reverse('metrics')).content.decode().splitlines()
+
+    def test_counts_requests_and_queries(self):
+        for url_name in ('get_particular_book', 'async_get_particular_book'):
+            with self.subTest(url_name):
+                cache.clear()
+                url = reverse(url_name, args=[self.book.isbn])
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                    self.client.get(url)
+                # read before /metrics is requested, which clears the log
+                count = len(queries)
+                self.assertGreater(count, 0)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('db;dur=', response['Server-Timing'])
+
+                lines = self.metrics()
+                self.assertIn(f'http_requests_total{{method="GET",route="{url_name}",status="200"}} 2', lines)
+                self.assertIn(f'db_queries_total{{route="{url_name}"}} {count}', lines)
+                self.assertIn(f'http_request_duration_seconds_count{{route="{url_name}"}} 2', lines)
+
+    def test_metrics_requests_are_not_counted(self):
+        self.metrics()
+        self.assertFalse([line for line in self.metrics() if 'route="metrics"' in line])
+
+    @override_settings(INSTRUMENTATION={**settings.INSTRUMENTATION, 'METRICS_TOKEN':'secret'})
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class QueryShapeTests(SimpleTestCase):
+    def test_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE a = 'x' AND b = 10 AND c IN (%s, %s, %s)"),
+            query_shape("SELECT * FROM t WHERE a = 'y' AND b = 20 AND c IN (%s)")
+        )
@@ -0,0 +1,132 @@
+import math, threading, time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from functools import lru_cache
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s':1, 'sec':1, 'second':1, 'm':60, 'min':60, 'minute':60, 'h':3600, 'hour':3600, 'd':86400, 'day':86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate:str):
+    # '10/min' is a bucket of 10 tokens refilled at one every 6 seconds
+    count, period = rate.split('/')
+    count = int(count)
+    return count, PERIODS[period] / count
+
+
+# A bucket is kept as the time it will be full again rather than as a token
+# count: taking a token moves that time one interval later, and a request is
+# refused while it is more than a whole bucket ahead of now.
+
+class LocalBuckets:
+    # Per process. Buckets are kept least recently used first and the oldest
+    # are evicted past LOCAL_MAX_KEYS, so a flood of new keys costs the same
+    # per request. A key that is still being refused counts as used, so it
+    # isn't evicted and handed a full bucket.
+    #
+    # A bucket's read-modify-write holds one of LOCK_STRIPES locks, picked by
+    # key, so requests for different keys don't queue behind each other. The
+    # recency order and eviction are single OrderedDict operations, each
+    # atomic under the GIL; another key's eviction can still drop this key
+    # between two of them, which just hands it a full bucket early.
+    LOCK_STRIPES = 64
+
+    def __init__(self):
+        self.full_at = OrderedDict()
+        self.locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def take(self, key:str, capacity:int, interval:float, now:float) -> float:
+        with self.locks[hash(key) % self.LOCK_STRIPES]:
+            full_at = max(self.full_at.get(key, now), now) + interval
+            wait = full_at - now - capacity * interval
+            if wait > 0:
+                self._touch(key)
+                return wait
+
+            self.full_at[key] = full_at
+            self._touch(key)
+
+        while len(self.full_at) > settings.THROTTLES['LOCAL_MAX_KEYS']:
+            try:
+                self.full_at.popitem(last=False)
+            except KeyError:
+                break
+        return 0
+
+    def _touch(self, key:str):
+        try:
+            self.full_at.move_to_end(key)
+        except KeyError:
+            pass
+
+
+class CacheBuckets:
+    # Shared by every worker through the cache. The bucket is an integer
+    # number of milliseconds, so taking a token is a single atomic incr.
+    def take(self, key:str, capacity:int, interval:float, now:float) -> float:
+        now_ms = int(now * 1000)
+        step = max(1, round(interval * 1000))
+        # the key outlives the bucket's refill, so a missing key is a full bucket
+        timeout = math.ceil(capacity * interval) + 1
+
+        try:
+            full_at = cache.incr(key, step)
+        except ValueError:
+            full_at = None
+
+        if full_at is None or full_at - step < now_ms:
+            # full: start over from now
+            cache.set(key, now_ms + step, timeout)
+            return 0
+
+        wait = full_at - now_ms - capacity * step
+        if wait > 0:
+            # a refused request takes no token
+            try:
+                cache.decr(key, step)
+            except ValueError:
+                pass
+            return wait / 1000
+
+        cache.touch(key, timeout)
+        return 0
+
+
+local_buckets = LocalBuckets()
+cache_buckets = CacheBuckets()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    # Limits each user, or each IP address when anonymous, on every route
+    # that has a rate in settings.THROTTLES['RATES'], by URL name.
+    def __init__(self):
+        self.delay = None
+
+    def get_rate(self, request):
+        config = settings.THROTTLES
+        match = request.resolver_match
+        if match is None:
+            return None
+        return config['RATES'].get(match.url_name, config['DEFAULT_RATE'])
+
+    def get_cache_key(self, request) -> str:
+        user = request.user
+        ident = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{self.get_ident(request)}'
+        return f'throttle:{request.resolver_match.url_name}:{ident}'
+
+    def allow_request(self, request, view) -> bool:
+        config = settings.THROTTLES
+        rate = self.get_rate(request) if config['ENABLED'] else None
+        if not rate:
+            return True
+
+        capacity, interval = parse_rate(rate)
+        buckets = cache_buckets if config['BACKEND'] == 'cache' else local_buckets
+        self.delay = buckets.take(self.get_cache_key(request), capacity, interval, time.time())
+        return not self.delay
+
+    def wait(self):
+        return self.delay
@@ -0,0 +1,5 @@
+from .models import OutboundEmail
+from django.contrib import admin
+
+
+admin.site.register(OutboundEmail)
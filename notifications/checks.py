@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_notification_templates(app_configs, **kwargs):
+    return [
+        Warning(
+            f"NOTIFICATION_TEMPLATES['{name}'] is not set, so these emails are not sent.",
+            hint=f'Set the {name.upper()}_TEMPLATE environment variable to a Courier template id.',
+            id='notifications.W001',
+        )
+        for name, template in settings.NOTIFICATION_TEMPLATES.items()
+        if not template
+    ]
@@ -0,0 +1,27 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications.worker import drain
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX['BATCH_SIZE'])
+        parser.add_argument('--workers', type=int, default=settings.OUTBOX['WORKERS'])
+        parser.add_argument('--poll-interval', type=float, default=settings.OUTBOX['POLL_INTERVAL'])
+
+    def handle(self, *args, **options):
+        while True:
+            totals = drain(batch_size=options['batch_size'], workers=options['workers'])
+
+            if any(totals.values()):
+                self.stdout.write(
+                    f"sent={totals['sent']} retried={totals['retried']} dead={totals['dead']}"
+                )
+            if options['once']:
+                return
+
+            time.sleep(options['poll_interval'])
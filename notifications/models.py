@@ -0,0 +1,34 @@
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Dead', 'Dead')
+    ]
+
+    id = models.UUIDField(primary_key=True, unique=True, default=uuid.uuid4)
+    email = models.EmailField()
+    template = models.CharField(max_length=100)
+    data = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    lease_token = models.UUIDField(null=True, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.template} to {self.email} ({self.status})'
+
+    class Meta:
+        ordering = ('created_at',)
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
@@ -0,0 +1,150 @@
+from .models import OutboundEmail
+from .transports import BaseTransport, LocMemTransport
+from .checks import check_notification_templates
+from .utils import enqueue_email, enqueue_emails
+from .worker import claim_batch, deliver
+from datetime import timedelta
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from io import StringIO
+
+
+class FailingTransport(BaseTransport):
+    def send(self, email:str, template:str, data:dict):
+        raise ConnectionError('courier is down')
+
+
+OUTBOX = {
+    'TRANSPORT': 'notifications.transports.LocMemTransport',
+    'BATCH_SIZE': 10,
+    'WORKERS': 2,
+    'POLL_INTERVAL': 0,
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_SECONDS': 30,
+    'MAX_BACKOFF_SECONDS': 3600,
+}
+
+
+def run_outbox() -> str:
+    out = StringIO()
+    call_command('run_outbox', '--once', stdout=out)
+    return out.getvalue()
+
+
+@override_settings(OUTBOX=OUTBOX)
+class RunOutboxTests(TestCase):
+    def setUp(self):
+        LocMemTransport.outbox.clear()
+
+    def test_delivers_pending_emails(self):
+        enqueue_email('reader@example.com', 'welcome', {'name':'Ama'})
+
+        self.assertIn('sent=1', run_outbox())
+        self.assertEqual(LocMemTransport.outbox, [{'email':'reader@example.com', 'template':'welcome', 'data':{'name':'Ama'}}])
+
+        message = OutboundEmail.objects.get()
+        self.assertEqual(message.status, 'Sent')
+        self.assertIsNone(message.lease_token)
+        self.assertIsNotNone(message.sent_at)
+
+    def test_sent_emails_are_not_sent_again(self):
+        enqueue_email('reader@example.com', 'welcome', {})
+        run_outbox()
+
+        self.assertEqual(run_outbox(), '')
+        self.assertEqual(len(LocMemTransport.outbox), 1)
+
+    def test_failed_send_is_retried_after_backoff(self):
+        message = enqueue_email('reader@example.com', 'welcome', {})
+
+        with override_settings(OUTBOX={**OUTBOX, 'TRANSPORT':'notifications.tests.FailingTransport'}):
+            self.assertIn('retried=1', run_outbox())
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'Pending')
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.last_error, 'courier is down')
+        # 30 seconds, give or take the jitter
+        delay = (message.next_attempt_at - timezone.now()).total_seconds()
+        self.assertTrue(20 < delay <= 36, delay)
+
+        # not due yet
+        self.assertEqual(run_outbox(), '')
+
+        OutboundEmail.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        self.assertIn('sent=1', run_outbox())
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'Sent')
+
+    def test_backoff_grows_with_attempts(self):
+        message = enqueue_email('reader@example.com', 'welcome', {})
+        OutboundEmail.objects.filter(id=message.id).update(attempts=1)
+
+        with override_settings(OUTBOX={**OUTBOX, 'TRANSPORT':'notifications.tests.FailingTransport'}):
+            run_outbox()
+
+        message.refresh_from_db()
+        delay = (message.next_attempt_at - timezone.now()).total_seconds()
+        self.assertTrue(45 < delay <= 72, delay)
+
+    def test_dead_letters_after_max_attempts(self):
+        message = enqueue_email('reader@example.com', 'welcome', {})
+        OutboundEmail.objects.filter(id=message.id).update(attempts=OUTBOX['MAX_ATTEMPTS'] - 1)
+
+        with override_settings(OUTBOX={**OUTBOX, 'TRANSPORT':'notifications.tests.FailingTransport'}):
+            with self.assertLogs('notifications.worker', 'ERROR'):
+                self.assertIn('dead=1', run_outbox())
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'Dead')
+        self.assertEqual(message.attempts, OUTBOX['MAX_ATTEMPTS'])
+
+        OutboundEmail.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(run_outbox(), '')
+        self.assertEqual(LocMemTransport.outbox, [])
+
+    def test_expired_lease_is_reclaimed(self):
+        message = enqueue_email('reader@example.com', 'welcome', {})
+        claim_batch(10)
+        OutboundEmail.objects.filter(id=message.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertIn('sent=1', run_outbox())
+
+    def test_worker_whose_lease_expired_leaves_the_row_alone(self):
+        message = enqueue_email('reader@example.com', 'welcome', {})
+        stale = claim_batch(10)
+
+        # the lease runs out and another worker claims the row again
+        OutboundEmail.objects.filter(id=message.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+        claimed = claim_batch(10)
+
+        deliver(stale, workers=1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'Sending')
+        self.assertEqual(message.lease_token, claimed[0].lease_token)
+
+        with override_settings(OUTBOX={**OUTBOX, 'TRANSPORT':'notifications.tests.FailingTransport'}):
+            deliver(stale, workers=1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'Sending')
+        self.assertEqual(message.attempts, 0)
+
+
+class UnsetTemplateTests(TestCase):
+    def test_email_without_a_template_is_not_queued(self):
+        with self.assertLogs('notifications.utils', 'WARNING'):
+            self.assertIsNone(enqueue_email('reader@example.com', '', {}))
+            enqueue_emails([
+                {'email':'reader@example.com', 'template':'', 'data':{}},
+                {'email':'other@example.com', 'template':'welcome', 'data':{}},
+            ])
+
+        self.assertEqual(list(OutboundEmail.objects.values_list('email', flat=True)), ['other@example.com'])
+
+    @override_settings(NOTIFICATION_TEMPLATES={'hold_ready':'', 'overdue_reminder':'T1'})
+    def test_unset_templates_are_reported_at_startup(self):
+        warnings = check_notification_templates(None)
+        self.assertEqual([warning.id for warning in warnings], ['notifications.W001'])
+        self.assertIn("'hold_ready'", warnings[0].msg)
@@ -0,0 +1,41 @@
+import os
+from django.conf import settings
+from django.utils.module_loading import import_string
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class BaseTransport:
+    def send(self, email:str, template:str, data:dict):
+        raise NotImplementedError
+
+
+class CourierTransport(BaseTransport):
+    def __init__(self):
+        from trycourier import Courier
+
+        self.client = Courier(auth_token=os.getenv('AUTH_TOKEN'))
+
+    def send(self, email:str, template:str, data:dict):
+        self.client.send_message(
+            message={
+                "to": {
+                "email": email,
+                },
+                "template": template,
+                "data": data,
+            }
+        )
+
+
+class LocMemTransport(BaseTransport):
+    # Keeps sent messages in memory; point OUTBOX['TRANSPORT'] here in tests.
+    outbox = []
+
+    def send(self, email:str, template:str, data:dict):
+        self.outbox.append({'email':email, 'template':template, 'data':data})
+
+
+def get_transport() -> BaseTransport:
+    return import_string(settings.OUTBOX['TRANSPORT'])()
@@ -0,0 +1,28 @@
+import logging
+from .models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+# An email without a template is never queued: the transport would reject
+# it on every attempt until it was dead-lettered. notifications.checks warns
+# about unset templates at startup.
+
+def enqueue_email(email:str, template:str, data:dict) -> OutboundEmail:
+    # Call inside the transaction that made the change being notified about,
+    # so the message is only ever delivered for committed work.
+    if not template:
+        logger.warning('Email to %s not queued: no template is configured', email)
+        return None
+    return OutboundEmail.objects.create(email=email, template=template, data=data)
+
+
+def enqueue_emails(messages:list) -> list:
+    queued = [message for message in messages if message['template']]
+    if len(queued) < len(messages):
+        logger.warning('%s emails not queued: no template is configured', len(messages) - len(queued))
+
+    return OutboundEmail.objects.bulk_create(
+        [OutboundEmail(email=message['email'], template=message['template'], data=message['data']) for message in queued]
+    )
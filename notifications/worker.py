@@ -0,0 +1,103 @@
+import logging, random, uuid
+from .models import OutboundEmail
+from .transports import get_transport
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+def claim_batch(batch_size:int) -> list:
+    now = timezone.now()
+    token = uuid.uuid4()
+    claimable = (
+        Q(status='Pending', next_attempt_at__lte=now) |
+        Q(status='Sending', locked_until__lt=now) # lease of a crashed worker ran out
+    )
+
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(claimable)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        # the claim is re-checked in the UPDATE so two workers on a backend
+        # without SKIP LOCKED can never both take the same row
+        OutboundEmail.objects.filter(claimable, id__in=ids).update(
+            status='Sending',
+            lease_token=token,
+            locked_until=now + timedelta(seconds=settings.OUTBOX['LEASE_SECONDS'])
+        )
+
+    return list(OutboundEmail.objects.filter(lease_token=token, status='Sending'))
+
+
+def backoff_delay(attempts:int) -> timedelta:
+    base = settings.OUTBOX['BACKOFF_SECONDS']
+    delay = min(base * 2 ** (attempts - 1), settings.OUTBOX['MAX_BACKOFF_SECONDS'])
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _send(transport, message:OutboundEmail):
+    try:
+        transport.send(email=message.email, template=message.template, data=message.data)
+    except Exception as e:
+        return message, e
+    return message, None
+
+
+def deliver(messages:list, workers:int) -> dict:
+    transport = get_transport()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda message: _send(transport, message), messages))
+
+    now = timezone.now()
+    sent = [message.id for message, error in results if error is None]
+    # a row whose lease ran out may have been claimed again by another
+    # worker; it is theirs to update now
+    OutboundEmail.objects.filter(id__in=sent, lease_token__in={message.lease_token for message in messages}).update(
+        status='Sent', sent_at=now, lease_token=None, locked_until=None, last_error=''
+    )
+
+    dead = 0
+    for message, error in results:
+        if error is None:
+            continue
+
+        attempts = message.attempts + 1
+        if attempts >= settings.OUTBOX['MAX_ATTEMPTS']:
+            dead += 1
+            status = 'Dead'
+            logger.error('Outbound email %s dead-lettered after %s attempts: %s', message.id, attempts, error)
+        else:
+            status = 'Pending'
+
+        OutboundEmail.objects.filter(id=message.id, lease_token=message.lease_token).update(
+            status=status,
+            attempts=attempts,
+            next_attempt_at=now + backoff_delay(attempts),
+            lease_token=None,
+            locked_until=None,
+            last_error=str(error)
+        )
+
+    return {'sent':len(sent), 'retried':len(results) - len(sent) - dead, 'dead':dead}
+
+
+def drain(batch_size:int, workers:int) -> dict:
+    totals = {'sent':0, 'retried':0, 'dead':0}
+
+    while True:
+        messages = claim_batch(batch_size)
+        if not messages:
+            return totals
+
+        for key, value in deliver(messages, workers).items():
+            totals[key] += value